@@ -0,0 +1,188 @@
+__author__ = 'pkorus'
+
+# Generator of synthetic manuscripts (LaTeX, Markdown and plaintext) of a given length for benchmarking. The documents
+# are random but deterministic (for a given seed) and use the constructs handled by the parsers: sections, abstracts,
+# citations, references, text styles, inline and display equations, floats, and itemized / enumerated lists.
+# Usage (from the root directory of the toolkit): python benchmarks/manuscripts.py -p pages -f format [-s seed] > doc
+
+import random
+
+# Characters per page (the same as in the statistics of the TextStats plugin)
+page_size = 1500
+
+nouns = ['method', 'image', 'network', 'result', 'model', 'system', 'approach', 'dataset', 'experiment', 'analysis',
+         'performance', 'accuracy', 'algorithm', 'feature', 'detector', 'signal', 'evaluation', 'framework', 'problem',
+         'solution', 'parameter', 'distribution', 'sample', 'estimate', 'camera', 'sensor', 'noise', 'pattern',
+         'enumeration', 'review', 'implementation', 'optimization', 'representation', 'classifier', 'benchmark']
+verbs = ['improves', 'shows', 'reduces', 'increases', 'describes', 'captures', 'requires', 'provides', 'outperforms',
+         'estimates', 'detects', 'measures', 'achieves', 'uses', 'introduces', 'considers', 'supports', 'predicts']
+passive = ['is based on', 'was evaluated on', 'is followed by', 'were obtained from', 'is described in',
+           'was trained on', 'are shown in', 'is known from']
+weak = ['is', 'are', 'has', 'does', 'have']
+adjectives = ['robust', 'efficient', 'novel', 'simple', 'accurate', 'large', 'small', 'important', 'good', 'nice',
+              'different', 'typical', 'significant', 'reliable', 'standard', 'complex']
+adverbs = ['clearly', 'significantly', 'typically', 'actually', 'really', 'probably', 'simply', 'totally', 'likely']
+connectives = ['However,', 'In addition,', 'As a result,', 'In this paper,', 'Moreover,', 'Note that', 'Typically,']
+phrases = ['in order to', 'due to the fact that', 'a number of', 'as well as', 'in terms of', 'with respect to']
+determiners = ['the', 'a', 'our', 'this', 'each', 'every']
+
+
+class Generator:
+    """
+    Generates text fragments in the syntax of a given format ('tex', 'md' or 'txt').
+    """
+
+    def __init__(self, output_format, seed=0):
+        self.format = output_format
+        self.random = random.Random(seed)
+        self.labels = 0
+
+    def choice(self, items):
+        return self.random.choice(items)
+
+    def noun_phrase(self):
+        words = [self.choice(determiners)]
+        if self.random.random() < 0.4:
+            words.append(self.choice(adjectives))
+        words.append(self.choice(nouns))
+        return ' '.join(words)
+
+    def markup(self, text):
+        # Inline markup: citations, references, equations & text styles
+        dice = self.random.random()
+        if self.format == 'tex':
+            if dice < 0.15:
+                return '{} \\cite{{ref{}}}'.format(text, self.random.randint(1, 99))
+            elif dice < 0.25:
+                return '{} in Fig.~\\ref{{fig:{}}}'.format(text, self.random.randint(1, 9))
+            elif dice < 0.35:
+                return '{} $x_{}^2 + \\alpha$'.format(text, self.random.randint(1, 9))
+            elif dice < 0.45:
+                return '\\emph{{{}}}'.format(text)
+        elif self.format == 'md':
+            if dice < 0.1:
+                return '[{}](http://example.com/{})'.format(text, self.random.randint(1, 99))
+            elif dice < 0.2:
+                return '**{}**'.format(text)
+            elif dice < 0.25:
+                return '{} `code`'.format(text)
+        return text
+
+    def sentence(self):
+        parts = []
+        if self.random.random() < 0.2:
+            parts.append(self.choice(connectives))
+        parts.append(self.noun_phrase())
+        dice = self.random.random()
+        if dice < 0.15:
+            parts.append(self.choice(passive))
+        elif dice < 0.3:
+            parts.append(self.choice(weak))
+        else:
+            if self.random.random() < 0.3:
+                parts.append(self.choice(adverbs))
+            parts.append(self.choice(verbs))
+        parts.append(self.markup(self.noun_phrase()))
+        # Optional clauses make the sentence lengths vary (including some very long sentences)
+        for i in range(self.random.choice([0, 0, 1, 1, 2, 4])):
+            parts.append(self.choice(phrases) if self.random.random() < 0.3 else self.choice(['and', 'which', 'that', 'while']))
+            parts.append(self.markup(self.noun_phrase()))
+            parts.append(self.choice(verbs))
+        text = ' '.join(parts)
+        return text[0].upper() + text[1:] + '.'
+
+    def paragraph(self):
+        return ' '.join([self.sentence() for i in range(self.random.randint(2, 7))])
+
+    def header(self):
+        if self.format == 'tex':
+            return ['\\documentclass{article}\n', '\\begin{document}\n', '\n', '\\title{A Synthetic Manuscript}\n', '\n',
+                    '\\author{Benchmark Generator}\n', '\n', '\\maketitle\n', '\n', '\\begin{abstract}\n'] + \
+                   [self.paragraph() + '\n', '\\end{abstract}\n', '\n']
+        elif self.format == 'md':
+            return ['# A Synthetic Manuscript\n', '\n']
+        return ['A Synthetic Manuscript\n', '\n']
+
+    def footer(self):
+        return ['\\end{document}\n'] if self.format == 'tex' else []
+
+    def section(self, level=1):
+        title = '{} {} {}'.format(self.choice(adjectives), self.choice(nouns), self.choice(nouns)).capitalize()
+        if self.format == 'tex':
+            return ['\\{}section{{{}}}\n'.format('sub' * (level - 1), title), '\n']
+        elif self.format == 'md':
+            return ['{} {}\n'.format('#' * (level + 1), title), '\n']
+        return [title + '\n', '\n'] if level == 1 else []
+
+    def listing(self, numbered=False):
+        items = [self.sentence() for i in range(self.random.randint(2, 5))]
+        if self.format == 'tex':
+            environment = 'enumerate' if numbered else 'itemize'
+            return ['\\begin{{{}}}\n'.format(environment)] + ['\\item {}\n'.format(i) for i in items] + \
+                   ['\\end{{{}}}\n'.format(environment), '\n']
+        elif self.format == 'md' and numbered:
+            return ['{}. {}\n'.format(n + 1, i) for n, i in enumerate(items)] + ['\n']
+        return ['- {}\n'.format(i) for i in items] + ['\n']
+
+    def equation(self):
+        if self.format != 'tex':
+            return []
+        self.labels += 1
+        return ['\\begin{equation}\n', '\\label{{eq:{}}}\n'.format(self.labels),
+                'y_{0} = \\sum_{{k=1}}^{{N}} \\alpha_k x_{{{0}-k}} + \\epsilon_{0}\n'.format(self.labels),
+                '\\end{equation}\n', '\n']
+
+    def float(self):
+        if self.format != 'tex':
+            return []
+        self.labels += 1
+        environment = self.choice(['figure', 'table'])
+        return ['\\begin{{{}}}[t]\n'.format(environment), '\\centering\n',
+                '\\includegraphics[width=\\columnwidth]{{figure{}}}\n'.format(self.labels),
+                '\\caption{{{}}}\n'.format(self.sentence()), '\\label{{fig:{}}}\n'.format(self.labels),
+                '\\end{{{}}}\n'.format(environment), '\n']
+
+    def block(self):
+        dice = self.random.random()
+        if dice < 0.06:
+            return self.listing(self.random.random() < 0.5)
+        elif dice < 0.1:
+            return self.equation()
+        elif dice < 0.13:
+            return self.float()
+        elif dice < 0.18:
+            return self.section(2)
+        # One paragraph per line (lines of a block are merged without separators)
+        return [self.paragraph() + '\n', '\n']
+
+
+def generate(output_format, pages, seed=0):
+    """
+    Generates a synthetic manuscript.
+    :param output_format: 'tex', 'md' or 'txt'
+    :param pages: approximate length of the document (in pages of 1,500 characters)
+    :param seed: seed of the random generator (the same seed gives the same document)
+    :return: list of lines
+    """
+    if output_format not in ('tex', 'md', 'txt'):
+        raise ValueError('Unsupported format: {}'.format(output_format))
+    generator = Generator(output_format, seed)
+    lines = generator.header()
+    size = 0
+    while size < pages * page_size:
+        block = generator.section(1)
+        for i in range(generator.random.randint(4, 12)):
+            block += generator.block()
+        size += sum(len(l) for l in block)
+        lines += block
+    return lines + generator.footer()
+
+
+if __name__ == '__main__':
+    import sys, argparse
+    parser = argparse.ArgumentParser(description='Synthetic manuscript generator')
+    parser.add_argument('-p', '--pages', type=int, default=10, help='Length of the document in pages (default: 10)')
+    parser.add_argument('-f', '--format', type=str, default='tex', choices=['tex', 'md', 'txt'], help='Output format')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='Seed of the random generator')
+    args = parser.parse_args()
+    sys.stdout.writelines(generate(args.format, args.pages, args.seed))
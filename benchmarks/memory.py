@@ -0,0 +1,85 @@
+__author__ = 'pkorus'
+
+# Compares the peak memory (RSS) of parsing and POS tagging a synthetic LaTeX manuscript (see manuscripts.py) with the
+# current tree and with an earlier commit (by default, the first commit of the repository - before the columnar token
+# store). The earlier tree is exported with git archive; each tree runs its own LatexPaper parser and POS tagger plugin
+# in a separate process. The default length (4,300 pages) gives roughly 1M tokens.
+# Usage (from the root directory of the toolkit): python benchmarks/memory.py [-p pages] [-b commit]
+
+import os, sys, time, imp, shutil, tarfile, argparse, resource, tempfile, subprocess
+
+root_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+parser = argparse.ArgumentParser(description='Document representation memory benchmark')
+parser.add_argument('-p', '--pages', type=int, default=4300, help='Length of the document in pages (default: 4300)')
+parser.add_argument('-s', '--seed', type=int, default=0, help='Seed of the document generator')
+parser.add_argument('-b', '--baseline', type=str, help='Commit to compare with (default: the first commit)')
+parser.add_argument('--single', type=str, help=argparse.SUPPRESS)
+parser.add_argument('--input', type=str, help=argparse.SUPPRESS)
+args = parser.parse_args()
+
+
+def peak_rss():
+    # Peak resident set size of the process in MB (ru_maxrss is in kB on Linux, in bytes on OS X)
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage / (1024.0 * 1024.0) if sys.platform == 'darwin' else usage / 1024.0
+
+
+def run_single(tree, filename):
+    """
+    Parses & tags the document with the code of the given tree (run in a child process).
+    :return: (peak RSS, peak RSS before parsing, token count, time)
+    """
+    sys.path.insert(0, tree)
+    from swtk import paper
+    pos_tagger = imp.load_source('pos_tagger', os.path.join(tree, 'plugins', 'pos_tagger.py'))
+    with open(filename) as f:
+        lines = f.readlines()
+    before = peak_rss()
+    start = time.time()
+    p = paper.LatexPaper(lines, {})
+    pos_tagger.POSTaggerProcessor().process_text(p)
+    elapsed = time.time() - start
+    tokens = sum(len(s.tokens) for b in p.content for s in b.get_sentences())
+    return peak_rss(), before, tokens, elapsed
+
+
+def export_tree(commit, path):
+    archive = os.path.join(path, 'tree.tar')
+    subprocess.check_call(['git', 'archive', '-o', archive, commit], cwd=root_path)
+    with tarfile.open(archive) as f:
+        f.extractall(os.path.join(path, 'tree'))
+    return os.path.join(path, 'tree')
+
+
+if args.single:
+    print '{} {} {} {}'.format(*run_single(args.single, args.input))
+    sys.exit(0)
+
+import manuscripts
+
+baseline = args.baseline
+if baseline is None:
+    baseline = subprocess.check_output(['git', 'rev-list', '--max-parents=0', 'HEAD'], cwd=root_path).split()[-1]
+baseline = subprocess.check_output(['git', 'rev-parse', '--short', baseline], cwd=root_path).strip()
+
+workspace = tempfile.mkdtemp(prefix='swtk-memory-')
+try:
+    filename = os.path.join(workspace, 'manuscript.tex')
+    with open(filename, 'w') as f:
+        f.writelines(manuscripts.generate('tex', args.pages, args.seed))
+    trees = [(baseline, export_tree(baseline, workspace)), ('current', os.path.abspath(root_path))]
+
+    results = {}
+    for name, tree in trees:
+        output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--single', tree, '--input', filename],
+                                         cwd=tree, stderr=open(os.devnull, 'w'))
+        peak, before, tokens, elapsed = output.split()
+        results[name] = (float(peak), float(peak) - float(before))
+        print '{:<8} {:>12,} tokens {:10.1f} MB peak RSS ({:.1f} MB before parsing) {:8.1f} s'.format(
+            name, int(tokens), float(peak), float(before), float(elapsed))
+finally:
+    shutil.rmtree(workspace)
+
+print 'Peak RSS reduction: {:.1f}x (growth during parsing & tagging: {:.1f}x)'.format(
+    results[baseline][0] / results['current'][0], results[baseline][1] / max(results['current'][1], 1.0))
@@ -0,0 +1,44 @@
+__author__ = 'pkorus'
+
+# Compares the throughput of serial (per-sentence) and batched POS tagging on a scaled-up sample manuscript.
+# Usage (from the root directory of the toolkit): python benchmarks/pos_tagging.py [-n scale] [-w workers]
+
+import os, sys, time, argparse
+import nltk
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from swtk import paper
+from swtk import tagging
+
+parser = argparse.ArgumentParser(description='POS tagging throughput benchmark')
+parser.add_argument('-i', '--input', type=str, default='samples/introduction.tex', help='LaTeX document to scale up')
+parser.add_argument('-n', '--scale', type=int, default=20, help='How many times the document content is repeated')
+parser.add_argument('-w', '--workers', type=int, default=4, help='Number of worker processes for the parallel run')
+parser.add_argument('-b', '--batch-size', type=int, default=500, help='Number of sentences per batch')
+args = parser.parse_args()
+
+with open(args.input) as f:
+    lines = f.readlines()
+
+p = paper.LatexPaper(lines * args.scale, {})
+groups = [[[t.word for t in s.tokens] for s in b.get_sentences()] for b in p.content if b.count_as_paragraph]
+sentences = [s for g in groups for s in g]
+token_count = sum([len(s) for s in sentences])
+print 'Input: {} x {} = {:,} sentences, {:,} tokens'.format(args.input, args.scale, len(sentences), token_count)
+
+
+def benchmark(label, function):
+    start = time.time()
+    result = function()
+    elapsed = time.time() - start
+    print '{:<30} {:8.2f} s {:12,.0f} tokens/s'.format(label, elapsed, token_count / elapsed)
+    return result
+
+
+reference = benchmark('serial (nltk.pos_tag)', lambda: [nltk.pos_tag(s) for s in sentences])
+batched = benchmark('batched', lambda: tagging.tag_batched(groups, args.batch_size, 1))
+parallel = benchmark('batched, {} workers'.format(args.workers), lambda: tagging.tag_batched(groups, args.batch_size, args.workers))
+
+if batched != reference or parallel != reference:
+    print 'Error: tags differ from the serial reference'
+    sys.exit(1)
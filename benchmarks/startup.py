@@ -0,0 +1,50 @@
+__author__ = 'pkorus'
+
+# Measures the start-up overhead of the analyzer for different plugin selections: the total run time of a fresh
+# process analyzing a small document, and the time spent on loading, initializing & running the plugins alone (the
+# rest is mostly the import of NLTK). Every configuration is run in a separate process; medians are reported.
+# Usage (from the root directory of the toolkit): python benchmarks/startup.py [-n runs]
+
+import os, sys, time, argparse, subprocess
+
+start_time = time.time()
+root_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, root_path)
+
+parser = argparse.ArgumentParser(description='Analyzer start-up benchmark')
+parser.add_argument('-n', '--runs', type=int, default=5, help='Number of runs per configuration')
+parser.add_argument('--plugins', type=str, help=argparse.SUPPRESS)
+parser.add_argument('--skip-plugins', type=str, help=argparse.SUPPRESS)
+parser.add_argument('--single', help=argparse.SUPPRESS, action='store_true')
+args = parser.parse_args()
+
+if args.single:
+    from swtk import pipeline
+    selected = args.plugins.split(',') if args.plugins else None
+    skipped = args.skip_plugins.split(',') if args.skip_plugins else None
+    lines = ['A short document. It has only two sentences.\n', '\n']
+    start = time.time()
+    pipeline.load_plugins(root_path, selected, skipped)
+    pipeline.analyze(pipeline.supported_formats['.txt'], lines)
+    print time.time() - start_time, time.time() - start
+    sys.exit(0)
+
+configurations = [
+    ('all plugins', []),
+    ('stats only', ['--plugins', 'text_stats']),
+    ('without POS tagging', ['--skip-plugins', 'pos_tagger']),
+]
+
+print '{:<24} {:>10} {:>10}'.format('configuration', 'total', 'plugins')
+results = {}
+for label, options in configurations:
+    timings = []
+    for i in range(args.runs):
+        output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--single'] + options, stderr=open(os.devnull, 'w'))
+        timings.append([float(x) for x in output.split()])
+    total = sorted([t[0] for t in timings])[args.runs // 2]
+    plugins = sorted([t[1] for t in timings])[args.runs // 2]
+    results[label] = plugins
+    print '{:<24} {:9.3f}s {:9.3f}s'.format(label, total, plugins)
+
+print 'Plugin start-up speed-up (stats only): {:.1f}x'.format(results['all plugins'] / max(results['stats only'], 1e-6))
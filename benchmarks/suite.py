@@ -0,0 +1,244 @@
+__author__ = 'pkorus'
+
+# Benchmark suite: analyzes synthetic manuscripts (see manuscripts.py) of different formats and lengths, and measures
+# the time and peak memory of every stage of the analysis - parsing, sentence splitting, tokenization, POS tagging, each
+# of the remaining plugins, and HTML rendering. The plugins run the same way as in the analyzer (Plugin.run_all) and are
+# measured by the profiler; the time of the traversals not spent in any plugin is reported as plugin dispatch. Memory of
+# sentence splitting and tokenization (measured inside the parser) is not measured. Every configuration is run in a
+# separate process; medians are reported.
+# The results can be saved as JSON and compared with a baseline (e.g., from a previous commit) to detect regressions.
+# Usage (from the root directory of the toolkit):
+#   python benchmarks/suite.py [-p 1,10,100] [-f tex,md,txt] [-n runs] [-o results.json] [-c baseline.json]
+#   python benchmarks/suite.py -i results.json -c baseline.json   (compare saved results only)
+
+import os, sys, time, json, argparse, resource, subprocess
+
+root_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, root_path)
+
+# Bump whenever the structure of the results changes
+results_format = 2
+
+parser = argparse.ArgumentParser(description='Analyzer benchmark suite')
+parser.add_argument('-p', '--pages', type=str, default='1,10,100', help='Lengths of the documents in pages (default: 1,10,100)')
+parser.add_argument('-f', '--formats', type=str, default='tex,md,txt', help='Document formats (default: tex,md,txt)')
+parser.add_argument('-n', '--runs', type=int, default=3, help='Number of runs per configuration (default: 3)')
+parser.add_argument('-s', '--seed', type=int, default=0, help='Seed of the document generator')
+parser.add_argument('-m', '--math', help='Enable math support (inline and display equations)', action='store_true')
+parser.add_argument('--floats', help='Analyze the captions of floats', action='store_true')
+parser.add_argument('--plugins', type=str, help='Benchmark only the selected plugin modules (comma-separated)')
+parser.add_argument('--skip-plugins', type=str, help='Do not benchmark the given plugin modules (comma-separated)')
+parser.add_argument('-o', '--output', type=str, help='Save the results to a JSON file')
+parser.add_argument('-i', '--input', type=str, help='Load the results from a JSON file instead of running the benchmark')
+parser.add_argument('-c', '--compare', type=str, help='Compare the results with a baseline (JSON file); exits with 1 on regressions')
+parser.add_argument('-t', '--threshold', type=float, default=0.2, help='Relative slow-down reported as a regression (default: 0.2)')
+parser.add_argument('--min-time', type=float, default=0.02, help='Ignore differences of stages shorter than this (in seconds)')
+parser.add_argument('--single', type=str, help=argparse.SUPPRESS)
+args = parser.parse_args()
+
+
+def peak_memory():
+    # Peak resident set size of the process in MB (ru_maxrss is in kB on Linux, in bytes on OS X)
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage / (1024.0 * 1024.0) if sys.platform == 'darwin' else usage / 1024.0
+
+
+class NullSink:
+    """
+    File-like object that discards the output (and counts its size).
+    """
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, chunk):
+        self.size += len(chunk)
+
+
+class TimedSplitter:
+    """
+    Wraps the sentence tokenizer and measures the time spent in it.
+    """
+
+    def __init__(self, splitter):
+        self.splitter = splitter
+        self.time = 0.0
+
+    def tokenize(self, text):
+        start = time.time()
+        try:
+            return self.splitter.tokenize(text)
+        finally:
+            self.time += time.time() - start
+
+
+def run_single(output_format, pages):
+    """
+    Analyzes one synthetic document and returns the measurements (run in a child process).
+    """
+    import manuscripts
+    from swtk import paper, pipeline, processors, profiling
+
+    pipeline.configure(args.math, args.math, args.floats)
+    pipeline.load_plugins(root_path, args.plugins.split(',') if args.plugins else None,
+                          args.skip_plugins.split(',') if args.skip_plugins else None)
+    lines = manuscripts.generate(output_format, pages, args.seed)
+    stages = []
+
+    def measure(name, function):
+        memory = peak_memory()
+        start = time.time()
+        result = function()
+        stages.append({'name': name, 'time': time.time() - start, 'memory': peak_memory() - memory})
+        return result
+
+    # Sentence splitting and tokenization happen while parsing - measure them separately
+    splitter = paper.sent_detector = TimedSplitter(paper.sent_detector)
+    word_splitter = paper.word_splitter
+    tokenization = [0.0]
+
+    def timed_word_splitter(text):
+        start = time.time()
+        try:
+            return word_splitter(text)
+        finally:
+            tokenization[0] += time.time() - start
+
+    paper.word_splitter = timed_word_splitter
+    p = measure('parsing', lambda: pipeline.supported_formats['.' + output_format](lines, {}))
+    stages[0]['time'] -= splitter.time + tokenization[0]
+    stages.append({'name': 'sentence splitting', 'time': splitter.time, 'memory': None})
+    stages.append({'name': 'tokenization', 'time': tokenization[0], 'memory': None})
+
+    # Run the plugins as the analyzer does (shared traversals); POS taggers are reported as the tagging stage
+    profiler = profiling.enable()
+    try:
+        processors.Plugin.run_all(p)
+    finally:
+        profiling.disable()
+    classes = dict((cls.__name__, cls) for cls in processors.Plugin.plugins)
+    plugins = [r for r in profiler.to_records() if profiling.is_nested(r['name'])]
+    for record in plugins:
+        cls = classes.get(record['name'][len('plugin: '):])
+        name = 'tagging' if cls is not None and 'pos_tag' in cls.provides else record['name']
+        stages.append({'name': name, 'time': record['time'], 'memory': record['memory'] / 1048576.0})
+    dispatch = profiler.stages['plugins']['time'] - sum(r['time'] for r in plugins)
+    stages.append({'name': 'plugin dispatch', 'time': max(dispatch, 0.0), 'memory': None})
+
+    sink = NullSink()
+    measure('rendering', lambda: p.write_html(sink))
+
+    # Merge the stages of plugins that run in several scopes
+    merged = []
+    for stage in stages:
+        previous = [s for s in merged if s['name'] == stage['name']]
+        if len(previous) > 0:
+            previous[0]['time'] += stage['time']
+            if stage['memory'] is not None:
+                previous[0]['memory'] = (previous[0]['memory'] or 0.0) + stage['memory']
+        else:
+            merged.append(stage)
+    return {'format': output_format, 'pages': pages, 'characters': sum(len(l) for l in lines),
+            'sentences': len(p.get_all_sentences()), 'tokens': len(p.store), 'html_size': sink.size,
+            'stages': merged, 'total': sum(s['time'] for s in merged), 'peak_memory': peak_memory()}
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def run_configuration(output_format, pages):
+    runs = []
+    options = ['--single', '{}:{}'.format(output_format, pages), '-s', str(args.seed)]
+    for flag in ['math', 'floats']:
+        if getattr(args, flag):
+            options.append('--' + flag)
+    for flag in ['plugins', 'skip_plugins']:
+        if getattr(args, flag):
+            options += ['--' + flag.replace('_', '-'), getattr(args, flag)]
+    for i in range(args.runs):
+        output = subprocess.check_output([sys.executable, os.path.abspath(__file__)] + options, cwd=root_path, stderr=open(os.devnull, 'w'))
+        runs.append(json.loads(output))
+    # Median of the timings & memory of every stage
+    result = runs[0]
+    for index, stage in enumerate(result['stages']):
+        for key in ['time', 'memory']:
+            if stage[key] is not None:
+                stage[key] = median([r['stages'][index][key] for r in runs])
+    for key in ['total', 'peak_memory']:
+        result[key] = median([r[key] for r in runs])
+    return result
+
+
+def print_results(results):
+    for r in results:
+        print '\n{} - {} pages ({:,} chars, {:,} sentences, {:,} tokens)'.format(r['format'], r['pages'], r['characters'], r['sentences'], r['tokens'])
+        for s in r['stages']:
+            memory = '{:9.1f} MB'.format(s['memory']) if s['memory'] is not None else '  (not measured)'
+            print '  {:<36} {:9.3f} s {}'.format(s['name'], s['time'], memory)
+        print '  {:<36} {:9.3f} s {:9.1f} MB (peak)'.format('total', r['total'], r['peak_memory'])
+
+
+def compare(results, baseline):
+    """
+    Prints the relative change of stage timings with respect to the baseline.
+    :return: list of regressions - (configuration, stage, baseline time, time) tuples
+    """
+    regressions = []
+    reference = dict(((r['format'], r['pages']), r) for r in baseline['results'])
+    print '\nComparison with baseline {} ({})'.format(baseline.get('commit'), baseline.get('created'))
+    for r in results['results']:
+        configuration = '{} / {} pages'.format(r['format'], r['pages'])
+        if (r['format'], r['pages']) not in reference:
+            print '  {:<50} not in the baseline'.format(configuration)
+            continue
+        stages = dict((s['name'], s) for s in reference[(r['format'], r['pages'])]['stages'])
+        for s in r['stages'] + [{'name': 'total', 'time': r['total']}]:
+            old = reference[(r['format'], r['pages'])]['total'] if s['name'] == 'total' else stages.get(s['name'], {}).get('time')
+            if old is None:
+                continue
+            change = (s['time'] - old) / old if old > 0 else 0.0
+            regression = change > args.threshold and s['time'] - old > args.min_time
+            if regression:
+                regressions.append((configuration, s['name'], old, s['time']))
+            print '  {:<50} {:9.3f} s -> {:9.3f} s {:+7.1%}{}'.format(configuration + ' : ' + s['name'], old, s['time'], change, '  REGRESSION' if regression else '')
+    return regressions
+
+
+if args.single:
+    output_format, pages = args.single.split(':')
+    print json.dumps(run_single(output_format, int(pages)))
+    sys.exit(0)
+
+if args.input:
+    with open(args.input) as f:
+        results = json.load(f)
+else:
+    import nltk
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=root_path, stderr=open(os.devnull, 'w')).strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    results = {'format': results_format, 'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'commit': commit,
+               'python': sys.version.split()[0], 'nltk': nltk.__version__, 'runs': args.runs, 'seed': args.seed,
+               'results': []}
+    for output_format in args.formats.split(','):
+        for pages in [int(x) for x in args.pages.split(',')]:
+            results['results'].append(run_configuration(output_format, pages))
+            print_results(results['results'][-1:])
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print '\nResults saved to {}'.format(args.output)
+
+if args.compare:
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline)
+    if len(regressions) > 0:
+        print '\n{} regression(s) above {:.0%}'.format(len(regressions), args.threshold)
+        sys.exit(1)
+    print '\nNo regressions'
+elif args.input:
+    print_results(results['results'])
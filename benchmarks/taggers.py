@@ -0,0 +1,73 @@
+__author__ = 'pkorus'
+
+# Compares the POS tagger backends (see swtk.tagging) on a fixed local corpus: throughput in tokens/s and agreement with
+# the tags of a reference tagger. Without a lookup table (see swtk-dictionary.py --pos-lookup), the hybrid tagger uses
+# a table built from the corpus itself with the reference tagger - its agreement is then an optimistic estimate.
+# Usage (from the root directory of the toolkit):
+#   python benchmarks/taggers.py [-i inputs] [-n scale] [-t perceptron,maxent,hybrid] [-l lookup.txt]
+
+import os, sys, time, argparse, tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from swtk import batch
+from swtk import pipeline
+from swtk import tagging
+from swtk import dictionary
+
+parser = argparse.ArgumentParser(description='POS tagger backends benchmark')
+parser.add_argument('-i', '--inputs', type=str, nargs='*', default=['samples'], help='Documents or directories of the corpus (default: samples)')
+parser.add_argument('-n', '--scale', type=int, default=20, help='How many times the corpus is repeated (default: 20)')
+parser.add_argument('-t', '--taggers', type=str, default='perceptron,maxent,hybrid', help='Tagger backends to compare (comma-separated)')
+parser.add_argument('-r', '--reference', type=str, default='default', help='Reference tagger (default: default)')
+parser.add_argument('-l', '--lookup', type=str, help='Lookup table for the hybrid tagger (by default, built from the corpus)')
+parser.add_argument('--min-count', type=int, default=5, help='Minimum number of occurrences of words in the built lookup table (default: 5)')
+args = parser.parse_args()
+
+sentences = []
+for filename in batch.collect_inputs(args.inputs):
+    with open(filename) as f:
+        p = pipeline.get_paper_class(filename)(f.readlines(), {})
+    sentences.extend([[t.word for t in s.tokens] for s in p.get_all_sentences()])
+sentences = sentences * args.scale
+token_count = sum([len(s) for s in sentences])
+print 'Corpus: {} x {} = {:,} sentences, {:,} tokens'.format(', '.join(args.inputs), args.scale, len(sentences), token_count)
+
+start = time.time()
+reference = tagging.tag_sentences(sentences, args.reference)
+print '{:<12} {:8.2f} s {:12,.0f} tokens/s   (reference)'.format(args.reference, time.time() - start, token_count / (time.time() - start))
+
+lookup = args.lookup
+if lookup is None and 'hybrid' in args.taggers.split(','):
+    # Build the table from the (unscaled) corpus, counted the same way as by swtk-dictionary.py
+    counts = {}
+    for sentence in reference[:len(reference) // args.scale]:
+        for word, tag in sentence:
+            key = '{} {}'.format(word, tag)
+            counts[key] = counts.get(key, 0) + 1
+    handle, lookup = tempfile.mkstemp(prefix='swtk-lookup-', suffix='.txt')
+    with os.fdopen(handle, 'w') as f:
+        for word, tag, count in dictionary.select_unambiguous(sorted(counts.iteritems()), args.min_count):
+            f.write('{} {} {}\n'.format(word, tag, count))
+
+try:
+    for backend in args.taggers.split(','):
+        try:
+            # Load the model before measuring
+            start = time.time()
+            tagger = tagging.get_tagger(backend, lookup if backend == 'hybrid' else None)
+            loading = time.time() - start
+        except LookupError:
+            print '{:<12} not available (the model is not installed)'.format(backend)
+            continue
+        start = time.time()
+        tagged = tagger.tag_sents(sentences)
+        elapsed = time.time() - start
+        same = sum(1 for s, r in zip(tagged, reference) for (_, a), (_, b) in zip(s, r) if a == b)
+        details = ''
+        if backend == 'hybrid':
+            hits = sum(1 for s in sentences for w in s if w in tagger.table)
+            details = ', {:.1%} of tokens from the lookup table ({:,} words)'.format(float(hits) / token_count, len(tagger.table))
+        print '{:<12} {:8.2f} s {:12,.0f} tokens/s   agreement {:.2%}   (model loaded in {:.2f} s{})'.format(backend, elapsed, token_count / elapsed, float(same) / token_count, loading, details)
+finally:
+    if lookup is not None and args.lookup is None:
+        os.remove(lookup)
@@ -1,6 +1,127 @@
 import re
 from swtk.processors import *
-from collections import defaultdict, deque
+
+# Words that may be skipped (or used) in the definitions of acronyms, e.g., Institute of Electrical and Electronics Engineers
+stop_words = set(['a', 'an', 'and', 'at', 'by', 'de', 'for', 'in', 'of', 'on', 'or', 'the', 'to', 'with'])
+word_regex = re.compile(r"^[A-Za-z][A-Za-z\-']*$")
+camel_case_regex = re.compile(r'^[A-Z]?[a-z]+[A-Z]')
+
+
+def initials(word):
+    """
+    Returns the letters contributed by a word to an acronym: the capital letters of camel-case words (PageRank - PR),
+    the initials of hyphenated words (Neural-Network - NN), or the first letter.
+    """
+    if camel_case_regex.match(word):
+        return ''.join(c for c in word if c.isupper())
+    if '-' in word:
+        return ''.join(part[0] for part in word.split('-') if len(part) > 0).upper()
+    return word[0].upper()
+
+
+class DefinitionIndex:
+    """
+    Index of the definitions of acronyms, built in a single pass over the document: every sequence of words whose
+    initials spell one of the acronyms (stop words may be skipped) is a candidate definition. Candidates next to the
+    acronym in parentheses - Portable Document Format (PDF), or PDF (Portable Document Format) - and capitalized words
+    are preferred; otherwise, the first candidate wins. In the streaming mode, the document is indexed part by part and
+    acronyms are added as they are seen; capitalized candidates of any spelling are kept as well (open index), so that
+    definitions that precede the first use of an acronym are found.
+    """
+
+    def __init__(self, acronyms, max_length, open=False):
+        self.acronyms = set()
+        self.max_length = max_length
+        self.open = open
+        self.regex = re.compile('^[A-Z]{{2,{}}}$'.format(max_length))
+        # Windows are extended only while their spellings are prefixes of some acronym (or capitalized, if open)
+        self.prefixes = set()
+        self.add_acronyms(acronyms)
+        # word -> None (breaks a window), True (stop word) or the letters contributed to an acronym
+        self.letters = {}
+        # acronym -> (score, order, words, source position) of the best definition, and (order, source position) of
+        # the first use; the order is the number of tokens of the indexed sentences before the word
+        self.definitions = {}
+        self.first_use = {}
+        self.order = 0
+
+    def add_acronyms(self, acronyms):
+        for a in acronyms:
+            if a not in self.acronyms:
+                self.acronyms.add(a)
+                self.prefixes.update(a[:k] for k in range(1, len(a) + 1))
+
+    def get_letters(self, word):
+        if word not in self.letters:
+            if not word_regex.match(word) or (word.isupper() and len(word) > 1):
+                self.letters[word] = None
+            elif word.lower() in stop_words:
+                self.letters[word] = True
+            else:
+                self.letters[word] = initials(word)
+        return self.letters[word]
+
+    def is_candidate(self, spelling, capitalized):
+        return spelling in self.acronyms or (self.open and capitalized and self.regex.match(spelling) is not None)
+
+    def is_prefix(self, spelling, capitalized):
+        return spelling in self.prefixes or (self.open and capitalized and len(spelling) <= self.max_length)
+
+    def index(self, sentences):
+        if len(self.acronyms) == 0 and not self.open:
+            return self
+        for s in sentences:
+            words = [t.word for t in s.tokens]
+            letters = [self.get_letters(w) for w in words]
+            for i, word in enumerate(words):
+                if word in self.acronyms and word not in self.first_use:
+                    self.first_use[word] = (self.order + i, s.get_position(i))
+                if letters[i] is not None and letters[i] is not True and self.is_prefix(letters[i], word[0].isupper()):
+                    self.match(s, words, letters, i)
+            self.order += len(words)
+        return self
+
+    def match(self, sentence, words, letters, start):
+        # Extend a window of words from the start; keep all spellings (stop words can be skipped or used)
+        spellings = set([''])
+        capitalized = True
+        for end in xrange(start, len(words)):
+            if letters[end] is None:
+                break
+            if letters[end] is True:
+                spellings |= set(s + words[end][0].upper() for s in spellings)
+            else:
+                spellings = set(s + letters[end] for s in spellings)
+                capitalized = capitalized and words[end][0].isupper()
+                for acronym in [x for x in spellings if self.is_candidate(x, capitalized)]:
+                    self.add(acronym, sentence, words, start, end, capitalized)
+            spellings = set(x for x in spellings if self.is_prefix(x, capitalized))
+            if len(spellings) == 0:
+                break
+
+    def add(self, acronym, sentence, words, start, end, capitalized):
+        parenthesized = (words[end + 1:end + 3] == ['(', acronym]) or (start >= 2 and words[start - 2:start] == [acronym, '('])
+        score = 2 * int(parenthesized) + int(capitalized)
+        # Two-letter acronyms match too many word pairs by chance - require a hint
+        if len(acronym) == 2 and score == 0:
+            return
+        if acronym not in self.definitions or score > self.definitions[acronym][0]:
+            self.definitions[acronym] = (score, self.order + start, ' '.join(words[start:end + 1]), sentence.get_position(start))
+
+    def definition(self, acronym):
+        """
+        :return: (words of the definition, order, source position of its first word), or None if the acronym is not
+                 defined
+        """
+        if acronym not in self.definitions:
+            return None
+        _, order, words, position = self.definitions[acronym]
+        return words, order, position
+
+
+def location(paper, source_position):
+    position = paper.locate(source_position)
+    return 'line {}'.format(position[0]) if position is not None else 'unknown line'
 
 
 class AcronymProcessor(Plugin):
@@ -10,52 +131,72 @@ class AcronymProcessor(Plugin):
     max_length = 6
 
     def __init__(self):
-        self.found_words = defaultdict(lambda: 0)
-        self.found_tokens = defaultdict(lambda: [])
-        self.cache = deque(maxlen=self.max_length)
-        self.defined = set()
-        self.regex = '^[A-Z]{{2,{}}}$'.format(self.max_length)
-
-    def is_defined(self,word):
-        return '' if word in self.defined else ' (possibly undefined)'
+        # Counts & token indices of acronyms
+        self.state = State(found_words=OrderedCounter(), found_tokens=OrderedGroups())
+        self.regex = re.compile('^[A-Z]{{2,{}}}$'.format(self.max_length))
+        # Streaming mode: definitions of acronyms & capitalized candidates (indexed block by block), and acronym -> CSS
+        # class
+        self.index = DefinitionIndex([], self.max_length, open=True)
+        self.css_mapping = {}
 
     def process_token(self, token):
-        if len(token.word) <= self.max_length and re.match(self.regex, token.word):
-            self.found_words[token.word] += 1
-            self.found_tokens[token.word].append(token)
-            # check if the current acronym is "defined" by the words in the cache
-            # TODO a more sophisticated fuzzy matching would be nice
-            # TODO Consider using human-provided hints - capital letters in the definition
-            if len(self.cache) >= len(token.word) and self.cache[-1].lower() not in ['and', 'the']:
-                cache_extract = [w[0].upper() for w in self.cache][(self.max_length-len(token.word)):]
-                if token.word == ''.join(cache_extract):
-                    self.defined.add(token.word)
-        # Add to cache
-        if len(token.word) > 2:
-            self.cache.append(token.word.lower())
-
-        # A period clears the cache
-        if token.word == '.':
-            self.cache.clear()
+        word = token.word
+        if len(word) <= self.max_length and self.regex.match(word):
+            self.state.found_words[word] += 1
+            if not self.streaming:
+                self.state.found_tokens[word].append(token.index)
+
+    def process_block(self, paper, block):
+        # Streaming mode: acronyms seen so far (including this block) get all candidates, others capitalized ones only
+        self.index.add_acronyms(self.state.found_words.iterkeys())
+        self.index.index(block.get_sentences())
+
+    def highlight_block(self, paper, block):
+        # Streaming mode
+        for s in block.get_sentences():
+            for token in s.tokens:
+                if token.word in self.css_mapping:
+                    token.reports.append('_'+self.css_mapping[token.word].name)
+
+    def describe(self, paper, index, acronym):
+        # Where the acronym is used first and where it is defined
+        first_use = index.first_use.get(acronym)
+        output = ', first used at {}'.format(location(paper, first_use[1])) if first_use is not None else ''
+        definition = index.definition(acronym)
+        if definition is None:
+            return output + ' (possibly undefined)'
+        words, order, position = definition
+        output += ', defined at {}: {}'.format(location(paper, position), words)
+        if first_use is not None and order > first_use[0]:
+            output += ' (after the first use)'
+        return output
 
     def finalize(self, paper):
         # Select only certain sub-set of most frequent words, then sort by frequency
-        sortedItems = sorted([(k,v) for (k,v) in self.found_words.iteritems() if v >= self.min_occurrences], key=lambda x: x[1], reverse=True)
+        sortedItems = sorted([(k,v) for (k,v) in self.state.found_words.iteritems() if v >= self.min_occurrences], key=lambda x: x[1], reverse=True)
+
+        # Find the definitions of the selected acronyms
+        if self.streaming:
+            index = self.index
+        else:
+            index = DefinitionIndex([k for (k,v) in sortedItems], self.max_length).index(paper.get_all_sentences())
 
         # Append numbered css styles to selected tokens
         css_mapping = {}
         current_counter = 1
         color_index = 240
-        for k, tokens in [(k, self.found_tokens[k]) for (k,v) in sortedItems]:
+        for k, tokens in [(k, self.state.found_tokens[k]) for (k,v) in sortedItems]:
             css_mapping[k] = CSS('abbrev_{}'.format(current_counter), '{0:02x}{0:02x}{1:02x}'.format(color_index, 0))
             color_index = max(color_index - 8, 208)
             current_counter += 1
-            for token in tokens:
-                token.reports.append('_'+css_mapping[k].name)
+            if self.streaming:
+                continue
+            for token_index in tokens:
+                paper.store.add_report(token_index, '_'+css_mapping[k].name)
 
         # Generate a detailed report and a summary
         if len(sortedItems) > 0:
-            detailedReport = [('{} : {}{}'.format(k,v,self.is_defined(k)), css_mapping[k].name) for (k,v) in sortedItems]
+            detailedReport = [('{} : {}{}'.format(k,v,self.describe(paper, index, k)), css_mapping[k].name) for (k,v) in sortedItems]
             summary = 'Top {} : {}'.format(min(3, len(sortedItems)), ', '.join([k for (k,v) in sortedItems[:3]]))
         else:
             detailedReport = None
@@ -64,5 +205,4 @@ class AcronymProcessor(Plugin):
         report = Report('Acronyms', Plugin.toggle_button_generator(detailedReport), self.help, summary)
         report.css_classes = css_mapping.values()
         paper.reports.append(report)
-
-
+        self.css_mapping = css_mapping
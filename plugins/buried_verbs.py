@@ -5,12 +5,13 @@ from swtk.processors import *
 # TODO This plugin needs a major improvement!
 class BuriedVerbProcessor(Plugin):
     run_priority = 75
-    counter = 0
+    provides = ['stats.buried verb sentences']
+    requires = ['pos_tag', 'stats.sentences']
     help = 'Finds sentences with potentially buried verbs (far away from the subject).'
     distance_threshold = 3
 
     def __init__(self):
-        pass
+        self.state = State(counter=0)
 
     def process_sentence(self, sentence):
         verb_locations = []
@@ -35,17 +36,19 @@ class BuriedVerbProcessor(Plugin):
                     sentence.tokens[noun_locations[index - 1]].reports.append('_buriedVerbsSubject')
                     sentence.tokens[verb_locations[0]].reports.append('_buriedVerb')
                     sentence.reports.append('_buriedVerbSentence')
-                    self.counter += 1
+                    self.state.counter += 1
                     # print ''
                     # print sentence
                     # print [(t.word, t.pos_tag) for t in sentence.tokens]
 
     def finalize(self, paper):
+        counter = self.state.counter
         sentences = paper.stats['sentences']
         if sentences is not None and sentences > 0:
-            summary = '{} difficult sentences ({:.1f}%)'.format(self.counter, float(self.counter)/sentences*100)
+            summary = '{} difficult sentences ({:.1f}%)'.format(counter, float(counter)/sentences*100)
         else:
-            summary = '{} difficult sentences'.format(self.counter)
-        report = Report('Buried verbs', ['Sentences with buried verbs: {}'.format(self.counter)], self.help, summary)
+            summary = '{} difficult sentences'.format(counter)
+        report = Report('Buried verbs', ['Sentences with buried verbs: {}'.format(counter)], self.help, summary)
         report.css_classes = ['buriedVerbSentence', 'buriedVerb', 'buriedVerbsSubject']
         paper.reports.append(report)
+        paper.stats['buried verb sentences'] = counter
@@ -1,64 +1,68 @@
-import re
 import nltk
 import json
 from swtk.processors import *
+from swtk.lexicon import FILTER_WORD
+from swtk.phrases import PhraseMatcher
 
 
-def find_sequence(long_sequence, sequence_pattern):
-    return [(i, i+len(sequence_pattern)) for i in range(len(long_sequence)) if long_sequence[i:i+len(sequence_pattern)] == sequence_pattern]
-
 class FilterWordsProcessor(Plugin):
     help = 'Finds vague and colloquial words and phrases typical for spoken language; if possible, offers an explanation or a substitute. Hover over an element to see the suggestion.'
     run_priority = 150
+    provides = ['stats.filter words']
     dictionary_filename = './data/filter_words.json'
 
-    def __init__(self, dictionary_filename='./data/frequent_words.pickle'):
-        self.found_phrases = set()
-        self.found_words = set()
-        with open(self.dictionary_filename) as f:
-            self.dictionary = json.loads(f.read().decode())
-        self.counter = 0
+    def __init__(self):
+        self.state = State(found_phrases=OrderedSet(), found_words=OrderedSet(), counter=0)
+        self.dictionary = load_resource(self.dictionary_filename, lambda f: json.loads(f.read().decode()))
+        # Compile the phrases (tokenized the same way as the text) into a matcher once per process
+        self.phrases = self.dictionary['phrases'].keys()
+        key = '{}#phrases'.format(self.dictionary_filename)
+        if key not in resource_cache:
+            resource_cache[key] = PhraseMatcher([nltk.word_tokenize(pattern) for pattern in self.phrases])
+        self.matcher = resource_cache[key]
 
-    def __process_token(self, token):
-        if len(token.word) > 1 and token.word.lower() in self.dictionary['words']:
-            if not re.match(r'^[0-9\.,]+$', token.word) and '_' not in token.word:
-                self.found_words.add(token.word.lower)
+    def __process_token(self, token, features):
+        if features.categories & FILTER_WORD and len(features.lower) > 1:
+            if not features.is_number and '_' not in features.lower:
+                self.state.found_words.add(features.lower)
                 token.reports.append('_filterWord')
-                self.counter += 1
+                self.state.counter += 1
 
     def process_sentence(self, sentence):
+        tokens = sentence.tokens
+        features = tokens.features()
         # Match words in the dictionary
-        for token in sentence.tokens:
-            self.__process_token(token)
-        # Match phrases in the dictionary
-        for pattern in self.dictionary['phrases'].keys():
-            if sentence.__str__().lower().find(pattern) >= 0:
-                # Find specific tokens that constitute the phrase
-                self.found_phrases.add(pattern)
-                indices = find_sequence([x.word.lower() for x in sentence.tokens], nltk.word_tokenize(pattern))
-                for index in indices:
-                    for i in range(*index):
-                        sentence.tokens[i].reports.append('_filterPhrase')
-                        sentence.tokens[i].alternatives.append(self.dictionary['phrases'][pattern])
+        for i in xrange(len(tokens)):
+            if features[i].categories & FILTER_WORD:
+                self.__process_token(tokens[i], features[i])
+        # Match phrases in the dictionary (in dictionary order, so that the alternatives are listed consistently)
+        for start, end, phrase_id in sorted(self.matcher.match([f.lower for f in features]), key=lambda m: (m[2], m[0])):
+            pattern = self.phrases[phrase_id]
+            self.state.found_phrases.add(pattern)
+            for i in range(start, end):
+                tokens[i].reports.append('_filterPhrase')
+                tokens[i].alternatives.append(self.dictionary['phrases'][pattern])
 
     def finalize(self, paper):
+        found_words, found_phrases = self.state.found_words, self.state.found_phrases
         # Generate a short summary
         summary = []
-        if len(self.found_words) == 1:
+        if len(found_words) == 1:
             summary.append('1 word')
-        elif len(self.found_words) > 1:
-            summary.append('{} words'.format(len(self.found_words)))
+        elif len(found_words) > 1:
+            summary.append('{} words'.format(len(found_words)))
 
-        if len(self.found_phrases) > 0:
+        if len(found_phrases) > 0:
             summary.append(' and ')
-            if len(self.found_phrases) == 1:
+            if len(found_phrases) == 1:
                 summary.append('1 phrase')
             else:
-                summary.append('{} phrases'.format(len(self.found_phrases)))
+                summary.append('{} phrases'.format(len(found_phrases)))
 
         # List found phrases, recommendations & summarize filter words
-        details = ['{} - {}'.format(k,self.dictionary['phrases'][k]) for k in self.found_phrases]
-        details.append('{} filter words'.format(self.counter))
+        details = ['{} - {}'.format(k,self.dictionary['phrases'][k]) for k in found_phrases]
+        details.append('{} filter words'.format(self.state.counter))
         report = Report('Filter words & phrases', details, self.help, ''.join(summary))
         report.css_classes = [CSS('filterWord', 'FF9494'), CSS('filterPhrase', 'FF9494')]
         paper.reports.append(report)
+        paper.stats['filter words'] = self.state.counter
@@ -0,0 +1,11 @@
+from swtk.ngrams import NGramProcessor
+
+
+class FivegramProcessor(NGramProcessor):
+    optional = True
+    n = 5
+    min_frequency = 2
+    min_chars = 3
+    name = 'fivegram'
+    color_format = '{1:02x}{0:02x}{1:02x}'
+    description = 'sequences of five words'
@@ -0,0 +1,11 @@
+from swtk.ngrams import NGramProcessor
+
+
+class FourgramProcessor(NGramProcessor):
+    optional = True
+    n = 4
+    min_frequency = 3
+    min_chars = 3
+    name = 'fourgram'
+    color_format = '{1:02x}{1:02x}{0:02x}'
+    description = 'sequences of four words'
@@ -11,9 +11,14 @@ class HelpProcessor(Plugin):
         if not os.path.exists(filename):
             logging.error('Cannot open file {}'.format(filename))
         else:
-            with open(filename) as f:
-                self.content = f.read()
+            self.content = load_resource(filename, lambda f: f.read())
 
     def process_text(self, paper):
         if hasattr(self, 'content'):
             paper.reports.append(Report('Getting started', None, self.content, None))
+
+    def process_block(self, paper, block):
+        pass
+
+    def finish_stream(self, paper):
+        self.process_text(paper)
@@ -1,10 +1,18 @@
-import nltk
 from swtk.processors import *
+from swtk import tagging
 from collections import defaultdict
 
 
+def is_tagged(sentence):
+    return all(t.pos_tag for t in sentence.tokens)
+
+
 class POSTaggerProcessor(Plugin):
     run_priority = 2
+    provides = ['pos_tag', 'stats.verbs', 'stats.nouns']
+    version = 1
+    # Minimum number of sentences sent to the tagger at once
+    batch_size = 500
     help = 'Part of speech (POS) tagger based on maximal entropy. <ul><li>Counts occurrences of specific tags</li>' \
            '<li>Highlights verbs, modals, and adjectives.</li></ul>' \
            'POS tagging is not 100% accurate - the statistics & tags should be considered ' \
@@ -30,12 +38,31 @@ class POSTaggerProcessor(Plugin):
         self.counters = defaultdict(lambda: 0)
 
     def process_text(self, paper):
-        # Count characters
-        for paragraph in [p for p in paper.content if p.count_as_paragraph]:
+        self.tag_blocks(paper.content)
+        self.report(paper)
+
+    def process_block(self, paper, block):
+        # Streaming mode
+        self.tag_blocks([block])
+
+    def finish_stream(self, paper):
+        self.report(paper)
+
+    def tag_blocks(self, blocks):
+        paragraphs = [p for p in blocks if p.count_as_paragraph]
+        # Tag all sentences (except those already tagged, e.g., loaded from the block cache) in batches of paragraphs
+        # TODO POS tagger seems to get confused by things like Fig. 2 ('Fig', '.', '2') - can this be fixed?
+        groups = [[[t.word for t in s.tokens] for s in p.get_sentences() if not is_tagged(s)] for p in paragraphs]
+        tagged_sentences = iter(tagging.tag_batched(groups, self.batch_size, options.get('tagger_workers', 1), options.get('tagger', 'default'), options.get('tagger_lookup')))
+
+        # Count tags & attach them to the tokens
+        for paragraph in paragraphs:
             for sentence in paragraph.get_sentences():
 
-                # TODO POS tagger seems to get confused by things like Fig. 2 ('Fig', '.', '2') - can this be fixed?
-                tagged = nltk.pos_tag([t.word for t in sentence.tokens])
+                if is_tagged(sentence):
+                    tagged = [(t.word, t.pos_tag) for t in sentence.tokens]
+                else:
+                    tagged = next(tagged_sentences)
                 item_id = 0
 
                 for w, t in tagged:
@@ -52,6 +79,7 @@ class POSTaggerProcessor(Plugin):
                         sentence.tokens[item_id].reports.append('_'+self.highlight[t])
                     item_id += 1
 
+    def report(self, paper):
         details = [('{} : {:,}'.format(k, v), self.toggle_specs[k]) for (k, v) in sorted(self.counters.iteritems(), key=lambda o: o[1], reverse=True)]
         summary = '{:,} verbs, {:,} nouns'.format(self.counters['verbs'], self.counters['nouns'])
         report = Report('Part of Speech Tagger', Plugin.toggle_button_generator(details), self.help, summary)
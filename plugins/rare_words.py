@@ -1,37 +1,51 @@
-import re
-import pickle
 from swtk.processors import *
-from collections import defaultdict
+from swtk.lexicon import get_domain_lexicon, FREQUENT
 
 class RareWordProcessor(Plugin):
     help = 'Highlights rare words based on a provided dictionary (by default 5,000 words from Brown corpus).'
     run_priority = 100
+    # Words of the domain dictionary up to this rank are not reported (unless set in the options)
+    domain_rank = 10000
 
-    def __init__(self, dictionary_filename='./data/frequent_words.pickle'):
-        self.found_words = defaultdict(lambda: 0)
-        self.found_tokens = defaultdict(lambda: [])
-        # Initialize a list of 5,000 most frequent words in English
-        with open(dictionary_filename) as f:
-            self.dictionary = pickle.load(f)
+    def __init__(self):
+        # Counts & token indices of rare words
+        self.state = State(found_words=OrderedCounter(), found_tokens=OrderedGroups())
+        # Optional domain dictionary (see swtk-dictionary.py)
+        self.domain = get_domain_lexicon(options['domain_dictionary']) if options.get('domain_dictionary') else None
+        self.domain_rank = options.get('domain_rank', self.domain_rank)
+        # Streaming mode: word -> CSS class of the selected rare words (highlighted in highlight_block)
+        self.css_mapping = {}
+
+    def is_frequent(self, features):
+        if features.categories & FREQUENT:
+            return True
+        if self.domain is not None:
+            rank = self.domain.rank(features.lower)
+            return 0 < rank <= self.domain_rank
+        return False
 
     def process_token(self, token):
-        if len(token.word) > 4 and token.word.lower() not in self.dictionary:
-            if not re.match(r'^[0-9\.,]+$', token.word) and '_' not in token.word and token.word.find('$') == -1:
+        features = token.features
+        if len(features.lower) > 4 and not self.is_frequent(features):
+            if not features.is_number and '_' not in features.lower and features.lower.find('$') == -1:
                 # token.reports.append('rareWord')
-                self.found_words[token.word] += 1
-                self.found_tokens[token.word].append(token)
+                self.state.found_words[token.word] += 1
+                if not self.streaming:
+                    self.state.found_tokens[token.word].append(token.index)
 
     def finalize(self, paper):
         # Select only certain sub-set of most frequent words, then sort by frequency
-        sortedItems = sorted([(k,v) for (k,v) in self.found_words.iteritems() if v > 5], key=lambda x: x[1], reverse=True)
+        sortedItems = sorted([(k,v) for (k,v) in self.state.found_words.iteritems() if v > 5], key=lambda x: x[1], reverse=True)
         # Append numbered css styles to selected tokens
         css_mapping = {}
         current_counter = 1
-        for k, tokens in [(k, self.found_tokens[k]) for (k,v) in sortedItems]:
+        for k, tokens in [(k, self.state.found_tokens[k]) for (k,v) in sortedItems]:
             css_mapping[k] = 'rareWord_{}'.format(current_counter)
             current_counter += 1
-            for token in tokens:
-                token.reports.append('_'+css_mapping[k]) # Prepend '_' to disable the highlight be default
+            if self.streaming:
+                continue
+            for index in tokens:
+                paper.store.add_report(index, '_'+css_mapping[k]) # Prepend '_' to disable the highlight be default
         # Generate a detailed report and a summary
         if len(sortedItems) > 0:
             detailedReport = [('{} : {}'.format(k,v), css_mapping[k]) for (k,v) in sortedItems]
@@ -42,5 +56,13 @@ class RareWordProcessor(Plugin):
         report = Report('Rare words', Plugin.toggle_button_generator(detailedReport), self.help, summary)
         report.css_classes = css_mapping.values()
         paper.reports.append(report)
+        self.css_mapping = css_mapping
+
+    def highlight_block(self, paper, block):
+        # Streaming mode
+        for s in block.get_sentences():
+            for token in s.tokens:
+                if token.word in self.css_mapping:
+                    token.reports.append('_'+self.css_mapping[token.word])
 
 
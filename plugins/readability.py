@@ -0,0 +1,191 @@
+import re
+import math
+from swtk.processors import *
+from swtk.paper import Section
+from swtk.features import count_syllables
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+word_regex = re.compile(r"^[a-z]+(['\-][a-z]+)*$")
+
+# Names of the metrics (as used in the stats of the paper)
+metrics = ['flesch reading ease', 'flesch-kincaid grade', 'gunning fog index', 'smog index']
+
+
+def is_complex(word, syllables):
+    # Words with 3+ syllables, except hyphenated words and those that get the 3rd syllable from a suffix (Gunning)
+    if syllables < 3 or '-' in word:
+        return False
+    for suffix in ['es', 'ed', 'ing']:
+        if word.endswith(suffix) and len(word) > len(suffix) + 2:
+            return count_syllables(word[:-len(suffix)]) >= 3
+    return True
+
+
+def compute_metrics(sentences, words, syllables, complex_words, polysyllables):
+    """
+    Computes readability metrics from the counts of sentences, words, syllables, complex words (Gunning fog) and
+    words of 3+ syllables (SMOG).
+    :return: dictionary: metric name -> value, or None if there are no words
+    """
+    if sentences == 0 or words == 0:
+        return None
+    words_per_sentence = float(words) / sentences
+    syllables_per_word = float(syllables) / words
+    return {'flesch reading ease': 206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word,
+            'flesch-kincaid grade': 0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59,
+            'gunning fog index': 0.4 * (words_per_sentence + 100.0 * complex_words / words),
+            'smog index': 1.043 * math.sqrt(polysyllables * 30.0 / sentences) + 3.1291}
+
+
+class ReadabilityProcessor(Plugin):
+    help = 'Readability metrics (Flesch reading ease, Flesch-Kincaid grade level, Gunning fog index and SMOG grade) of the whole document, its sections and paragraphs. Higher reading ease and lower grades indicate easier text.'
+    run_priority = 60
+    provides = ['stats.{}'.format(m) for m in metrics] + ['stats.readability (sections)', 'stats.readability (paragraphs)']
+
+    def __init__(self):
+        # Streaming mode: (entry, totals) of sections & paragraphs, and totals of the document, counted block by block
+        self.blocks = 0
+        self.sections = [({'title': None, 'block': 0}, [0] * 5)]
+        self.paragraphs = []
+        self.totals = [0] * 5
+
+    @staticmethod
+    def type_counts(paper):
+        """
+        Returns the counts of every word type (see Paper.get_type_table): (is word, syllables, is complex, has 3+
+        syllables). Syllables come from the features of the words (see TokenStore.get_features).
+        """
+        types, mapping = paper.get_type_table()
+        output = [None] * len(types)
+        for word_id, type_id in enumerate(mapping):
+            if output[type_id] is None:
+                word = types[type_id]
+                if word_regex.match(word):
+                    syllables = paper.store.get_features(word_id).syllables
+                    output[type_id] = (1, syllables, int(is_complex(word, syllables)), int(syllables >= 3))
+                else:
+                    output[type_id] = (0, 0, 0, 0)
+        return output
+
+    def sentence_counts(self, paper, sentences):
+        """
+        Returns the counts of words, syllables, complex words and polysyllables of every sentence (a list of 4 arrays).
+        """
+        mapping = paper.get_type_table()[1]
+        counts = self.type_counts(paper)
+        starts = [s.start for s in sentences]
+        ends = [s.end for s in sentences]
+        if np is not None:
+            # Per-token counts (through the type of every token), then sums over the ranges of sentences
+            token_types = np.array(mapping, dtype=np.int64)[np.frombuffer(paper.store.token_words, dtype=np.intc)]
+            table = np.array(counts, dtype=np.int64).reshape(-1, 4)
+            output = []
+            for column in range(4):
+                totals = np.concatenate([[0], np.cumsum(table[token_types, column])])
+                output.append(totals[ends] - totals[starts])
+            return output
+        token_words = paper.store.token_words
+        output = [[], [], [], []]
+        for start, end in zip(starts, ends):
+            values = [counts[mapping[token_words[i]]] for i in xrange(start, end)]
+            for column in range(4):
+                output[column].append(sum(v[column] for v in values))
+        return output
+
+    @staticmethod
+    def group_totals(groups, count, values):
+        # Sums of the values (of sentences) in each of count groups
+        if np is not None:
+            return np.bincount(np.asarray(groups, dtype=np.int64), weights=values, minlength=count).astype(np.int64).tolist()
+        totals = [0] * count
+        for group, value in zip(groups, values):
+            totals[group] += value
+        return totals
+
+    def process_text(self, paper):
+        # Assign sentences to sections and paragraphs; section titles are not counted
+        sentences, section_ids, paragraph_ids = [], [], []
+        sections, paragraphs = [{'title': None, 'block': 0}], []
+        for index, block in enumerate(paper.content):
+            if isinstance(block, Section):
+                sections.append({'title': block.get_sentences()[0].__str__(), 'block': index})
+                continue
+            if block.count_as_paragraph:
+                paragraphs.append({'block': index})
+            for s in block.get_sentences():
+                sentences.append(s)
+                section_ids.append(len(sections) - 1)
+                paragraph_ids.append(len(paragraphs) - 1 if block.count_as_paragraph else -1)
+
+        words, syllables, complex_words, polysyllables = self.sentence_counts(paper, sentences)
+        # Sentences without words (e.g., equations) are not counted
+        counted = [int(w > 0) for w in words]
+        columns = [counted, words, syllables, complex_words, polysyllables]
+
+        document = compute_metrics(*[int(sum(c)) for c in columns])
+        for groups, entries in [(section_ids, sections), (paragraph_ids, paragraphs)]:
+            # Sentences outside of paragraphs (e.g., captions) go to an extra group
+            groups = [g if g >= 0 else len(entries) for g in groups]
+            totals = [self.group_totals(groups, len(entries) + 1, c) for c in columns]
+            for k, entry in enumerate(entries):
+                entry['sentences'], entry['words'] = totals[0][k], totals[1][k]
+                values = compute_metrics(*[t[k] for t in totals])
+                entry.update(dict((m, round(values[m], 1)) for m in metrics) if values is not None else {})
+        self.publish(paper, document, sections, paragraphs)
+
+    def process_block(self, paper, block):
+        # Streaming mode: the block is the only content of the paper
+        index = self.blocks
+        self.blocks += 1
+        if isinstance(block, Section):
+            self.sections.append(({'title': block.get_sentences()[0].__str__(), 'block': index}, [0] * 5))
+            return
+        sentences = block.get_sentences()
+        counts = [0] * 5
+        if len(sentences) > 0:
+            words, syllables, complex_words, polysyllables = self.sentence_counts(paper, sentences)
+            counts = [sum(int(w > 0) for w in words)] + [int(sum(c)) for c in [words, syllables, complex_words, polysyllables]]
+        groups = [self.totals, self.sections[-1][1]]
+        if block.count_as_paragraph:
+            self.paragraphs.append(({'block': index}, [0] * 5))
+            groups.append(self.paragraphs[-1][1])
+        for totals in groups:
+            for column in range(5):
+                totals[column] += counts[column]
+
+    def finish_stream(self, paper):
+        for entry, totals in self.sections + self.paragraphs:
+            entry['sentences'], entry['words'] = totals[0], totals[1]
+            values = compute_metrics(*totals)
+            entry.update(dict((m, round(values[m], 1)) for m in metrics) if values is not None else {})
+        self.publish(paper, compute_metrics(*self.totals), [e for e, _ in self.sections], [e for e, _ in self.paragraphs])
+
+    def publish(self, paper, document, sections, paragraphs):
+        # Skip the part before the first section if it has no text
+        if sections[0]['words'] == 0:
+            sections = sections[1:]
+
+        # Publish the metrics for other plugins
+        for m in metrics:
+            paper.stats[m] = round(document[m], 1) if document is not None else None
+        paper.stats['readability (sections)'] = sections
+        paper.stats['readability (paragraphs)'] = paragraphs
+
+        # Generate report
+        if document is not None:
+            details = ['{} : {:.1f}'.format(m, document[m]) for m in metrics]
+            for entry in sections:
+                if 'flesch reading ease' in entry:
+                    details.append('{} : reading ease {:.1f}, grade {:.1f}'.format(entry['title'] or '(before the first section)',
+                                                                                 entry['flesch reading ease'], entry['flesch-kincaid grade']))
+            difficult = [p for p in paragraphs if 'flesch reading ease' in p and p['flesch reading ease'] < 30]
+            details.append('{} difficult paragraphs (reading ease below 30)'.format(len(difficult)))
+            summary = 'Reading ease {:.1f}, grade {:.1f}'.format(document['flesch reading ease'], document['flesch-kincaid grade'])
+        else:
+            details = None
+            summary = 'No text'
+        paper.reports.append(Report('Readability', details, self.help, summary))
@@ -1,13 +1,13 @@
-import re
 from swtk.processors import *
-from collections import defaultdict
 
 
 class SentenceLengthProcessor(Plugin):
     run_priority = 50
+    provides = ['stats.long sentences', 'stats.short sentences']
+    requires = ['stats.sentences']
 
     def __init__(self):
-        self.stats = defaultdict(lambda: 0)
+        self.state = State(stats=OrderedCounter())
         self.class_mapping = {'extra long sentences': CSS('longSentence', 'C7E1F7'), 'extra short sentences': CSS('shortSentence', 'D7FFD9')}
 
     def process_sentence(self, sentence):
@@ -15,23 +15,26 @@ class SentenceLengthProcessor(Plugin):
         if sentence.tokens[-1].word not in ['.', '?', '!']:
             return
         # Count only tokens that look like words, discard punctuation and 1 char words
-        simple_tokens = [t for t in sentence.tokens if len(t.word) > 1 and re.match(r'^\w+$', t.word)]
+        simple_tokens = [f for f in sentence.tokens.features() if f.is_word and len(f.lower) > 1]
 
         # Final decision
         if len(simple_tokens) > 35:
             sentence.reports.append('_longSentence')
-            self.stats['extra long sentences'] += 1
+            self.state.stats['extra long sentences'] += 1
         elif len(simple_tokens) < 5:
             sentence.reports.append('_shortSentence')
-            self.stats['extra short sentences'] += 1
+            self.state.stats['extra short sentences'] += 1
 
     def finalize(self, paper):
-        detailedInfo = [('{} : {}'.format(k,v), self.class_mapping[k].name) for (k,v) in sorted(self.stats.iteritems(), key=lambda x : x[1],reverse=True)]
+        stats = self.state.stats
+        detailedInfo = [('{} : {}'.format(k,v), self.class_mapping[k].name) for (k,v) in sorted(stats.iteritems(), key=lambda x : x[1],reverse=True)]
         sentences = paper.stats['sentences']
         if sentences is not None and sentences > 0:
-            summary = '{} long sentences ({:.1f}%)'.format(self.stats['extra long sentences'], float(self.stats['extra long sentences'])/sentences*100)
+            summary = '{} long sentences ({:.1f}%)'.format(stats['extra long sentences'], float(stats['extra long sentences'])/sentences*100)
         else:
-            summary = '{} long sentences'.format(self.stats['extra long sentences'])
+            summary = '{} long sentences'.format(stats['extra long sentences'])
         report = Report('Sentence length', Plugin.toggle_button_generator(detailedInfo), None, summary)
         report.css_classes = self.class_mapping.values()
         paper.reports.append(report)
+        paper.stats['long sentences'] = stats['extra long sentences']
+        paper.stats['short sentences'] = stats['extra short sentences']
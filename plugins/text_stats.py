@@ -1,5 +1,4 @@
 import re
-import nltk
 import math
 from swtk.processors import *
 from collections import defaultdict
@@ -11,34 +10,63 @@ def is_word(word):
 
 class TextStatsProcessor(Plugin):
     run_priority = 1
+    provides = ['stats.characters', 'stats.paragraphs', 'stats.sentences', 'stats.words']
     word_regex = r'^[\w\-0-9]+$'
+    # Counters listed in the report (also for empty documents)
+    counter_names = ['characters', 'begun pages (1,500 chars)', 'non-space characters', 'paragraphs', 'sentences',
+                     'words', 'unique words', 'words (abstract)', 'non-space characters (abstract)']
 
     def __init__(self):
         self.counters = defaultdict(lambda : 0)
+        for name in self.counter_names:
+            self.counters[name] = 0
         # Reg-expression for rejecting references and figure numbers from token counts
         self.reject_tokens_expression = r'^\[.*\]$'
+        # Number of blocks & unique words seen so far (streaming mode)
+        self.blocks = 0
+        self.unique_words = set()
 
     def process_text(self, paper):
         # Count characters
-        self.counters['characters'] = len(paper.to_raw_text())
+        raw_text = paper.to_raw_text()
+        self.counters['characters'] = len(raw_text)
         self.counters['begun pages (1,500 chars)'] = int(math.ceil(self.counters['characters'] / 1500.0))
-        self.counters['non-space characters'] = len(re.sub(' +','',paper.to_raw_text()))
+        self.counters['non-space characters'] = len(re.sub(' +','',raw_text))
         self.counters['paragraphs'] = len([x for x in paper.content if x.count_as_paragraph])
         # Count sentences and words
-        unique_tokens = set()
-        for paragraph in paper.content:
-            for sentence in paragraph.get_sentences():
-                self.counters['sentences'] += 1
-                valid_tokens = [t for t in sentence.tokens if is_word(t.word)]
-                self.counters['words'] += len(valid_tokens)
-                for token in valid_tokens:
-                    unique_tokens.add(token.word)
+        self.counters['sentences'] += len(paper.get_all_sentences())
+        word_counts = [(w, c) for w, c in paper.get_word_counts().iteritems() if is_word(w)]
+        self.counters['words'] += sum([c for w, c in word_counts])
         # Count unique words
-        self.counters['unique words'] = len(unique_tokens)
+        self.counters['unique words'] = len(word_counts)
         # Abstract stats
         abstract = paper.get_abstract()
-        self.counters['words (abstract)'] = len([t for t in nltk.word_tokenize(abstract) if is_word(t)])
+        self.counters['words (abstract)'] = len([t for t in paper.get_abstract_tokens() if is_word(t)])
         self.counters['non-space characters (abstract)'] = len(abstract.replace(' ', ''))
+        self.report(paper)
+
+    def process_block(self, paper, block):
+        # Streaming mode: the block is the only content of the paper - add its counts (blocks of the raw text of the
+        # whole paper are separated by spaces)
+        raw_text = paper.to_raw_text()
+        self.counters['characters'] += len(raw_text) + (1 if self.blocks > 0 else 0)
+        self.counters['non-space characters'] += len(re.sub(' +','',raw_text))
+        self.counters['paragraphs'] += int(block.count_as_paragraph)
+        self.counters['sentences'] += len(paper.get_all_sentences())
+        for w, c in paper.get_word_counts().iteritems():
+            if is_word(w):
+                self.counters['words'] += c
+                self.unique_words.add(w)
+        self.counters['words (abstract)'] += len([t for t in paper.get_abstract_tokens() if is_word(t)])
+        self.counters['non-space characters (abstract)'] += len(paper.get_abstract().replace(' ', ''))
+        self.blocks += 1
+
+    def finish_stream(self, paper):
+        self.counters['begun pages (1,500 chars)'] = int(math.ceil(self.counters['characters'] / 1500.0))
+        self.counters['unique words'] = len(self.unique_words)
+        self.report(paper)
+
+    def report(self, paper):
         # Generate report
         details = ['{} : {:,}'.format(k,v) for (k,v) in sorted(self.counters.iteritems(), key=lambda x : x[1],reverse=True)]
         paper.reports.append(Report('Statistics', details, None, '{:,} chars, {:,} words'.format(self.counters['characters'], self.counters['words'])))
@@ -1,13 +1,18 @@
 __author__ = 'pkorus'
 
-import os, sys, argparse, re, logging
-from swtk import paper
+import os, sys, json, argparse, re, logging
+from swtk import pipeline
 from swtk import processors
+from swtk import profiling
+from swtk import export
+from swtk import baseline
+from swtk import tagging
 
 # Parse command line arguments
 parser = argparse.ArgumentParser(description='Scientific Writing Toolbox')
 parser.add_argument('filename', type=str, help='input file (LaTeX, markdown, plaintext)')
-parser.add_argument('-o', '--output', type=str, help='Output filename (HTML) / use - for stdout')
+parser.add_argument('-o', '--output', type=str, help='Output filename (HTML, JSON or NDJSON) / use - for stdout')
+parser.add_argument('-F', '--format', type=str, choices=sorted(export.formats.keys()), help='Output format (default: based on the output filename, or html)')
 parser.add_argument('-s', '--stylesheet', type=str, help='Custom CSS stylesheet')
 parser.add_argument('-j', '--javascript', type=str, help='Custom Java Script')
 parser.add_argument('-e', '--external', help='Use external resources in HTML output',action='store_true')
@@ -16,26 +21,51 @@ parser.add_argument('-V', '--Verbose', help='Print even more information to stdo
 parser.add_argument('-f', '--floats', help='Include captions from floats (tables & figures)', action='store_true')
 parser.add_argument('-m', '--math', help='Enable experimental MathJax support (CDN only)', action='store_true')
 parser.add_argument('-M', '--Math', help='Enable MathJax support & include standalone equations', action='store_true')
+parser.add_argument('-t', '--tagger-workers', type=int, default=1, help='Number of worker processes for POS tagging (default: 1)')
+parser.add_argument('--tagger', type=str, default='default', choices=sorted(tagging.backends.keys()), help='POS tagger: default (NLTK default), perceptron, maxent or hybrid (default: default)')
+parser.add_argument('--tagger-lookup', type=str, help='Lookup table of unambiguous words for the hybrid tagger (see swtk-dictionary.py --pos-lookup)')
+parser.add_argument('--plugins', type=str, help='Comma-separated list of plugins to run (e.g., text_stats,pos_tagger)')
+parser.add_argument('--skip-plugins', type=str, help='Comma-separated list of plugins not to run')
+parser.add_argument('--extra-plugins', type=str, help='Comma-separated list of optional plugins to run in addition to the default ones (e.g., fourgrams,fivegrams)')
+parser.add_argument('--ngram-thresholds', type=str, help='Thresholds of the n-gram plugins - comma-separated n:min_frequency:min_chars triples (e.g., 2:5:4,4:2:3)')
+parser.add_argument('--plugin-workers', type=int, default=1, help='Number of threads for running independent plugins (default: 1)')
+parser.add_argument('--shard-workers', type=int, default=1, help='Number of processes for running sentence & token plugins on sections of the document (default: 1)')
+parser.add_argument('--domain-dictionary', type=str, help='Ranked domain dictionary - its frequent words are not reported as rare (see swtk-dictionary.py)')
+parser.add_argument('--domain-rank', type=int, default=10000, help='Words of the domain dictionary up to this rank are considered frequent (default: 10000)')
+parser.add_argument('-b', '--baseline', type=str, help='Compare the stats with a baseline built from a corpus (see swtk-baseline.py)')
+parser.add_argument('--profile', help='Print the time & memory used by the parser, each plugin and the renderer (to stderr)', action='store_true')
+parser.add_argument('--profile-output', type=str, help='Save the profile as JSON (implies --profile)')
+parser.add_argument('--profile-report', help='Add a performance section to the report (implies --profile)', action='store_true')
+parser.add_argument('--stream', help='Streaming mode for long documents - bounded memory usage (HTML output only, plugin & shard workers are ignored)', action='store_true')
+parser.add_argument('--no-cache', help='Do not use the block cache', action='store_true')
+parser.add_argument('--cache-dir', type=str, default='~/.cache/swtk', help='Block cache directory (default: ~/.cache/swtk)')
+parser.add_argument('--cache-size', type=int, default=256, help='Maximum size of the block cache in MB (default: 256)')
 args = parser.parse_args()
 
-supported_formats = {'.tex' : paper.LatexPaper, '.md': paper.MarkdownPaper, '.txt': paper.PlaintextPaper}
+supported_formats = pipeline.supported_formats
 
 # Verify params
-if not os.path.splitext(args.filename)[-1].lower() in supported_formats.keys():
+if pipeline.get_paper_class(args.filename) is None:
     print 'Error: Unsupported document format (%s)' % os.path.split(args.filename)[-1]
     sys.exit(1)
 
+if not args.format:
+    args.format = 'html'
+    for output_format, extension in export.formats.iteritems():
+        if args.output is not None and args.output.endswith(extension):
+            args.format = output_format
+
 if not args.output:
     # args.output = args.filename.replace('.tex', '.html')
-    args.output = re.sub('({})'.format('|'.join(supported_formats.keys())), '.html', args.filename)
+    args.output = re.sub('({})'.format('|'.join(supported_formats.keys())), export.formats[args.format], args.filename)
 
-if not args.output.endswith('.html') and not args.output == '-':
+if not args.output.endswith(export.formats[args.format]) and not args.output == '-':
     print 'Error: Unsupported output format (%s)' % os.path.split(args.output)[-1]
     sys.exit(1)
 
-# Read lines from the input file
-with open(args.filename) as f:
-    lines = f.readlines()
+if args.stream and args.format != 'html':
+    print 'Error: The streaming mode supports only HTML output'
+    sys.exit(1)
 
 # Check if the user specified valid resources
 if args.stylesheet is not None and not os.path.exists(args.stylesheet):
@@ -46,19 +76,42 @@ if args.javascript is not None and not os.path.exists(args.javascript):
     print('ERROR File does not exist {}'.format(args.javascript))
     sys.exit(1)
 
+for filename in [args.baseline, args.domain_dictionary, args.tagger_lookup]:
+    if filename is not None and not os.path.exists(filename):
+        print('ERROR File does not exist {}'.format(filename))
+        sys.exit(1)
+
+# Load the tagger early - its model may not be installed
+try:
+    tagging.get_tagger(args.tagger, args.tagger_lookup)
+except LookupError:
+    print('ERROR The model of the {} tagger is not installed (see nltk.download)'.format(args.tagger))
+    sys.exit(1)
+
 # Configure paths for external resources
 resources = {}
 if args.stylesheet is not None: resources['css'] = args.stylesheet
 if args.javascript is not None: resources['js'] = args.javascript
 
-# Enable experimental MathJax support
-if args.math: paper.math = True
-if args.Math:
-    paper.math = True
-    paper.display_math = True
-
-# Enable float caption parsing
-if args.floats: paper.display_floats = True
+# Enable experimental MathJax support & float caption parsing
+pipeline.configure(args.math, args.Math, args.floats)
+
+# Configure plugins
+processors.options['tagger_workers'] = args.tagger_workers
+processors.options['tagger'] = args.tagger
+processors.options['tagger_lookup'] = args.tagger_lookup
+processors.options['plugin_workers'] = args.plugin_workers
+processors.options['shard_workers'] = args.shard_workers
+processors.options['domain_dictionary'] = args.domain_dictionary
+processors.options['domain_rank'] = args.domain_rank
+processors.options['ngram_thresholds'] = {}
+for item in (args.ngram_thresholds.split(',') if args.ngram_thresholds is not None else []):
+    try:
+        n, min_frequency, min_chars = [int(x) for x in item.split(':')]
+    except ValueError:
+        print('ERROR Invalid n-gram thresholds {} (expected n:min_frequency:min_chars)'.format(item))
+        sys.exit(1)
+    processors.options['ngram_thresholds'][n] = (min_frequency, min_chars)
 
 # Enabled logging
 if args.verbose:
@@ -68,26 +121,78 @@ if args.Verbose:
     args.verbose = True
     logging.basicConfig(level=logging.DEBUG)
 
-# Parse paper
-paper_class = supported_formats[os.path.splitext(args.filename)[-1].lower()]
-p = paper_class(lines, resources)
-
-# Load and execute text analysis plugins
+# Load text analysis plugins
 root_path = os.path.split(__file__)[0]
-processors.Plugin.register_plugins('{}/plugins'.format(root_path if len(root_path) > 0 else '.'))
-processors.Plugin.run_all(p)
+selected_plugins = args.plugins.split(',') if args.plugins is not None else None
+skipped_plugins = args.skip_plugins.split(',') if args.skip_plugins is not None else None
+extra_plugins = args.extra_plugins.split(',') if args.extra_plugins is not None else None
+for name in (selected_plugins or []) + (skipped_plugins or []) + (extra_plugins or []):
+    if name not in pipeline.available_plugins(root_path):
+        print('ERROR Unknown plugin {} (available: {})'.format(name, ', '.join(pipeline.available_plugins(root_path))))
+        sys.exit(1)
+
+try:
+    pipeline.load_plugins(root_path, selected_plugins, skipped_plugins, extra_plugins)
+except processors.DependencyError as e:
+    print('ERROR Invalid plugin dependencies: {}'.format(e))
+    sys.exit(1)
+
+# Re-use tokenization & tagging of unchanged blocks from previous runs
+if not args.no_cache:
+    pipeline.enable_cache(args.cache_dir, args.cache_size * 1024 * 1024)
+
+# Measure the parser, the plugins and the renderer
+if args.profile or args.profile_output or args.profile_report:
+    profiling.enable()
+
+# Parse paper & execute text analysis plugins
+with open(args.filename) as f:
+    if args.stream:
+        # Read lines lazily & spool processed blocks to disk
+        try:
+            p = pipeline.analyze_stream(pipeline.get_paper_class(args.filename), f, resources)
+        except processors.DependencyError as e:
+            print('ERROR {}'.format(e))
+            sys.exit(1)
+        line_count = len(p.line_index.starts)
+    else:
+        lines = f.readlines()
+        line_count = len(lines)
+        p = pipeline.analyze(pipeline.get_paper_class(args.filename), lines, resources)
+
+if args.baseline is not None:
+    baseline.load(args.baseline).annotate(p)
+
+if args.profile_report:
+    p.reports.append(profiling.active.to_report())
 
 # Print summary
 if args.verbose:
     print 'Input filename: %s' % args.filename
     print 'Output filename: %s' % args.output
     print 'Resources: %s' % p.resources
-    print 'Opened LaTeX document with %d lines' % len(lines)
+    print 'Opened LaTeX document with %d lines' % line_count
     print p.to_summary()
 
+# Save as JSON / NDJSON
+if args.format != 'html':
+    if args.output == '-':
+        export.write_export(p, sys.stdout, args.format)
+    else:
+        with open(args.output, 'w') as f:
+            export.write_export(p, f, args.format)
 # Save as HTML
-if args.output == '-':
-    print p.to_html(args.external)
+elif args.output == '-':
+    p.write_html(sys.stdout, args.external)
+    sys.stdout.write('\n')
 else:
     with open(args.output, 'w') as f:
-        f.write(p.to_html(args.external))
\ No newline at end of file
+        p.write_html(f, args.external)
+
+# Report the profile
+if profiling.active is not None:
+    profiler = profiling.disable()
+    sys.stderr.write(profiler.to_table() + '\n')
+    if args.profile_output:
+        with open(args.profile_output, 'w') as f:
+            json.dump(profiler.to_json(), f, indent=2, sort_keys=True)
@@ -0,0 +1,49 @@
+__author__ = 'pkorus'
+
+import os, sys, argparse, logging, time, multiprocessing
+from swtk import batch
+from swtk import baseline
+
+# Parse command line arguments
+parser = argparse.ArgumentParser(description='Scientific Writing Toolbox - builds a baseline (distributions of the stats) from a corpus of manuscripts')
+parser.add_argument('inputs', type=str, nargs='*', help='input files, glob patterns or directories (LaTeX, markdown, plaintext)')
+parser.add_argument('-l', '--list', type=str, help='File with a list of inputs (one per line)')
+parser.add_argument('-o', '--output', type=str, default='baseline.json', help='Baseline filename (default: baseline.json)')
+parser.add_argument('-w', '--workers', type=int, default=multiprocessing.cpu_count(), help='Number of worker processes (default: number of CPUs)')
+parser.add_argument('-k', '--sketch-size', type=int, default=200, help='Size of the quantile sketches - larger is more accurate (default: 200)')
+parser.add_argument('-c', '--chunk-size', type=int, default=20, help='Number of documents summarized by a worker at a time (default: 20)')
+parser.add_argument('-v', '--verbose', help='Print more information to stdout',action='store_true')
+parser.add_argument('-f', '--floats', help='Include captions from floats (tables & figures)', action='store_true')
+parser.add_argument('-m', '--math', help='Enable experimental MathJax support (CDN only)', action='store_true')
+parser.add_argument('-M', '--Math', help='Enable MathJax support & include standalone equations', action='store_true')
+args = parser.parse_args()
+
+inputs = batch.collect_inputs(args.inputs, args.list)
+
+if len(inputs) == 0:
+    print 'Error: No supported documents found'
+    sys.exit(1)
+
+if args.verbose:
+    logging.basicConfig(level=logging.INFO)
+
+flags = (args.math, args.Math, args.floats)
+root_path = os.path.split(__file__)[0]
+
+# Summarize the documents
+start = time.time()
+failures = []
+result = None
+for result, chunk_failures, processed in baseline.build(inputs, args.workers, root_path, flags, args.sketch_size, args.chunk_size):
+    failures.extend(chunk_failures)
+    for filename, error in chunk_failures:
+        print '{} failed: {}'.format(filename, error)
+    print '[{}/{}] {:.1f} s'.format(processed, len(inputs), time.time() - start)
+
+if os.path.dirname(args.output) and not os.path.isdir(os.path.dirname(args.output)):
+    os.makedirs(os.path.dirname(args.output))
+result.save(args.output)
+
+for name, sketch in result.sketches.iteritems():
+    print '{:<24} median {:8.3f}  (10% {:.3f}, 90% {:.3f})'.format(name, sketch.quantile(0.5), sketch.quantile(0.1), sketch.quantile(0.9))
+print 'Summarized {} documents in {:.1f} s ({} failed), baseline saved to {}'.format(result.documents, time.time() - start, len(failures), args.output)
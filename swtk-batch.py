@@ -0,0 +1,76 @@
+__author__ = 'pkorus'
+
+import os, sys, argparse, logging, time, multiprocessing
+from swtk import batch
+from swtk import cache
+
+# Parse command line arguments
+parser = argparse.ArgumentParser(description='Scientific Writing Toolbox - batch analysis of multiple manuscripts')
+parser.add_argument('inputs', type=str, nargs='*', help='input files, glob patterns or directories (LaTeX, markdown, plaintext)')
+parser.add_argument('-l', '--list', type=str, help='File with a list of inputs (one per line)')
+parser.add_argument('-d', '--output-dir', type=str, help='Output directory (by default, reports are saved next to the inputs)')
+parser.add_argument('-w', '--workers', type=int, default=multiprocessing.cpu_count(), help='Number of worker processes (default: number of CPUs)')
+parser.add_argument('-S', '--summary', type=str, help='Aggregate summary filename (CSV; default: summary.csv in the output directory)')
+parser.add_argument('-s', '--stylesheet', type=str, help='Custom CSS stylesheet')
+parser.add_argument('-j', '--javascript', type=str, help='Custom Java Script')
+parser.add_argument('-e', '--external', help='Use external resources in HTML output',action='store_true')
+parser.add_argument('-v', '--verbose', help='Print more information to stdout',action='store_true')
+parser.add_argument('-f', '--floats', help='Include captions from floats (tables & figures)', action='store_true')
+parser.add_argument('-m', '--math', help='Enable experimental MathJax support (CDN only)', action='store_true')
+parser.add_argument('-M', '--Math', help='Enable MathJax support & include standalone equations', action='store_true')
+parser.add_argument('--no-cache', help='Do not use the block cache', action='store_true')
+parser.add_argument('--cache-dir', type=str, default='~/.cache/swtk', help='Block cache directory (default: ~/.cache/swtk)')
+parser.add_argument('--cache-size', type=int, default=256, help='Maximum size of the block cache in MB (default: 256)')
+args = parser.parse_args()
+
+inputs = batch.collect_inputs(args.inputs, args.list)
+
+if len(inputs) == 0:
+    print 'Error: No supported documents found'
+    sys.exit(1)
+
+# Check if the user specified valid resources
+for filename in [args.stylesheet, args.javascript]:
+    if filename is not None and not os.path.exists(filename):
+        print('ERROR File does not exist {}'.format(filename))
+        sys.exit(1)
+
+resources = {}
+if args.stylesheet is not None: resources['css'] = args.stylesheet
+if args.javascript is not None: resources['js'] = args.javascript
+
+if args.verbose:
+    logging.basicConfig(level=logging.INFO)
+
+outputs = batch.output_filenames(inputs, args.output_dir)
+if args.summary is None:
+    args.summary = os.path.join(args.output_dir if args.output_dir is not None else '.', 'summary.csv')
+
+cache_settings = None if args.no_cache else (args.cache_dir, args.cache_size * 1024 * 1024)
+flags = (args.math, args.Math, args.floats)
+root_path = os.path.split(__file__)[0]
+
+# Analyze documents
+start = time.time()
+results = []
+for result in batch.run_batch(inputs, outputs, args.workers, root_path, flags, resources, args.external, cache_settings):
+    results.append(result)
+    if result['error'] is None:
+        print '[{}/{}] {} -> {} ({:.1f} s)'.format(len(results), len(inputs), result['filename'], result['output'], result['time'])
+    else:
+        print '[{}/{}] {} failed: {}'.format(len(results), len(inputs), result['filename'], result['error'])
+
+# Enforce the cache size limit once all workers are done
+if cache_settings is not None:
+    try:
+        cache.BlockCache(*cache_settings).evict()
+    except (IOError, OSError):
+        pass
+
+if os.path.dirname(args.summary) and not os.path.isdir(os.path.dirname(args.summary)):
+    os.makedirs(os.path.dirname(args.summary))
+batch.write_summary(results, args.summary)
+
+failures = len([r for r in results if r['error'] is not None])
+print 'Analyzed {} documents in {:.1f} s ({} failed), summary saved to {}'.format(len(results), time.time() - start, failures, args.summary)
+sys.exit(1 if failures > 0 else 0)
@@ -0,0 +1,54 @@
+__author__ = 'pkorus'
+
+import os, sys, argparse, logging, time, multiprocessing
+from swtk import batch
+from swtk import dictionary
+
+# Parse command line arguments
+parser = argparse.ArgumentParser(description='Scientific Writing Toolbox - builds a ranked domain dictionary from a corpus of manuscripts')
+parser.add_argument('inputs', type=str, nargs='*', help='input files, glob patterns or directories (LaTeX, markdown, plaintext)')
+parser.add_argument('-l', '--list', type=str, help='File with a list of inputs (one per line)')
+parser.add_argument('-o', '--output', type=str, default='domain.txt', help='Dictionary filename (default: domain.txt)')
+parser.add_argument('-w', '--workers', type=int, default=multiprocessing.cpu_count(), help='Number of worker processes (default: number of CPUs)')
+parser.add_argument('-n', '--size', type=int, default=100000, help='Maximum number of words in the dictionary (default: 100000)')
+parser.add_argument('--min-count', type=int, default=2, help='Minimum number of occurrences of a word (default: 2)')
+parser.add_argument('--max-words', type=int, default=500000, help='Distinct words counted in memory by a worker before spilling to disk (default: 500000)')
+parser.add_argument('--pos-lookup', type=str, help='Also build a lookup table of unambiguous words for the hybrid POS tagger (slow - the corpus is tagged)')
+parser.add_argument('-c', '--chunk-size', type=int, default=50, help='Number of documents processed by a worker at a time (default: 50)')
+parser.add_argument('-v', '--verbose', help='Print more information to stdout',action='store_true')
+parser.add_argument('-f', '--floats', help='Include captions from floats (tables & figures)', action='store_true')
+parser.add_argument('-m', '--math', help='Enable experimental MathJax support (CDN only)', action='store_true')
+parser.add_argument('-M', '--Math', help='Enable MathJax support & include standalone equations', action='store_true')
+args = parser.parse_args()
+
+inputs = batch.collect_inputs(args.inputs, args.list)
+
+if len(inputs) == 0:
+    print 'Error: No supported documents found'
+    sys.exit(1)
+
+if args.verbose:
+    logging.basicConfig(level=logging.INFO)
+
+flags = (args.math, args.Math, args.floats)
+
+for filename in [args.output, args.pos_lookup]:
+    if filename and os.path.dirname(filename) and not os.path.isdir(os.path.dirname(filename)):
+        os.makedirs(os.path.dirname(filename))
+
+# Count the words of all documents
+start = time.time()
+failures = []
+tokens = 0
+for processed, tokens, chunk_failures in dictionary.build(inputs, args.output, args.workers, flags, args.size, args.min_count, args.max_words, args.chunk_size, args.pos_lookup):
+    failures.extend(chunk_failures)
+    for filename, error in chunk_failures:
+        print '{} failed: {}'.format(filename, error)
+    print '[{}/{}] {:,} tokens, {:.1f} s'.format(processed, len(inputs), tokens, time.time() - start)
+
+with open(args.output) as f:
+    words = sum(1 for line in f)
+print 'Counted {:,} tokens of {} documents in {:.1f} s ({} failed), saved {:,} words to {}'.format(tokens, len(inputs), time.time() - start, len(failures), words, args.output)
+if args.pos_lookup:
+    with open(args.pos_lookup) as f:
+        print 'Saved {:,} unambiguous words to {}'.format(sum(1 for line in f), args.pos_lookup)
@@ -0,0 +1,31 @@
+__author__ = 'pkorus'
+
+import os, sys, argparse
+from swtk import lexicon
+
+# Parse command line arguments
+parser = argparse.ArgumentParser(description='Scientific Writing Toolbox - compiles word lists into a binary lexicon')
+parser.add_argument('-o', '--output', type=str, default=lexicon.default_lexicon, help='Output filename (default: {})'.format(lexicon.default_lexicon))
+parser.add_argument('--frequent', type=str, default=lexicon.default_sources['frequent'], help='List of frequent words (pickle)')
+parser.add_argument('--filter-words', type=str, default=lexicon.default_sources['filter_words'], help='Filter words dictionary (JSON)')
+parser.add_argument('--vocabulary', type=str, help='Reference vocabulary sorted by frequency (text file, one word per line, optionally followed by its count)')
+parser.add_argument('--frequent-rank', type=int, default=0, help='Words of the reference vocabulary up to this rank are considered frequent')
+parser.add_argument('-q', '--query', type=str, nargs='+', help='Look up words in an existing lexicon instead')
+args = parser.parse_args()
+
+if args.query is not None:
+    lex = lexicon.open_lexicon(args.output)
+    for word in args.query:
+        flags, rank = lex.get(word.lower())
+        names = [name for name, category in sorted(lexicon.categories.items()) if flags & category]
+        print '{} : {} (rank {})'.format(word, ', '.join(names) if len(names) > 0 else 'unknown', rank if rank > 0 else 'n/a')
+    sys.exit(0)
+
+for filename in [args.frequent, args.filter_words, args.vocabulary]:
+    if filename is not None and not os.path.exists(filename):
+        print('ERROR File does not exist {}'.format(filename))
+        sys.exit(1)
+
+entries = lexicon.collect_entries(args.frequent, args.filter_words, args.vocabulary, args.frequent_rank)
+lexicon.save_lexicon(lexicon.compile_lexicon(entries), args.output)
+print 'Saved {:,} words to {}'.format(len(entries), args.output)
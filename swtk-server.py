@@ -0,0 +1,41 @@
+__author__ = 'pkorus'
+
+import os, sys, signal, argparse, logging, multiprocessing
+from swtk import server
+
+# Parse command line arguments
+parser = argparse.ArgumentParser(description='Scientific Writing Toolbox - resident analysis server')
+parser.add_argument('--host', type=str, default='127.0.0.1', help='Host to listen on (default: 127.0.0.1)')
+parser.add_argument('-p', '--port', type=int, default=8765, help='TCP port to listen on (default: 8765)')
+parser.add_argument('-u', '--socket', type=str, help='Listen on a Unix socket instead of a TCP port')
+parser.add_argument('-w', '--workers', type=int, default=multiprocessing.cpu_count(), help='Number of worker processes (default: number of CPUs)')
+parser.add_argument('-v', '--verbose', help='Log incoming requests',action='store_true')
+parser.add_argument('-f', '--floats', help='Include captions from floats (tables & figures)', action='store_true')
+parser.add_argument('-m', '--math', help='Enable experimental MathJax support (CDN only)', action='store_true')
+parser.add_argument('-M', '--Math', help='Enable MathJax support & include standalone equations', action='store_true')
+parser.add_argument('--no-cache', help='Do not use the block cache', action='store_true')
+parser.add_argument('--cache-dir', type=str, default='~/.cache/swtk', help='Block cache directory (default: ~/.cache/swtk)')
+parser.add_argument('--cache-size', type=int, default=256, help='Maximum size of the block cache in MB (default: 256)')
+args = parser.parse_args()
+
+if args.verbose:
+    logging.basicConfig(level=logging.INFO)
+
+cache_settings = None if args.no_cache else (args.cache_dir, args.cache_size * 1024 * 1024)
+service = server.AnalysisService(args.workers, os.path.split(__file__)[0], (args.math, args.Math, args.floats), cache_settings)
+httpd = server.create_server(service, args.host, args.port, args.socket)
+
+print 'Listening on {} with {} workers'.format(args.socket if args.socket else '{}:{}'.format(args.host, args.port), args.workers)
+
+# Shut down gracefully when terminated
+signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+try:
+    httpd.serve_forever()
+except KeyboardInterrupt:
+    pass
+finally:
+    httpd.server_close()
+    service.close()
+    if args.socket is not None and os.path.exists(args.socket):
+        os.remove(args.socket)
@@ -0,0 +1,283 @@
+__author__ = 'pkorus'
+
+import json
+import math
+import time
+import logging
+import traceback
+import itertools
+import multiprocessing
+from collections import OrderedDict
+from swtk import batch
+from swtk import pipeline
+from swtk.processors import Report
+
+# Bump whenever the structure of the baseline file changes
+baseline_format = 1
+
+# Metrics compared with the baseline: (name, stat, stat used as the denominator or None, label of the related report)
+# Counts are normalized by the length of the document, so that manuscripts of different lengths can be compared
+metrics = [('passive voice', 'passive voice sentences', 'sentences', 'Passive voice sentences'),
+           ('long sentences', 'long sentences', 'sentences', 'Sentence length'),
+           ('short sentences', 'short sentences', 'sentences', None),
+           ('weak verbs', 'weak verbs', 'verbs', 'Weak verbs'),
+           ('filter words', 'filter words', 'words', 'Filter words & phrases'),
+           ('buried verbs', 'buried verb sentences', 'sentences', 'Buried verbs'),
+           ('words per sentence', 'words', 'sentences', 'Statistics'),
+           ('flesch reading ease', 'flesch reading ease', None, 'Readability'),
+           ('flesch-kincaid grade', 'flesch-kincaid grade', None, None),
+           ('gunning fog index', 'gunning fog index', None, None),
+           ('smog index', 'smog index', None, None)]
+
+
+class QuantileSketch:
+    """
+    Compact, mergeable summary of a distribution (a KLL sketch). Values are kept in levels of compactors: items at level
+    h stand for 2^h values of the input. A full level is sorted and every other item is promoted to the next level, so
+    the sketch keeps O(k log(n/k)) items while the error of the ranks is about 1/k (k = 200 gives ~1%).
+    """
+
+    def __init__(self, k=200):
+        self.k = k
+        self.count = 0
+        self.minimum = None
+        self.maximum = None
+        self.levels = [[]]
+        # Compactions alternate between promoting the odd & even items (deterministic, unlike the original KLL)
+        self.parity = 0
+
+    def capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(int(math.ceil(self.k * (2.0 / 3.0) ** depth)), 2)
+
+    def size(self):
+        return sum(len(l) for l in self.levels)
+
+    def add(self, value):
+        self.levels[0].append(value)
+        self.count += 1
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+        if len(self.levels[0]) >= self.capacity(0):
+            self.compress()
+
+    def compress(self):
+        while self.size() > sum(self.capacity(h) for h in range(len(self.levels))):
+            for h, level in enumerate(self.levels):
+                if len(level) >= self.capacity(h):
+                    if h + 1 == len(self.levels):
+                        self.levels.append([])
+                    level.sort()
+                    # An odd item stays at its level
+                    kept = level[-1:] if len(level) % 2 == 1 else []
+                    self.levels[h + 1].extend(level[self.parity:len(level) - len(kept):2])
+                    self.levels[h] = kept
+                    self.parity ^= 1
+                    break
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for h, level in enumerate(other.levels):
+            self.levels[h].extend(level)
+        self.count += other.count
+        for value in [other.minimum, other.maximum]:
+            if value is not None:
+                self.minimum = value if self.minimum is None else min(self.minimum, value)
+                self.maximum = value if self.maximum is None else max(self.maximum, value)
+        self.compress()
+        return self
+
+    def rank(self, value):
+        """
+        Returns the fraction of values below the given value (values equal to it count as a half).
+        """
+        if self.count == 0:
+            return None
+        below = 0.0
+        for h, level in enumerate(self.levels):
+            weight = 2 ** h
+            below += weight * sum(1.0 if x < value else 0.5 if x == value else 0.0 for x in level)
+        return below / self.count
+
+    def quantile(self, q):
+        """
+        Returns an approximate q-quantile (0 <= q <= 1) of the values.
+        """
+        if self.count == 0:
+            return None
+        items = sorted((x, 2 ** h) for h, level in enumerate(self.levels) for x in level)
+        target = q * sum(w for x, w in items)
+        position = 0
+        for x, weight in items:
+            position += weight
+            if position >= target:
+                return x
+        return self.maximum
+
+    def to_json(self):
+        return {'k': self.k, 'count': self.count, 'min': self.minimum, 'max': self.maximum, 'levels': self.levels}
+
+    @staticmethod
+    def from_json(data):
+        sketch = QuantileSketch(data['k'])
+        sketch.count = data['count']
+        sketch.minimum, sketch.maximum = data['min'], data['max']
+        sketch.levels = data['levels']
+        return sketch
+
+
+def document_metrics(stats):
+    """
+    Computes the metrics of a document (see metrics) from its stats; metrics with missing stats are skipped.
+    :return: ordered dictionary: metric name -> value
+    """
+    output = OrderedDict()
+    for name, stat, denominator, label in metrics:
+        value = stats.get(stat)
+        if value is None:
+            continue
+        if denominator is not None:
+            if not stats.get(denominator):
+                continue
+            value = float(value) / stats[denominator]
+        output[name] = value
+    return output
+
+
+def ordinal(number):
+    suffix = 'th' if 10 <= number % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(number % 10, 'th')
+    return '{}{}'.format(number, suffix)
+
+
+class Baseline:
+    """
+    Distributions of the metrics of a corpus of documents (one quantile sketch per metric).
+    """
+
+    def __init__(self, k=200):
+        self.k = k
+        self.documents = 0
+        self.sketches = OrderedDict()
+
+    def add(self, stats):
+        self.documents += 1
+        for name, value in document_metrics(stats).iteritems():
+            if name not in self.sketches:
+                self.sketches[name] = QuantileSketch(self.k)
+            self.sketches[name].add(value)
+
+    def merge(self, other):
+        self.documents += other.documents
+        for name, sketch in other.sketches.iteritems():
+            if name in self.sketches:
+                self.sketches[name].merge(sketch)
+            else:
+                self.sketches[name] = sketch
+        return self
+
+    def percentile(self, name, value):
+        """
+        Returns the percentile (0 - 100) of a value of a metric in the corpus, or None if the metric is unknown.
+        """
+        if name not in self.sketches or self.sketches[name].count == 0:
+            return None
+        return 100.0 * self.sketches[name].rank(value)
+
+    def compare(self, stats):
+        """
+        :return: list of (metric name, value, percentile, report label) tuples
+        """
+        output = []
+        labels = dict((m[0], m[3]) for m in metrics)
+        for name, value in document_metrics(stats).iteritems():
+            percentile = self.percentile(name, value)
+            if percentile is not None:
+                output.append((name, value, percentile, labels[name]))
+        return output
+
+    def annotate(self, paper):
+        """
+        Adds the percentiles of the paper's metrics to the summaries of the related reports, and a report comparing all
+        metrics with the baseline.
+        """
+        comparison = self.compare(paper.stats)
+        reports = dict((r.label, r) for r in paper.reports)
+        for name, value, percentile, label in comparison:
+            if label in reports and hasattr(reports[label], 'summary'):
+                reports[label].summary += ' ({}: {} percentile)'.format(name, ordinal(int(round(percentile))))
+        details = ['{} : {:.3g} - {} percentile (median {:.3g})'.format(name, value, ordinal(int(round(percentile))), self.sketches[name].quantile(0.5))
+                   for name, value, percentile, label in comparison]
+        summary = '{:,} reference documents'.format(self.documents)
+        paper.reports.append(Report('Comparison with baseline', details, 'Percentiles of the metrics of the document in a reference corpus (e.g., 82nd percentile of passive voice: 82% of the documents have fewer passive voice sentences per sentence).', summary))
+
+    def to_json(self):
+        return {'format': baseline_format, 'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'documents': self.documents,
+                'k': self.k, 'metrics': OrderedDict((name, s.to_json()) for name, s in self.sketches.iteritems())}
+
+    def save(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.to_json(), f)
+
+
+def load(filename):
+    with open(filename) as f:
+        data = json.load(f, object_pairs_hook=OrderedDict)
+    if data.get('format') != baseline_format:
+        raise ValueError('Unsupported baseline format (format {} expected)'.format(baseline_format))
+    baseline = Baseline(data['k'])
+    baseline.documents = data['documents']
+    for name, sketch in data['metrics'].iteritems():
+        baseline.sketches[name] = QuantileSketch.from_json(sketch)
+    return baseline
+
+
+def process_chunk(job):
+    """
+    Analyzes a group of documents (in a worker process) and summarizes their metrics; the documents are discarded as
+    soon as they are analyzed.
+    :param job: (list of filenames, k) tuple
+    :return: (baseline, list of (filename, error message) tuples)
+    """
+    filenames, k = job
+    baseline = Baseline(k)
+    failures = []
+    for filename in filenames:
+        try:
+            with open(filename) as f:
+                lines = f.readlines()
+            p = pipeline.analyze(pipeline.get_paper_class(filename), lines)
+            baseline.add(p.stats)
+        except Exception as e:
+            logging.debug(traceback.format_exc())
+            failures.append((filename, '{}: {}'.format(e.__class__.__name__, e)))
+    return baseline, failures
+
+
+def build(inputs, workers, root_path, flags, k=200, chunk_size=20):
+    """
+    Builds a baseline from a corpus of documents using a pool of worker processes. Workers summarize chunks of
+    documents, and the partial baselines are merged (in the order of the inputs), so the memory usage does not depend
+    on the size of the corpus.
+    :param flags: (math, display_math, floats) tuple
+    :return: generator of (baseline, failures, number of processed documents) tuples - after every chunk; the last
+             baseline is the complete one
+    """
+    jobs = [(inputs[i:i + chunk_size], k) for i in range(0, len(inputs), chunk_size)]
+    baseline = Baseline(k)
+    processed = 0
+    if workers <= 1:
+        batch.init_worker(root_path, flags)
+        results = (process_chunk(job) for job in jobs)
+    else:
+        pool = multiprocessing.Pool(workers, batch.init_worker, (root_path, flags))
+        results = pool.imap(process_chunk, jobs)
+    try:
+        for (partial, failures), (filenames, _) in itertools.izip(results, jobs):
+            baseline.merge(partial)
+            processed += len(filenames)
+            yield baseline, failures, processed
+    finally:
+        if workers > 1:
+            pool.close()
+            pool.join()
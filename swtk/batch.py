@@ -0,0 +1,130 @@
+__author__ = 'pkorus'
+
+import os
+import csv
+import glob
+import time
+import logging
+import traceback
+import multiprocessing
+from swtk import paper
+from swtk import pipeline
+
+
+def collect_inputs(patterns, list_filename=None):
+    """
+    Expands glob patterns, directories (searched recursively) and file lists into a list of documents.
+    :param patterns: list of filenames, glob patterns or directories
+    :param list_filename: optional file with one input per line
+    :return: list of filenames of supported documents (in order, without duplicates)
+    """
+    patterns = list(patterns)
+    if list_filename is not None:
+        with open(list_filename) as f:
+            patterns.extend([l.strip() for l in f if len(l.strip()) > 0 and not l.startswith('#')])
+
+    candidates = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for dirpath, dirnames, filenames in os.walk(pattern):
+                dirnames.sort()
+                candidates.extend([os.path.join(dirpath, f) for f in sorted(filenames)])
+        else:
+            # Keep names that do not match anything - they will be reported as failures
+            candidates.extend(sorted(glob.glob(pattern)) or [pattern])
+
+    inputs = []
+    for filename in candidates:
+        if pipeline.get_paper_class(filename) is not None and filename not in inputs:
+            inputs.append(filename)
+    return inputs
+
+
+def output_filenames(inputs, output_dir=None):
+    """
+    Generates report filenames: next to the inputs, or in the output directory (mirroring the input directory tree).
+    """
+    outputs = [os.path.splitext(f)[0] + '.html' for f in inputs]
+    # Keep the original extension if reports of different inputs would collide (e.g., paper.tex and paper.md)
+    outputs = [f + '.html' if outputs.count(o) > 1 else o for (f, o) in zip(inputs, outputs)]
+    if output_dir is None or len(inputs) == 0:
+        return outputs
+    root = os.path.dirname(os.path.commonprefix([os.path.abspath(f) for f in inputs]))
+    return [os.path.join(output_dir, os.path.relpath(os.path.abspath(f), root)) for f in outputs]
+
+
+def init_worker(root_path, flags, cache_settings=None):
+    """
+    Prepares a worker process: the plugins (and their dictionaries) & NLTK models are loaded once per worker.
+    :param flags: (math, display_math, floats) tuple
+    :param cache_settings: (path, max_size) tuple, or None to disable the block cache
+    """
+    pipeline.configure(*flags)
+    pipeline.load_plugins(root_path)
+    if cache_settings is not None:
+        pipeline.enable_cache(cache_settings[0], cache_settings[1], auto_evict=False)
+
+
+def process_document(job):
+    """
+    Analyzes a single document and writes its HTML report.
+    :param job: (input filename, output filename, resources, external) tuple
+    :return: dictionary with the stats and report summaries (or the error message)
+    """
+    filename, output, resources, external = job
+    result = {'filename': filename, 'output': output, 'stats': {}, 'summaries': [], 'error': None}
+    start = time.time()
+    try:
+        with open(filename) as f:
+            lines = f.readlines()
+        p = pipeline.analyze(pipeline.get_paper_class(filename), lines, resources)
+        dirname = os.path.dirname(output)
+        if len(dirname) > 0 and not os.path.isdir(dirname):
+            try:
+                os.makedirs(dirname)
+            except OSError:
+                pass
+        with open(output, 'w') as f:
+            p.write_html(f, external)
+        result['stats'] = dict(p.stats)
+        result['summaries'] = [(r.label, getattr(r, 'summary', None)) for r in p.reports]
+    except Exception as e:
+        logging.debug(traceback.format_exc())
+        result['error'] = '{}: {}'.format(e.__class__.__name__, e)
+        if paper.cache is not None:
+            paper.cache.discard()
+    result['time'] = time.time() - start
+    return result
+
+
+def run_batch(inputs, outputs, workers, root_path, flags, resources=None, external=False, cache_settings=None):
+    """
+    Analyzes documents using a pool of worker processes.
+    :return: generator of result dictionaries (in the order of the inputs)
+    """
+    jobs = [(i, o, resources if resources is not None else {}, external) for (i, o) in zip(inputs, outputs)]
+    if workers <= 1:
+        init_worker(root_path, flags, cache_settings)
+        for job in jobs:
+            yield process_document(job)
+    else:
+        pool = multiprocessing.Pool(workers, init_worker, (root_path, flags, cache_settings))
+        try:
+            for result in pool.imap(process_document, jobs):
+                yield result
+        finally:
+            pool.close()
+            pool.join()
+
+
+def write_summary(results, filename):
+    """
+    Writes a CSV file with the stats of all analyzed documents (one row per document). Only scalar stats are included.
+    """
+    keys = sorted(set([k for r in results for k, v in r['stats'].iteritems() if v is None or isinstance(v, (int, long, float, basestring))]))
+    with open(filename, 'wb') as f:
+        writer = csv.writer(f)
+        writer.writerow(['filename', 'output', 'time', 'error'] + keys)
+        for r in results:
+            writer.writerow([r['filename'], r['output'], '{:.2f}'.format(r['time']), r['error'] or ''] +
+                            [r['stats'].get(k, '') for k in keys])
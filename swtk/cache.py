@@ -0,0 +1,154 @@
+__author__ = 'pkorus'
+
+import os
+import hashlib
+import logging
+import tempfile
+import cPickle as pickle
+import nltk
+
+# Bump whenever the layout of the cached entries changes
+cache_format = 3
+
+
+class BlockCache:
+    """
+    Content-addressed on-disk cache of split, tokenized and POS-tagged text blocks. Entries are keyed by a hash of the
+    block body, the syntax replacements, the parser flags and the versions of NLTK and the plugins - editing a
+    paragraph simply yields a new key, while unchanged paragraphs are loaded without touching NLTK.
+    """
+
+    def __init__(self, path, max_size=256 * 1024 * 1024, salt='', auto_evict=True):
+        """
+        :param path: cache directory (created if necessary)
+        :param max_size: maximum size of the cache in bytes; least recently used entries are evicted first
+        :param salt: additional string mixed into all keys (e.g., plugin versions)
+        :param auto_evict: enforce the size limit after each flush (otherwise, call evict() explicitly)
+        """
+        self.path = os.path.expanduser(path)
+        self.max_size = max_size
+        self.salt = salt
+        self.auto_evict = auto_evict
+        self.pending = {}
+        self.hits = 0
+        self.misses = 0
+        self.written = 0
+        # Entries that could not be written (e.g., read-only or full disk), and the last error
+        self.failed = 0
+        self.error = None
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+
+    def key(self, body, replacements=None, flags=()):
+        digest = hashlib.sha1()
+        digest.update('{}|{}|{}|{}\n'.format(cache_format, nltk.__version__, self.salt, flags))
+        if replacements is not None:
+            for k, v in sorted(replacements.iteritems()):
+                digest.update('{}\0{}\0'.format(k, v))
+        digest.update(body.encode('utf-8') if isinstance(body, unicode) else body)
+        return digest.hexdigest()
+
+    def filename(self, key):
+        return os.path.join(self.path, key[:2], key)
+
+    def load(self, key):
+        """
+        Returns the cached entry - a list of (text, tokens) tuples for the sentences, where tokens are (word, pos_tag,
+        start, end, position) tuples (see Sentence) - or None.
+        """
+        filename = self.filename(key)
+        try:
+            with open(filename, 'rb') as f:
+                entry = pickle.load(f)
+            # Mark the entry as recently used
+            os.utime(filename, None)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def track(self, key, sentences, entry=None):
+        """
+        Registers sentences of a block to be written back by flush(), i.e., once plugins had a chance to tag them.
+        :param entry: the entry loaded from the cache (if any); unchanged entries are not re-written
+        """
+        self.pending[key] = (sentences, entry)
+
+    def discard(self):
+        """
+        Forgets blocks registered since the last flush (e.g., when the analysis failed).
+        """
+        self.pending = {}
+
+    def flush(self, evict=True):
+        """
+        Writes back the registered blocks.
+        :param evict: report the statistics and enforce the size limit (if auto_evict is set) - when flushing in parts
+                      (e.g., block by block in the streaming mode), only the last flush should evict
+        """
+        for key, (sentences, previous) in self.pending.iteritems():
+            entry = [(s.text, [(t.word, t.pos_tag, t.span[0], t.span[1], t.position) for t in s.tokens]) for s in sentences]
+            if entry != previous:
+                if self.store(key, entry):
+                    self.written += 1
+                else:
+                    self.failed += 1
+        self.pending = {}
+        if evict:
+            logging.info('Block cache: {} hits, {} misses, {} entries written'.format(self.hits, self.misses, self.written))
+            if self.failed > 0:
+                logging.warning('Block cache: {} entries could not be written ({})'.format(self.failed, self.error))
+                self.failed = 0
+            if self.written > 0 and self.auto_evict:
+                self.evict()
+            self.written = 0
+
+    def store(self, key, entry):
+        """
+        Writes an entry to the cache; entries that cannot be written are skipped.
+        :return: True if the entry was written
+        """
+        dirname = os.path.dirname(self.filename(key))
+        if not os.path.isdir(dirname):
+            try:
+                os.makedirs(dirname)
+            except OSError:
+                pass
+        # Write to a temporary file first, so that concurrent readers never see partial entries
+        tmp_filename = None
+        try:
+            fd, tmp_filename = tempfile.mkstemp(dir=dirname)
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmp_filename, self.filename(key))
+        except (IOError, OSError) as e:
+            self.error = e
+            if tmp_filename is not None:
+                try:
+                    os.remove(tmp_filename)
+                except OSError:
+                    pass
+            return False
+        return True
+
+    def evict(self):
+        entries = []
+        total_size = 0
+        for dirpath, dirnames, filenames in os.walk(self.path):
+            for filename in filenames:
+                try:
+                    stat = os.stat(os.path.join(dirpath, filename))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, os.path.join(dirpath, filename)))
+                total_size += stat.st_size
+        # Remove least recently used entries until the cache fits in the limit
+        for mtime, size, filename in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+            total_size -= size
@@ -0,0 +1,210 @@
+__author__ = 'pkorus'
+
+import os
+import re
+import heapq
+import shutil
+import logging
+import tempfile
+import itertools
+import traceback
+import multiprocessing
+from collections import defaultdict
+from swtk import pipeline
+from swtk import tagging
+
+# Tokens counted in the dictionary: lowercase words (possibly with digits, hyphens and apostrophes), e.g., cnn, jpeg2000
+word_regex = re.compile(r"^[a-z][a-z0-9\-']*$")
+
+# Maximum number of run files merged at once
+max_open_runs = 128
+
+# POS lookup tables (see tagging.HybridTagger): the reference tagger, and how often & how consistently a word must be
+# tagged to be considered unambiguous
+lookup_tagger = 'perceptron'
+lookup_min_count = 20
+lookup_agreement = 0.99
+
+
+def count_words(paper, counts):
+    """
+    Adds the numbers of occurrences of (lowercase) words of a paper to a dictionary.
+    """
+    store = paper.store
+    occurrences = defaultdict(int)
+    for word_id in store.token_words:
+        occurrences[word_id] += 1
+    for word_id, count in occurrences.iteritems():
+        word = store.words[word_id].lower()
+        if word_regex.match(word):
+            counts[word] = counts.get(word, 0) + count
+
+
+def count_tags(paper, counts):
+    """
+    Tags the sentences of a paper with the reference tagger and adds the numbers of occurrences of (word, tag) pairs to
+    a dictionary (keys are 'word tag' strings).
+    """
+    sentences = [[t.word for t in s.tokens] for s in paper.get_all_sentences()]
+    for sentence in tagging.tag_sentences(sentences, lookup_tagger):
+        for word, tag in sentence:
+            key = '{} {}'.format(word, tag)
+            counts[key] = counts.get(key, 0) + 1
+
+
+def select_unambiguous(merged, min_count=lookup_min_count, min_agreement=lookup_agreement):
+    """
+    Selects words that are (almost) always given the same tag.
+    :param merged: sequence of ('word tag', count) tuples sorted by the key (see merge_runs)
+    :return: generator of (word, tag, count) tuples
+    """
+    for word, group in itertools.groupby(merged, key=lambda x: x[0].rsplit(' ', 1)[0]):
+        tags = [(count, key.rsplit(' ', 1)[1]) for key, count in group]
+        total = sum(count for count, _ in tags)
+        count, tag = max(tags)
+        if total >= min_count and count >= min_agreement * total:
+            yield word, tag, total
+
+
+def spill(counts, directory):
+    """
+    Writes the counts to a run file (sorted by the word) and clears them.
+    :return: filename of the run
+    """
+    handle, filename = tempfile.mkstemp(dir=directory, prefix='run-', suffix='.txt')
+    with os.fdopen(handle, 'w') as f:
+        for word in sorted(counts.iterkeys()):
+            f.write('{}\t{}\n'.format(word, counts[word]))
+    counts.clear()
+    return filename
+
+
+def read_run(filename):
+    with open(filename) as f:
+        for line in f:
+            word, count = line.rstrip('\n').split('\t')
+            yield word, int(count)
+
+
+def merge_runs(filenames):
+    """
+    Merges run files into a single sequence of (word, count) tuples sorted by the word (counts of a word are summed).
+    """
+    merged = heapq.merge(*[read_run(f) for f in filenames])
+    for word, group in itertools.groupby(merged, key=lambda x: x[0]):
+        yield word, sum(count for _, count in group)
+
+
+def compact_runs(filenames, directory):
+    """
+    Merges groups of run files until at most max_open_runs remain.
+    """
+    while len(filenames) > max_open_runs:
+        output = []
+        for i in range(0, len(filenames), max_open_runs):
+            group = filenames[i:i + max_open_runs]
+            handle, filename = tempfile.mkstemp(dir=directory, prefix='run-', suffix='.txt')
+            with os.fdopen(handle, 'w') as f:
+                for word, count in merge_runs(group):
+                    f.write('{}\t{}\n'.format(word, count))
+            for name in group:
+                os.remove(name)
+            output.append(filename)
+        filenames = output
+    return filenames
+
+
+def init_worker(flags):
+    pipeline.configure(*flags)
+
+
+def process_chunk(job):
+    """
+    Counts the words of a group of documents (in a worker process). The counts are spilled to run files whenever the
+    number of distinct words exceeds the limit.
+    :param job: (list of filenames, directory for the run files, maximum number of distinct words in memory, whether
+                to count the tags) tuple
+    :return: (run filenames, tag run filenames, number of documents, number of tokens, list of (filename, error
+             message) tuples)
+    """
+    filenames, directory, max_words, with_tags = job
+    counts = {}
+    tags = {}
+    runs = []
+    tag_runs = []
+    tokens = 0
+    failures = []
+    for filename in filenames:
+        try:
+            with open(filename) as f:
+                lines = f.readlines()
+            p = pipeline.get_paper_class(filename)(lines, {})
+            count_words(p, counts)
+            if with_tags:
+                count_tags(p, tags)
+            tokens += len(p.store)
+        except Exception as e:
+            logging.debug(traceback.format_exc())
+            failures.append((filename, '{}: {}'.format(e.__class__.__name__, e)))
+        if len(counts) > max_words:
+            runs.append(spill(counts, directory))
+        if len(tags) > max_words:
+            tag_runs.append(spill(tags, directory))
+    if len(counts) > 0:
+        runs.append(spill(counts, directory))
+    if len(tags) > 0:
+        tag_runs.append(spill(tags, directory))
+    return runs, tag_runs, len(filenames), tokens, failures
+
+
+def build(inputs, output, workers, flags, size=100000, min_count=2, max_words=500000, chunk_size=50, lookup=None):
+    """
+    Builds a ranked domain dictionary from a corpus of documents. The documents are parsed & tokenized by a pool of
+    worker processes; word counts are spilled to sorted run files and merged from disk, so the memory usage is bounded
+    by max_words and size, not by the size of the corpus.
+    :param output: filename of the dictionary - a text file with one word per line followed by its count, sorted by
+                   decreasing frequency (ties in the alphabetical order); the line numbers are the ranks of the words
+    :param flags: (math, display_math, floats) tuple
+    :param size: maximum number of words in the dictionary
+    :param min_count: minimum number of occurrences of a word
+    :param max_words: maximum number of distinct words counted in memory by each worker
+    :param lookup: filename of a POS lookup table of unambiguous words (one word per line followed by its tag and
+                   count) for the hybrid tagger, or None; building the table requires tagging the whole corpus
+    :return: generator of (number of processed documents, number of tokens, list of failures) tuples - after every
+             chunk; the dictionary is saved once all documents are processed
+    """
+    directory = tempfile.mkdtemp(prefix='swtk-dictionary-')
+    try:
+        jobs = [(inputs[i:i + chunk_size], directory, max_words, lookup is not None) for i in range(0, len(inputs), chunk_size)]
+        runs = []
+        tag_runs = []
+        processed = 0
+        tokens = 0
+        if workers <= 1:
+            init_worker(flags)
+            results = (process_chunk(job) for job in jobs)
+        else:
+            pool = multiprocessing.Pool(workers, init_worker, (flags,))
+            results = pool.imap_unordered(process_chunk, jobs)
+        try:
+            for chunk_runs, chunk_tag_runs, documents, chunk_tokens, failures in results:
+                runs.extend(chunk_runs)
+                tag_runs.extend(chunk_tag_runs)
+                processed += documents
+                tokens += chunk_tokens
+                yield processed, tokens, failures
+        finally:
+            if workers > 1:
+                pool.close()
+                pool.join()
+        # Select the most frequent words (runs are sorted by the word, so ties keep the alphabetical order)
+        frequent = heapq.nlargest(size, (x for x in merge_runs(compact_runs(runs, directory)) if x[1] >= min_count), key=lambda x: x[1])
+        with open(output, 'w') as f:
+            for word, count in frequent:
+                f.write('{} {}\n'.format(word, count))
+        if lookup is not None:
+            with open(lookup, 'w') as f:
+                for word, tag, count in select_unambiguous(merge_runs(compact_runs(tag_runs, directory))):
+                    f.write('{} {} {}\n'.format(word, tag, count))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,121 @@
+__author__ = 'pkorus'
+
+import re
+import json
+from swtk import profiling
+
+# Bump whenever the structure of the exported records changes
+export_format = 2
+
+formats = {'html': '.html', 'json': '.json', 'ndjson': '.ndjson'}
+
+
+def strip_tags(text):
+    return re.sub(r'<[^>]+>', '', text) if isinstance(text, basestring) else text
+
+
+def css_name(c):
+    # Leading '_' only disables the highlight by default
+    return c.__str__().lstrip('_')
+
+
+def report_record(r):
+    details = r.details
+    if isinstance(details, list):
+        details = [strip_tags(d) for d in details]
+    return {'type': 'report', 'label': r.label, 'summary': getattr(r, 'summary', None), 'details': details,
+            'classes': [css_name(c) for c in getattr(r, 'css_classes', [])]}
+
+
+def source_location(p, s):
+    for i in xrange(s.end - s.start):
+        position = s.get_position(i)
+        if position >= 0:
+            return p.locate(position)
+    return None
+
+
+def sentence_records(p):
+    """
+    Generates records of the annotated sentences. Positions are token indices in the document (tokens of all sentences
+    in the document order); spans are [start, end) ranges of consecutive tokens with the same annotation. Sentences
+    with known source positions have the line and column (of their first token) in the input document.
+    """
+    store = p.store
+    position = 0
+    for index, s in enumerate(p.get_all_sentences()):
+        offset = position - s.start
+        position += s.end - s.start
+        spans = {}
+        alternatives = []
+        for i in xrange(s.start, s.end):
+            for c in store.reports.get(i, []):
+                ranges = spans.setdefault(css_name(c), [])
+                if len(ranges) > 0 and ranges[-1][1] == i + offset:
+                    ranges[-1][1] += 1
+                elif len(ranges) == 0 or ranges[-1][1] < i + offset:
+                    ranges.append([i + offset, i + offset + 1])
+            for a in store.alternatives.get(i, []):
+                if len(alternatives) > 0 and alternatives[-1][1] == i + offset and alternatives[-1][2] == a:
+                    alternatives[-1][1] += 1
+                else:
+                    alternatives.append([i + offset, i + offset + 1, a])
+        if len(s.reports) > 0 or len(spans) > 0:
+            record = {'type': 'sentence', 'index': index, 'span': [s.start + offset, s.end + offset], 'text': s.__str__(),
+                      'classes': [css_name(c) for c in s.reports], 'tokens': spans}
+            if len(alternatives) > 0:
+                record['alternatives'] = alternatives
+            location = source_location(p, s)
+            if location is not None:
+                record['line'], record['column'] = location
+            yield record
+
+
+def iter_records(p):
+    """
+    Generates the structured export of an analyzed paper: a header with the meta data, the stats, one record per
+    report and one record per annotated sentence.
+    """
+    yield {'type': 'header', 'format': export_format, 'meta': p.meta}
+    yield {'type': 'stats', 'stats': dict(p.stats)}
+    for r in p.reports:
+        yield report_record(r)
+    for record in sentence_records(p):
+        yield record
+
+
+def iter_ndjson(p):
+    """
+    Generates the export as newline-delimited JSON (one record per line).
+    """
+    for record in iter_records(p):
+        yield json.dumps(record, sort_keys=True) + '\n'
+
+
+def iter_json(p):
+    """
+    Generates the export as a single JSON document: {"meta", "stats", "reports", "sentences"}.
+    """
+    counts = {'report': 0, 'sentence': 0}
+    for record in iter_records(p):
+        if record['type'] == 'header':
+            header = record
+        elif record['type'] == 'stats':
+            yield '{{"format": {}, "meta": {}, "stats": {}, "reports": ['.format(header['format'], json.dumps(header['meta'], sort_keys=True), json.dumps(record['stats'], sort_keys=True))
+        else:
+            if record['type'] == 'sentence' and counts['sentence'] == 0:
+                yield '], "sentences": ['
+            yield (', ' if counts[record['type']] > 0 else '') + json.dumps(record, sort_keys=True)
+            counts[record['type']] += 1
+    if counts['sentence'] == 0:
+        yield '], "sentences": ['
+    yield ']}\n'
+
+
+def write_export(p, sink, output_format):
+    """
+    Writes the export (json or ndjson) of an analyzed paper to a file-like object.
+    """
+    with profiling.measure('export'):
+        for chunk in (iter_ndjson(p) if output_format == 'ndjson' else iter_json(p)):
+            sink.write(chunk)
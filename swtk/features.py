@@ -0,0 +1,40 @@
+__author__ = 'pkorus'
+
+import re
+from swtk.lexicon import get_lexicon
+
+number_regex = re.compile(r'^[0-9\.,]+$')
+word_regex = re.compile(r'^\w+$')
+vowel_groups = re.compile(r'[aeiouy]+')
+
+
+def count_syllables(word):
+    """
+    Estimates the number of syllables of a (lowercase) word from its groups of vowels.
+    """
+    if '-' in word:
+        return sum(count_syllables(part) for part in word.split('-') if len(part) > 0)
+    count = len(vowel_groups.findall(word))
+    # Silent endings: make, named (but not table, wanted, needed)
+    if count > 1 and word.endswith('e') and not word.endswith('le') and not word.endswith('ee'):
+        count -= 1
+    elif count > 1 and word.endswith('ed') and not word.endswith('ted') and not word.endswith('ded'):
+        count -= 1
+    return max(count, 1)
+
+
+class WordFeatures(object):
+    """
+    Features of a word type shared by all its occurrences (see TokenStore.get_features): the lowercase form, character
+    classes, lexicon categories (of the lowercase form) and the number of syllables.
+    """
+
+    __slots__ = ('lower', 'is_number', 'is_word', 'categories', 'syllables')
+
+    def __init__(self, word):
+        self.lower = word.lower()
+        # Numbers (e.g., 1,000.5) and plain words (letters, digits and _)
+        self.is_number = number_regex.match(word) is not None
+        self.is_word = word_regex.match(word) is not None
+        self.categories = get_lexicon().get(self.lower)[0]
+        self.syllables = count_syllables(self.lower) if self.lower[:1].isalpha() else 0
@@ -0,0 +1,239 @@
+__author__ = 'pkorus'
+
+import os
+import mmap
+import json
+import struct
+import bisect
+import logging
+import tempfile
+import cPickle as pickle
+from swtk.processors import resource_cache
+
+# Bump whenever the binary layout changes (stale lexicons are rebuilt automatically)
+lexicon_format = 1
+magic = 'SWLX'
+
+# Word categories (bit flags)
+FREQUENT = 1
+WEAK_VERB = 2
+FILTER_WORD = 4
+AUXILIARY = 8
+
+categories = {'frequent': FREQUENT, 'weak_verb': WEAK_VERB, 'filter_word': FILTER_WORD, 'auxiliary': AUXILIARY}
+
+weak_verbs = ['am', 'is', 'are', 'do', 'does', 'did', 'didn\'t', 'isn\'t', 'don\'t', 'doesn\'t', 'have', 'has', 'been', 'were', 'weren\'t', 'had']
+auxiliaries = ['is', 'are', 'were', 'was', 'been', 'be']
+
+default_lexicon = './data/lexicon.bin'
+default_sources = {'frequent': './data/frequent_words.pickle', 'filter_words': './data/filter_words.json'}
+
+header = struct.Struct('<4sII')
+# String offset, string length, category bits, frequency rank (0 if unknown)
+record = struct.Struct('<IHHI')
+
+
+def encode(word):
+    return word.encode('utf-8') if isinstance(word, unicode) else word
+
+
+class Lexicon:
+    """
+    Read-only lexicon in a compact binary format: a header, fixed-size records sorted by the (UTF-8) word and a blob
+    of the words. Lookups use binary search directly over the (memory-mapped) data, so opening even a large reference
+    vocabulary is instantaneous; results of repeated lookups are memoized.
+    """
+
+    def __init__(self, data):
+        """
+        :param data: content of a compiled lexicon - an mmap object or a string
+        """
+        self.data = data
+        if len(data) < header.size:
+            raise ValueError('Invalid lexicon (truncated header)')
+        signature, version, self.count = header.unpack_from(data, 0)
+        if signature != magic or version != lexicon_format:
+            raise ValueError('Invalid lexicon (format {} expected)'.format(lexicon_format))
+        self.strings = header.size + self.count * record.size
+        self.keys = LexiconKeys(self)
+        self.memo = {}
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, word):
+        return self.get(word)[0] != 0
+
+    def word(self, index):
+        offset, length, _, _ = record.unpack_from(self.data, header.size + index * record.size)
+        return self.data[self.strings + offset:self.strings + offset + length]
+
+    def find(self, word):
+        """
+        Returns the index of a word in the lexicon, or -1.
+        """
+        word = encode(word)
+        index = bisect.bisect_left(self.keys, word)
+        if index < self.count and self.word(index) == word:
+            return index
+        return -1
+
+    def get(self, word):
+        """
+        Returns (category bits, frequency rank) of a word; (0, 0) for unknown words.
+        """
+        entry = self.memo.get(word)
+        if entry is None:
+            index = self.find(word)
+            if index < 0:
+                entry = (0, 0)
+            else:
+                entry = record.unpack_from(self.data, header.size + index * record.size)[2:]
+            self.memo[word] = entry
+        return entry
+
+    def has(self, word, category):
+        return self.get(word)[0] & category != 0
+
+    def rank(self, word):
+        return self.get(word)[1]
+
+    def words(self, category=None):
+        """
+        Iterates over the words (in the binary sort order), optionally only those of a given category.
+        """
+        for index in xrange(self.count):
+            fields = record.unpack_from(self.data, header.size + index * record.size)
+            if category is None or fields[2] & category:
+                yield self.data[self.strings + fields[0]:self.strings + fields[0] + fields[1]]
+
+
+class LexiconKeys:
+    """
+    Sequence view of the sorted words of a lexicon (for bisect).
+    """
+
+    def __init__(self, lexicon):
+        self.lexicon = lexicon
+
+    def __len__(self):
+        return self.lexicon.count
+
+    def __getitem__(self, index):
+        return self.lexicon.word(index)
+
+
+def compile_lexicon(entries):
+    """
+    Serializes lexicon entries into the binary format.
+    :param entries: dictionary word -> (category bits, rank)
+    :return: string with the compiled lexicon
+    """
+    words = sorted([encode(w) for w in entries.keys()])
+    encoded = dict((encode(w), v) for w, v in entries.iteritems())
+    records = []
+    offset = 0
+    for word in words:
+        records.append(record.pack(offset, len(word), *encoded[word]))
+        offset += len(word)
+    return ''.join([header.pack(magic, lexicon_format, len(words))] + records + words)
+
+
+def collect_entries(frequent=None, filter_words=None, vocabulary=None, frequent_rank=0):
+    """
+    Collects lexicon entries from the word lists used by the plugins.
+    :param frequent: list of frequent words (pickle) - they are not reported as rare words
+    :param filter_words: filter words dictionary (JSON with a 'words' list)
+    :param vocabulary: reference vocabulary (text file, one word per line - optionally followed by its count - sorted
+                       by frequency); line numbers become the frequency ranks
+    :param frequent_rank: words of the reference vocabulary up to this rank are considered frequent
+    :return: dictionary word -> (category bits, rank)
+    """
+    entries = {}
+
+    def add(word, category, rank=0):
+        word = word.lower()
+        flags, previous = entries.get(word, (0, 0))
+        entries[word] = (flags | category, previous if previous > 0 else rank)
+
+    if vocabulary is not None:
+        with open(vocabulary) as f:
+            rank = 0
+            for line in f:
+                fields = line.split()
+                if len(fields) > 0:
+                    rank += 1
+                    add(fields[0], FREQUENT if rank <= frequent_rank else 0, rank)
+    if frequent is not None:
+        with open(frequent) as f:
+            for word in pickle.load(f):
+                add(word, FREQUENT)
+    if filter_words is not None:
+        with open(filter_words) as f:
+            for word in json.loads(f.read().decode())['words']:
+                add(word, FILTER_WORD)
+    for word in weak_verbs:
+        add(word, WEAK_VERB)
+    for word in auxiliaries:
+        add(word, AUXILIARY)
+    return entries
+
+
+def save_lexicon(data, filename):
+    # Write atomically, so that concurrent readers never see a partial file
+    dirname = os.path.dirname(os.path.abspath(filename))
+    handle, temp_filename = tempfile.mkstemp(dir=dirname, prefix='.lexicon-')
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(data)
+        os.chmod(temp_filename, 0644)
+        os.rename(temp_filename, filename)
+    except:
+        os.remove(temp_filename)
+        raise
+
+
+def open_lexicon(filename):
+    with open(filename, 'rb') as f:
+        return Lexicon(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def is_stale(filename, sources):
+    if not os.path.exists(filename):
+        return True
+    modified = os.path.getmtime(filename)
+    return any(os.path.exists(s) and os.path.getmtime(s) > modified for s in sources.values() + [__file__.replace('.pyc', '.py')])
+
+
+def get_lexicon(filename=default_lexicon, sources=None):
+    """
+    Returns the shared (once per process) lexicon. The compiled lexicon is built from the bundled word lists if it
+    does not exist, or if it is older than its sources; if it cannot be saved, it is kept in memory.
+    """
+    if filename in resource_cache:
+        return resource_cache[filename]
+    sources = sources if sources is not None else default_sources
+    lexicon = None
+    if not is_stale(filename, sources):
+        try:
+            lexicon = open_lexicon(filename)
+        except (IOError, ValueError) as e:
+            logging.warning('Rebuilding lexicon {} ({})'.format(filename, e))
+    if lexicon is None:
+        data = compile_lexicon(collect_entries(**sources))
+        try:
+            save_lexicon(data, filename)
+            lexicon = open_lexicon(filename)
+        except (IOError, OSError) as e:
+            logging.warning('Cannot save lexicon {} ({}) - using an in-memory copy'.format(filename, e))
+            lexicon = Lexicon(data)
+    resource_cache[filename] = lexicon
+    return lexicon
+
+
+def get_domain_lexicon(vocabulary):
+    """
+    Returns the shared lexicon of a ranked vocabulary (e.g., a domain dictionary built by swtk-dictionary.py). The
+    compiled lexicon is kept next to the vocabulary (.bin) and rebuilt whenever the vocabulary changes.
+    """
+    return get_lexicon(os.path.splitext(vocabulary)[0] + '.bin', {'vocabulary': vocabulary})
@@ -0,0 +1,180 @@
+__author__ = 'pkorus'
+
+from array import array
+from swtk.processors import Plugin, Report, CSS, options
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def document_ids(paper):
+    """
+    Maps the tokens of a paper to integer ids of their lowercase forms (shared by all n-gram plugins).
+    :return: (types, ids, sentences) tuple - a list of lowercase words (indexed by id), the ids of all tokens in the
+             document order, and a list of (sentence, start, end) tuples with the positions of sentences in the ids
+    """
+    def compute():
+        sentences = []
+        position = 0
+        for s in paper.get_all_sentences():
+            sentences.append((s, position, position + s.end - s.start))
+            position += s.end - s.start
+        if np is not None:
+            mapping = np.array(paper.get_type_table()[1], dtype=np.int64)
+            token_words = np.frombuffer(paper.store.token_words, dtype=np.intc)
+            ids = np.concatenate([mapping[token_words[s.start:s.end]] for s, _, _ in sentences] + [np.zeros(0, dtype=np.int64)])
+        else:
+            ids = paper.get_lowercase_ids()
+        return paper.get_type_table()[0], ids, sentences
+    return paper.memoized('ngrams.ids', compute)
+
+
+def count_ngrams(ids, n, valid, min_frequency):
+    """
+    Counts n-grams in a sequence of ids (vectorized, if NumPy is available).
+    :param ids: sequence of token ids
+    :param n: length of the n-grams
+    :param valid: list of flags (indexed by id) - only n-grams composed of valid ids are counted
+    :param min_frequency: minimum number of occurrences
+    :return: list of (n-gram, count) tuples, where n-grams are tuples of ids; sorted by decreasing counts, then by
+             the first occurrence in the sequence
+    """
+    if len(ids) < n:
+        return []
+
+    if np is None:
+        counts = {}
+        first = {}
+        for i in xrange(len(ids) - n + 1):
+            ngram = tuple(ids[i:i+n])
+            if all(valid[x] for x in ngram):
+                if ngram not in counts:
+                    counts[ngram] = 0
+                    first[ngram] = i
+                counts[ngram] += 1
+        frequent = [(k, v) for k, v in counts.iteritems() if v >= min_frequency]
+        return sorted(frequent, key=lambda x: (-x[1], first[x[0]]))
+
+    length = len(ids) - n + 1
+    windows = np.column_stack([ids[k:k+length] for k in range(n)])
+    mask = np.array(valid, dtype=bool)[windows].all(axis=1)
+    positions = np.nonzero(mask)[0]
+    windows = windows[mask]
+    if len(windows) == 0:
+        return []
+    base = int(windows.max()) + 1
+    if base ** n < 2 ** 63:
+        # Pack the n-grams into single integers - much faster than finding unique rows
+        keys = np.zeros(len(windows), dtype=np.int64)
+        for k in range(n):
+            keys = keys * base + windows[:, k]
+        _, index, counts = np.unique(keys, return_index=True, return_counts=True)
+    else:
+        _, index, counts = np.unique(windows, axis=0, return_index=True, return_counts=True)
+    selected = counts >= min_frequency
+    index, counts = index[selected], counts[selected]
+    order = np.lexsort((positions[index], -counts))
+    return [(tuple(windows[index[i]].tolist()), int(counts[i])) for i in order]
+
+
+class NGramProcessor(Plugin):
+    """
+    Finds frequently occurring sequences of n words (n-grams) and highlights them in the text. Subclasses define the
+    length of the n-grams and the default thresholds; the thresholds can be overridden per n in the options
+    (ngram_thresholds: n -> (min_frequency, min_chars) dictionary).
+    """
+    abstract = True
+    run_priority = 101
+    n = 2
+    # Minimum number of occurrences & minimum length of each word of an n-gram
+    min_frequency = 5
+    min_chars = 4
+    # Name used in CSS classes and report titles (e.g., 'bigram') and a format of the highlight colors
+    name = 'ngram'
+    color_format = '{0:02x}{1:02x}{1:02x}'
+    # What the n-grams are called in the help (e.g., 'pairs of words')
+    description = 'sequences of words'
+
+    def __init__(self):
+        self.min_frequency, self.min_chars = options.get('ngram_thresholds', {}).get(self.n, (self.min_frequency, self.min_chars))
+        self.help = 'Frequently occurring (at least {} times) {}.'.format(self.min_frequency, self.description)
+        # Streaming mode: lowercase words (types) & their ids, ids of all tokens, and the highlights of the n-grams
+        self.types = []
+        self.type_ids = {}
+        self.ids = array('i')
+        self.patterns = {}
+
+    def process_text(self, paper):
+        types, ids, sentences = document_ids(paper)
+        patterns = self.select(paper, types, ids)
+        # Highlight n-grams in the text
+        if len(patterns) > 0:
+            ids = paper.get_lowercase_ids()
+            for s, start, end in sentences:
+                self.highlight(s.tokens, ids[start:end], patterns)
+
+    def process_block(self, paper, block):
+        # Streaming mode: the block is the only content of the paper - map its types to the ids of the whole document
+        types, ids, sentences = document_ids(paper)
+        mapping = []
+        for t in types:
+            if t not in self.type_ids:
+                self.type_ids[t] = len(self.types)
+                self.types.append(t)
+            mapping.append(self.type_ids[t])
+        self.ids.extend([mapping[i] for i in (ids.tolist() if np is not None else ids)])
+
+    def finish_stream(self, paper):
+        ids = np.frombuffer(self.ids, dtype=np.intc).astype(np.int64) if np is not None and len(self.ids) > 0 else self.ids
+        self.patterns = self.select(paper, self.types, ids)
+
+    def highlight_block(self, paper, block):
+        # Streaming mode
+        if len(self.patterns) > 0:
+            for s in block.get_sentences():
+                self.highlight(s.tokens, [self.type_ids[t.word.lower()] for t in s.tokens], self.patterns)
+
+    def highlight(self, tokens, ids, patterns):
+        """
+        Highlights the n-grams of a sentence.
+        :param ids: type ids of the tokens of the sentence
+        :param patterns: dictionary: n-gram (tuple of ids) -> CSS class
+        """
+        for i in xrange(len(ids) - self.n + 1):
+            current_class = patterns.get(tuple(ids[i:i+self.n]))
+            if current_class is not None:
+                for k in range(self.n):
+                    tokens[i + k].reports.append(current_class)
+
+    def select(self, paper, types, ids):
+        """
+        Counts the n-grams of the document and adds the report.
+        :return: dictionary: frequent n-gram (tuple of ids) -> CSS class of its highlight
+        """
+        # Count n-grams of lowercase words (that meet the requirements for minimum length)
+        valid = [len(t) >= self.min_chars for t in types]
+        counts = count_ngrams(ids, self.n, valid, self.min_frequency)
+        distribution = [(tuple(types[x] for x in ngram), freq) for ngram, freq in counts]
+
+        # Generate unique CSS classes for successive n-grams
+        css_mapping = {}
+        color_index = 192
+        for ngram_id, (pattern, freq) in enumerate(distribution):
+            css_mapping[' '.join(pattern)] = CSS('{}_{}'.format(self.name, ngram_id + 1), self.color_format.format(int(color_index*0.65), color_index))
+            color_index = min(color_index + 2, 255)
+
+        # Generate report
+        if len(distribution) > 0:
+            details = [('{} : {}'.format(' '.join(k), v), css_mapping[' '.join(k)].name) for (k,v) in distribution]
+            summary = '{} popular {}s: {}, ...'.format(len(distribution), self.name, ' '.join(distribution[0][0]))
+        else:
+            details = None
+            summary = 'No frequent {}s'.format(self.name)
+
+        report = Report('{}s'.format(self.name.capitalize()), Plugin.toggle_button_generator(details), self.help, summary)
+        report.css_classes = css_mapping.values()
+        paper.reports.append(report)
+        # Prepend '_' do disable the highlight by default
+        return dict((ngram, '_' + css_mapping[' '.join(pattern)].name) for (ngram, _), (pattern, _) in zip(counts, distribution))
@@ -0,0 +1,205 @@
+__author__ = 'pkorus'
+
+import re
+import bisect
+from array import array
+
+
+class SourceText(str):
+    """
+    A string that remembers where its characters come from: offsets[i] is the position of the i-th character in the
+    source (e.g., the input file). Slicing, stripping and the helper functions below (join, split, substitute) keep
+    the offsets; other string operations return plain strings.
+    """
+
+    def __new__(cls, text, offsets):
+        obj = str.__new__(cls, text)
+        obj.offsets = offsets
+        return obj
+
+    @staticmethod
+    def identity(text, start=0):
+        """
+        Creates a source text whose offsets are positions in the text itself (shifted by start).
+        """
+        return SourceText(text, array('i', xrange(start, start + len(text))))
+
+    def __getnewargs__(self):
+        # Needed for pickling (e.g., blocks moved to the spool in the streaming mode)
+        return str(self), self.offsets
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return SourceText(str.__getitem__(self, key), self.offsets[key])
+        return str.__getitem__(self, key)
+
+    def __getslice__(self, i, j):
+        return self.__getitem__(slice(i, j))
+
+    def strip(self, chars=None):
+        start = len(self) - len(str.lstrip(self, chars))
+        return self[start:start + len(str.strip(self, chars))]
+
+    def lstrip(self, chars=None):
+        return self[len(self) - len(str.lstrip(self, chars)):]
+
+    def rstrip(self, chars=None):
+        return self[:len(str.rstrip(self, chars))]
+
+    def replace(self, old, new, count=-1):
+        if len(old) == len(new) and len(old) > 0:
+            return SourceText(str.replace(self, old, new, count), self.offsets)
+        return substitute(re.escape(old), new.replace('\\', '\\\\'), self, count if count > 0 else 0)
+
+    def offset(self, index):
+        """
+        Returns the source offset of a character (the end of the text maps just after its last character).
+        """
+        if index < len(self):
+            return self.offsets[index]
+        return self.offsets[-1] + 1 if len(self) > 0 else -1
+
+
+def join(separator, parts):
+    """
+    Joins (source) texts. Separators and plain strings inherit the offset of the end of the preceding text.
+    """
+    if not any(isinstance(p, SourceText) for p in parts):
+        return separator.join(parts)
+    offsets = array('i')
+    anchor = -1
+    for i, p in enumerate(parts):
+        if i > 0:
+            offsets.extend([anchor] * len(separator))
+        if isinstance(p, SourceText):
+            offsets.extend(p.offsets)
+            anchor = p.offset(len(p)) if len(p) > 0 else anchor
+        else:
+            offsets.extend([anchor] * len(p))
+    return SourceText(separator.join(parts), offsets)
+
+
+def split(pattern, text):
+    """
+    Splits a (source) text by a regular expression (without groups), like re.split.
+    """
+    if not isinstance(text, SourceText):
+        return re.split(pattern, text)
+    output = []
+    position = 0
+    for match in re.finditer(pattern, text):
+        output.append(text[position:match.start()])
+        position = match.end()
+    output.append(text[position:])
+    return output
+
+
+template_group = re.compile(r'\\(\d+)')
+
+
+def substitute(pattern, replacement, text, count=0):
+    """
+    Replaces matches of a regular expression in a (source) text, like re.sub. Characters of the replacement inherit
+    the offset of the match, except for group references (e.g., \\1) which keep the offsets of the group.
+    """
+    if not isinstance(text, SourceText):
+        return re.sub(pattern, replacement, text, count)
+    regex = re.compile(pattern) if isinstance(pattern, basestring) else pattern
+    if regex.search(text) is None:
+        return text
+    # Templates with escape sequences other than group references are expanded as a whole
+    literal = '\\' not in template_group.sub('', replacement)
+    parts = []
+    offsets = array('i')
+    position = 0
+    for i, match in enumerate(regex.finditer(text)):
+        if count > 0 and i >= count:
+            break
+        parts.append(str.__getitem__(text, slice(position, match.start())))
+        offsets.extend(text.offsets[position:match.start()])
+        anchor = text.offset(match.start())
+        if literal:
+            for k, segment in enumerate(template_group.split(replacement)):
+                if k % 2 == 0:
+                    parts.append(segment)
+                    offsets.extend([anchor] * len(segment))
+                else:
+                    group = match.group(int(segment)) or ''
+                    parts.append(group)
+                    offsets.extend(text.offsets[match.start(int(segment)):match.start(int(segment)) + len(group)])
+        else:
+            expanded = match.expand(replacement)
+            parts.append(expanded)
+            offsets.extend([anchor] * len(expanded))
+        position = match.end()
+    parts.append(str.__getitem__(text, slice(position, len(text))))
+    offsets.extend(text.offsets[position:])
+    return SourceText(''.join(parts), offsets)
+
+
+def align_tokens(tokens, text):
+    """
+    Finds the spans of tokens in the text they were extracted from. Tokens altered by the tokenizer (e.g., quotes
+    converted to `` and '') and merged tokens (e.g., math expressions joined with spaces) are matched approximately.
+    :return: list of (start, end) tuples; (-1, -1) for tokens that could not be found
+    """
+    spans = []
+    position = 0
+    for token in tokens:
+        start = len(text) - len(text[position:].lstrip()) if position < len(text) else position
+        if text.startswith(token, start):
+            end = start + len(token)
+        elif token in ('``', "''") and text.startswith('"', start):
+            end = start + 1
+        else:
+            # Match the parts of the token, allowing for removed or added white space
+            end = start
+            for part in token.split():
+                index = text.find(part, end)
+                if index < 0 or (end > start and len(text[end:index].strip()) > 0):
+                    end = -1
+                    break
+                end = index + len(part)
+            if end <= start:
+                spans.append((-1, -1))
+                continue
+        spans.append((start, end))
+        position = end
+    return spans
+
+
+class LineIndex:
+    """
+    Maps source offsets to line and column numbers (both starting from 1).
+    """
+
+    def __init__(self, lines):
+        self.starts = []
+        position = 0
+        for line in lines:
+            self.starts.append(position)
+            position += len(line)
+
+    def track(self, lines):
+        """
+        Generates the lines as source texts (offsets in the whole document); unicode lines are passed unchanged.
+        """
+        for start, line in zip(self.starts, lines):
+            yield SourceText.identity(line, start) if isinstance(line, str) else line
+
+    def follow(self, lines):
+        """
+        Like track(), but indexes the lines as they are generated (e.g., read lazily from a file).
+        """
+        self.starts = array('l')
+        position = 0
+        for line in lines:
+            self.starts.append(position)
+            yield SourceText.identity(line, position) if isinstance(line, str) else line
+            position += len(line)
+
+    def locate(self, offset):
+        if offset < 0 or len(self.starts) == 0:
+            return None
+        line = bisect.bisect_right(self.starts, offset) - 1
+        return line + 1, offset - self.starts[line] + 1
@@ -2,7 +2,12 @@
 __author__ = 'pkorus'
 
 import re, nltk.data, os, logging
+from array import array
 from collections import defaultdict
+from swtk import offsets
+from swtk import profiling
+from swtk.offsets import SourceText, LineIndex
+from swtk.store import TokenStore
 
 # Read data for the sentence tokenizer
 sent_detector = nltk.data.load('tokenizers/punkt/english.pickle')
@@ -13,6 +18,12 @@ math = False
 display_math = False
 # Parse floats
 display_floats = False
+# Optional block cache (see swtk.cache.BlockCache)
+cache = None
+# Store for the tokens of newly created sentences (replaced by each Paper while parsing)
+token_store = TokenStore()
+# Content of resource files embedded in the HTML output
+data_cache = {}
 
 
 def word_splitter(text):
@@ -34,20 +45,39 @@ def word_splitter(text):
 
 
 def sentence_splitter(text, custom_replacements):
-    return [Sentence(s, custom_replacements) for s in sent_detector.tokenize(text.strip())]
+    # Token positions are kept relative to the block (so that cached blocks do not depend on their location in the
+    # document) and mapped to the source through the offsets of the block
+    origin = text if isinstance(text, SourceText) else None
+    local = SourceText.identity(text) if isinstance(text, str) else text
+    if cache is None:
+        return [Sentence(s, custom_replacements, origin=origin) for s in sent_detector.tokenize(local.strip())]
+    # Re-use sentences and tokens of unchanged blocks from the cache
+    key = cache.key(text, custom_replacements, (math, display_math, display_floats))
+    entry = cache.load(key)
+    if entry is not None:
+        sentences = [Sentence(None, tagged=tokens, text=sentence_text, origin=origin) for sentence_text, tokens in entry]
+    else:
+        sentences = [Sentence(s, custom_replacements, origin=origin) for s in sent_detector.tokenize(local.strip())]
+    cache.track(key, sentences, entry)
+    return sentences
 
 
 def read_data(filename):
-    with open(filename) as f:
-        return f.read()
+    # Resources (e.g., CSS & JS) are read once per process
+    if filename not in data_cache:
+        with open(filename) as f:
+            data_cache[filename] = f.read()
+    return data_cache[filename]
 
 
 def parse_tex_command(line, strip_inside=True):
     logging.info('Parsing command {:.50}'.format(line))
     braces = []
     content = []
+    # Positions of the extracted characters in the line
+    sources = []
     isCommand = False
-    for c in line:
+    for i, c in enumerate(line):
 
         if c == '{':
             braces.append('{')
@@ -74,8 +104,13 @@ def parse_tex_command(line, strip_inside=True):
             if c == '~': c = ' '
             if len(content) == 0 or not (c == ' ' and content[-1] == ' '):
                 content.append(c)
+                sources.append(i)
 
-    while len(content) > 0 and (content[-1] == ' ' or content[-1] == ','): content.pop()
+    while len(content) > 0 and (content[-1] == ' ' or content[-1] == ','):
+        content.pop()
+        sources.pop()
+    if isinstance(line, SourceText):
+        return SourceText(''.join(content), array('i', [line.offsets[i] for i in sources]))
     return ''.join(content)
 
 
@@ -113,57 +148,189 @@ def parse_latex_environment(body):
     return body[start_index+len(b_pattern):end_index]
 
 
-class Token:
+class Token(object):
+    """
+    A view of a single token in a TokenStore.
+    """
 
-    def __init__(self, word):
-        self.word = word
-        self.reports = []
-        self.alternatives = []
-        self.pos_tag = ''
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def word(self):
+        return self.store.words[self.store.token_words[self.index]]
+
+    @property
+    def pos_tag(self):
+        return self.store.tags[self.store.token_tags[self.index]]
+
+    @pos_tag.setter
+    def pos_tag(self, tag):
+        self.store.set_tag(self.index, tag)
+
+    @property
+    def features(self):
+        # Features of the word (shared by all tokens of the same word)
+        return self.store.get_features(self.store.token_words[self.index])
+
+    @property
+    def span(self):
+        # (start, end) of the token in the text of its sentence
+        return self.store.token_starts[self.index], self.store.token_ends[self.index]
+
+    @property
+    def position(self):
+        # Offset in the sentence's source (see Sentence.get_position)
+        return self.store.token_positions[self.index]
+
+    @property
+    def reports(self):
+        return self.store.reports.setdefault(self.index, [])
+
+    @property
+    def alternatives(self):
+        return self.store.alternatives.setdefault(self.index, [])
 
     def __str__(self):
         return self.word
 
-    def to_html(self):
-        if len(self.reports) == 0:
-            if math and self.word.startswith('$'):
-                return r'\({}\)'.format(self.word[1:-1])
+    def to_html(self, text=None):
+        """
+        :param text: the fragment of the sentence text covered by the token (rendered instead of the word, if given)
+        """
+        word = text if text is not None else self.word
+        # Access the sparse annotations directly to avoid creating empty lists for all tokens
+        reports = self.store.reports.get(self.index)
+        if not reports:
+            if math and word.startswith('$'):
+                return r'\({}\)'.format(word[1:-1])
             else:
-                return self.word
+                return word
         else:
-            alt_html = ' data-alt="{}"'.format(', '.join(self.alternatives)) if len(self.alternatives) > 0 else ''
-            return '<span class="{}"{}>{}</span>'.format(' '.join(self.reports), alt_html, self.word)
+            alternatives = self.store.alternatives.get(self.index)
+            alt_html = ' data-alt="{}"'.format(', '.join(alternatives)) if alternatives else ''
+            return '<span class="{}"{}>{}</span>'.format(' '.join(reports), alt_html, word)
+
+
+class TokenSequence(object):
+    """
+    A read-only list of token views for a range of tokens in a TokenStore.
+    """
+
+    __slots__ = ('store', 'start', 'end')
+
+    def __init__(self, store, start, end):
+        self.store = store
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Token(self.store, self.start + i) for i in xrange(*index.indices(self.end - self.start))]
+        if index < 0:
+            index += self.end - self.start
+        if index < 0 or index >= self.end - self.start:
+            raise IndexError('token index out of range')
+        return Token(self.store, self.start + index)
 
+    def __iter__(self):
+        for i in xrange(self.start, self.end):
+            yield Token(self.store, i)
 
-class Sentence:
+    def features(self):
+        """
+        Returns the features of the words of all tokens (see TokenStore.get_features).
+        """
+        get_features = self.store.get_features
+        return [get_features(w) for w in self.store.token_words[self.start:self.end]]
 
+
+class Sentence(object):
+
+    __slots__ = ('store', 'start', 'end', 'reports', 'text', 'origin')
+
+    # Used for rendering sentences without the text (e.g., with tokens supplied directly)
     tokenization_fix = {' .': '.', ' ,': ',', ' ?': '?',' :': ':', ' ;': ';',
                         '[ ': '[', ' ]': ']', '( ': '(', ' )': ')', ' \'s ': '\'s '}
 
-    def __init__(self, raw, custom_replacements = None):
-        self.raw = raw
+    def __init__(self, raw, custom_replacements = None, tagged=None, text=None, origin=None):
+        """
+        :param raw: sentence (a SourceText to track the positions of the tokens in the source)
+        :param custom_replacements: dictionary of regular expressions and their replacements
+        :param tagged: tokens supplied directly (e.g., when loaded from the cache) - (word, tag) tuples, or
+                       (word, tag, start, end, position) tuples with the spans of the tokens in the text
+        :param text: text of the sentence (for tagged tokens)
+        :param origin: SourceText of the block the sentence comes from; positions of the tokens are then relative to it
+        """
+        self.reports = []
+        self.store = token_store
+        self.origin = origin
+        if tagged is not None:
+            self.text = text
+            if text is not None:
+                self.start, self.end = self.store.add_sentence([t[0] for t in tagged], [t[1] for t in tagged], [(t[2], t[3]) for t in tagged], [t[4] for t in tagged])
+            else:
+                self.start, self.end = self.store.add_sentence([t[0] for t in tagged], [t[1] for t in tagged])
+            return
         # General replacements
-        raw = re.sub(r' +', ' ', raw)
+        raw = offsets.substitute(r' +', ' ', raw)
         # Custom replacements (for handling various text formats)
         if custom_replacements is not None:
             for k, v in custom_replacements.iteritems():
-                raw = re.sub(k, v, raw)
-        # When done, tokenize
-        self.reports = []
-        self.tokens = [Token(t) for t in word_splitter(raw.replace('~', ' '))]
+                raw = offsets.substitute(k, v, raw)
+        raw = raw.replace('~', ' ')
+        # When done, tokenize and find the tokens in the text
+        self.text = str(raw) if isinstance(raw, str) else raw
+        words = word_splitter(self.text)
+        spans = offsets.align_tokens(words, self.text)
+        positions = [raw.offset(b) if b >= 0 else -1 for (b, e) in spans] if isinstance(raw, SourceText) else None
+        self.start, self.end = self.store.add_sentence(words, spans=spans, positions=positions)
+
+    @property
+    def tokens(self):
+        return TokenSequence(self.store, self.start, self.end)
+
+    def get_position(self, index):
+        """
+        Returns the offset of a token (index in the sentence) in the source document, or -1 if unknown.
+        """
+        position = self.store.token_positions[self.start + index]
+        if position < 0 or self.origin is None:
+            return position
+        return self.origin.offset(position)
 
     def __str__(self):
-        return ' '.join([t.__str__() for t in self.tokens])
+        words, token_words = self.store.words, self.store.token_words
+        return ' '.join([words[token_words[i]] for i in xrange(self.start, self.end)])
 
     def to_html(self):
-        candidate = ' '.join([t.to_html() for t in self.tokens])
-        # Fix problems with tokenization of punctuation marks
-        for (k,v) in self.tokenization_fix.iteritems(): candidate = candidate.replace(k, v)
-        return candidate
+        starts, ends = self.store.token_starts, self.store.token_ends
+        if self.text is None or any(starts[i] < 0 for i in xrange(self.start, self.end)):
+            candidate = ' '.join([t.to_html() for t in self.tokens])
+            # Fix problems with tokenization of punctuation marks
+            for (k,v) in self.tokenization_fix.iteritems(): candidate = candidate.replace(k, v)
+            return candidate
+        # Render the original text of the tokens and the white space between them
+        output = []
+        position = starts[self.start] if self.end > self.start else 0
+        for i in xrange(self.start, self.end):
+            output.append(self.text[position:starts[i]])
+            output.append(Token(self.store, i).to_html(self.text[starts[i]:ends[i]]))
+            position = ends[i]
+        return ''.join(output)
 
 
 class TextBlock(object):
 
+    # Sharded plugin runs may split the document before this block (see processors.split_shards)
+    section_break = False
+
     def __init__(self, body):
         self.reports = []
         self.count_as_paragraph = False
@@ -208,6 +375,8 @@ class Float(TextBlock):
 
 class Section(TextBlock):
 
+    section_break = True
+
     def __init__(self, body, html_tag):
         TextBlock.__init__(self, body)
         self.__html_tag = html_tag
@@ -240,7 +409,7 @@ class Enumeration(TextBlock):
         self.count_as_paragraph = True
         self.numbered = numbered
         # Split items
-        self.__content = [Paragraph(o.strip(), syntax_replacements=syntax_replacements) for o in re.split(split_string, body) if len(o.strip()) > 0]
+        self.__content = [Paragraph(o.strip(), syntax_replacements=syntax_replacements) for o in offsets.split(split_string, body) if len(o.strip()) > 0]
 
     def get_sentences(self):
         sentences = []
@@ -264,6 +433,7 @@ class Paragraph(TextBlock):
         TextBlock.__init__(self, body)
         self.count_as_paragraph = True
         self.html_class = html_class
+        token_store.begin_paragraph()
         self.__sentences = sentence_splitter(body, syntax_replacements)
 
     def get_sentences(self):
@@ -290,18 +460,58 @@ class Paper:
                  }
 
     def __init__(self, lines, resources):
+        global token_store
         # Configure structures for paper content
         self.meta = {}
         self.content = []
-        # Parse
-        self.parse(lines)
+        self.store = TokenStore()
+        # Track the positions of characters in the source (see locate())
+        self.line_index = LineIndex(lines)
+        # Parse (tokens of all sentences go to the document's store)
+        previous_store, token_store = token_store, self.store
+        try:
+            with profiling.measure('parsing'):
+                self.parse(self.line_index.track(lines))
+        finally:
+            token_store = previous_store
         # Configure structures for storing reports
         self.reports = []
         self.stats = defaultdict(lambda: None)
         self.resources.update(resources)
+        # Processed blocks rendered instead of the content (in the streaming mode, see pipeline.analyze_stream)
+        self.streamed_blocks = None
 
     def parse(self, lines):
-        pass
+        self.content.extend(self.iter_blocks(lines))
+
+    def iter_blocks(self, lines):
+        """
+        Parses the lines of the document and generates its blocks (in the document order).
+        """
+        return iter([])
+
+    def stream(self, lines):
+        """
+        Parses the document lazily (the streaming mode) and generates its blocks one at a time. Tokens of every block go
+        to a separate store; until the next block is requested, the block is the only content of the paper and its store
+        is the store of the paper, so that processed blocks can be released.
+        :param lines: lines of the document (e.g., an open file)
+        """
+        global token_store
+        blocks = self.iter_blocks(self.line_index.follow(lines))
+        while True:
+            self.store = TokenStore()
+            previous_store, token_store = token_store, self.store
+            try:
+                with profiling.measure('parsing'):
+                    block = next(blocks, None)
+            finally:
+                token_store = previous_store
+            if block is None:
+                break
+            self.content = [block]
+            yield block
+        self.content = []
 
     def __str__(self):
         return '<Paper "{}" by {} : {} paragraphs>'.format(self.meta['title'], self.meta['author'], len(self.content))
@@ -315,23 +525,117 @@ class Paper:
             output.append('  {}\n'.format(p))
         return ''.join(output)
 
+    def locate(self, offset):
+        """
+        Maps an offset in the source document (e.g., Sentence.get_position()) to a (line, column) tuple, or None.
+        """
+        return self.line_index.locate(offset)
+
+    def memoized(self, name, compute):
+        """
+        Returns a derived view of the paper (e.g., the raw text), computed once and shared by all plugins. The views are
+        recomputed when the content changes (blocks or sentences are added or replaced); call invalidate() after other
+        modifications.
+        :param name: name of the view (plugins should prefix their own views, e.g., 'ngrams.ids')
+        :param compute: function computing the view
+        """
+        state = (id(self.content), len(self.content), len(self.store))
+        if getattr(self, 'views_state', None) != state:
+            self.views = {}
+            self.views_state = state
+        if name not in self.views:
+            self.views[name] = compute()
+        return self.views[name]
+
+    def invalidate(self):
+        self.views_state = None
+
     def to_raw_text(self):
-        if hasattr(self, 'raw_text_cache'):
-            return self.raw_text_cache
-        else:
-            output = []
-            for p in self.content:
-                output.append('{}\n\n'.format(p.to_raw_text()))
-            self.raw_text_cache = ' '.join(output)
-            return self.raw_text_cache
+        return self.memoized('raw_text', lambda: ' '.join(['{}\n\n'.format(p.to_raw_text()) for p in self.content]))
 
     def get_abstract(self):
-        output = []
-        for p in [p for p in self.content if type(p) is Paragraph and p.html_class == 'abstract']:
-            output.append('{}\n\n'.format(p.to_raw_text()))
-        return ' '.join(output)
+        return self.memoized('abstract', lambda: ' '.join(['{}\n\n'.format(p.to_raw_text()) for p in self.get_abstract_paragraphs()]))
+
+    def get_abstract_paragraphs(self):
+        return [p for p in self.content if type(p) is Paragraph and p.html_class == 'abstract']
+
+    def get_abstract_tokens(self):
+        """
+        Returns the words of the abstract.
+        """
+        return self.memoized('abstract_tokens', lambda: [t.word for p in self.get_abstract_paragraphs() for s in p.get_sentences() for t in s.tokens])
+
+    def get_all_sentences(self):
+        """
+        Returns all sentences of the paper (in the document order).
+        """
+        return self.memoized('sentences', lambda: [s for p in self.content for s in p.get_sentences()])
+
+    def get_sentence_strings(self):
+        return self.memoized('sentence_strings', lambda: [s.__str__() for s in self.get_all_sentences()])
+
+    def get_type_table(self):
+        """
+        Returns a table of unique lowercase words (types) of the paper.
+        :return: (types, mapping) tuple - a list of lowercase words, and a list mapping the ids of words in the token
+                 store to the indices of their lowercase forms in the types list
+        """
+        def compute():
+            types = []
+            type_ids = {}
+            mapping = []
+            for word in self.store.words:
+                word = word.lower()
+                if word not in type_ids:
+                    type_ids[word] = len(types)
+                    types.append(word)
+                mapping.append(type_ids[word])
+            return types, mapping
+        return self.memoized('type_table', compute)
+
+    def get_lowercase_ids(self):
+        """
+        Returns type ids (see get_type_table) of all tokens of the paper (in the document order).
+        """
+        def compute():
+            mapping = self.get_type_table()[1]
+            token_words = self.store.token_words
+            return [mapping[token_words[i]] for s in self.get_all_sentences() for i in xrange(s.start, s.end)]
+        return self.memoized('lowercase_ids', compute)
+
+    def get_lowercase_tokens(self):
+        types = self.get_type_table()[0]
+        return self.memoized('lowercase_tokens', lambda: [types[i] for i in self.get_lowercase_ids()])
+
+    def get_word_counts(self):
+        """
+        Returns a dictionary with the number of occurrences of every word (case sensitive) of the paper.
+        """
+        def compute():
+            counts = defaultdict(lambda: 0)
+            words, token_words = self.store.words, self.store.token_words
+            for s in self.get_all_sentences():
+                for i in xrange(s.start, s.end):
+                    counts[words[token_words[i]]] += 1
+            return dict(counts)
+        return self.memoized('word_counts', compute)
 
     def to_html(self, external=False):
+        with profiling.measure('rendering'):
+            return ''.join(self.iter_html(external))
+
+    def write_html(self, sink, external=False):
+        """
+        Writes the HTML report to a file-like object block by block, without building the whole document in memory.
+        """
+        with profiling.measure('rendering'):
+            for chunk in self.iter_html(external):
+                sink.write(chunk)
+
+    def iter_html(self, external=False):
+        """
+        Generates the HTML report in chunks (the preamble, successive blocks of the content and the reports).
+        """
         output = []
         # Write html preamble
         output.append('<html><head>')
@@ -387,10 +691,11 @@ class Paper:
         # Write meta data
         if (self.meta.has_key('title')): output.append('<div class="title">%s</div>' % self.meta['title'])
         if (self.meta.has_key('author')): output.append('<div class="author">%s</div>' % self.meta['author'])
+        yield ''.join(output)
         # Write main content
-        for p in self.content:
-            output.append(p.to_html())
-        output.append('</div></div>')
+        for p in (self.content if self.streamed_blocks is None else self.streamed_blocks):
+            yield p.to_html()
+        output = ['</div></div>']
         # Write reports
         if len(self.reports) > 0:
             output.append('<div class="globalReports">')
@@ -413,7 +718,7 @@ class Paper:
             output.append('</div>')
         # Close tags
         output.append('</body></html>')
-        return ''.join(output)
+        yield ''.join(output)
 
 
 class LatexPaper(Paper):
@@ -440,7 +745,7 @@ class LatexPaper(Paper):
         if not math: self.syntax_replacements[r'\$[^\$]+\$'] = '[Eq]'
         Paper.__init__(self, lines, resources)
 
-    def parse(self, lines):
+    def iter_blocks(self, lines):
         paragraph = []
         env_end_marker = None
 
@@ -487,7 +792,7 @@ class LatexPaper(Paper):
             if process_block > 0:
 
                 # Merge the lines of the current paragraph
-                body = ''.join(paragraph).strip()
+                body = offsets.join('', paragraph).strip()
 
                 # If for some reason, the current paragraph is empty - skip it
                 if len(body) > 0:
@@ -513,46 +818,46 @@ class LatexPaper(Paper):
                     if body.startswith(r'\section'):
                         result = parse_tex_command(body)
                         if result and len(result) > 0:
-                            self.content.append(Section(result, 'h1'))
+                            yield Section(result, 'h1')
                         else:
-                            self.content.append(Section('Appendix', 'h1'))
+                            yield Section('Appendix', 'h1')
 
                     elif body.startswith(r'\subsection'):
                         result = parse_tex_command(body)
                         if result and len(result) > 0:
-                            self.content.append(Section(result, 'h2'))
+                            yield Section(result, 'h2')
 
                     elif body.startswith(r'\subsubsection'):
                         result = parse_tex_command(body)
                         if result and len(result) > 0:
-                            self.content.append(Section(result, 'h3'))
+                            yield Section(result, 'h3')
 
                     elif body.startswith(r'\abstract'):
                         result = parse_tex_command(body, False)
                         if result and len(result) > 0:
-                            self.content.append(Paragraph(result, 'abstract', self.syntax_replacements))
+                            yield Paragraph(result, 'abstract', self.syntax_replacements)
                         else:
                             logging.error("Could not parse: {:.50}".format(body))
 
                     elif body.startswith(r'\begin{abstract}'):
-                        self.content.append(Paragraph(parse_latex_environment(body), 'abstract', self.syntax_replacements))
+                        yield Paragraph(parse_latex_environment(body), 'abstract', self.syntax_replacements)
 
                     elif body.startswith(r'\begin{equation'):
-                        if math and display_math: self.content.append(Equation(body))
+                        if math and display_math: yield Equation(body)
 
                     elif body.startswith(r'\begin{figure') or body.startswith(r'\begin{table'):
-                        if display_floats: self.content.append(Float(body, self.syntax_replacements))
+                        if display_floats: yield Float(body, self.syntax_replacements)
 
                     elif body.startswith(r'\begin{enumerate'):
                         main_body = parse_latex_environment(body)
-                        self.content.append(Enumeration(main_body, True, r'\\item ', self.syntax_replacements))
+                        yield Enumeration(main_body, True, r'\\item ', self.syntax_replacements)
 
                     elif body.startswith(r'\begin{itemize'):
                         main_body = parse_latex_environment(body)
-                        self.content.append(Enumeration(main_body, False, r'\\item ', self.syntax_replacements))
+                        yield Enumeration(main_body, False, r'\\item ', self.syntax_replacements)
 
                     elif not body.startswith('\\') or re.match(r'^\\({})'.format('|'.join(self.accepted_commands)), body):
-                        self.content.append(Paragraph(body, syntax_replacements=self.syntax_replacements))
+                        yield Paragraph(body, syntax_replacements=self.syntax_replacements)
 
                 # When finished, clear the current paragraph (add the line that begins an environment if necessary)
                 paragraph = [line] if process_block == 2 else []
@@ -564,7 +869,7 @@ class MarkdownPaper(Paper):
                            r'\[([^\]]+)\]\([^\)]+\)': r'\1',  # Links
                            '`[^`]+`': '[code]'}
 
-    def parse(self, lines):
+    def iter_blocks(self, lines):
         paragraph = []
         env_end_marker = None
 
@@ -587,31 +892,31 @@ class MarkdownPaper(Paper):
             if process_block > 0:
 
                 # Merge the lines of the current paragraph
-                body = ''.join(paragraph).strip()
+                body = offsets.join('', paragraph).strip()
 
                 # If for some reason, the current paragraph is empty - skip it
                 if len(body) > 0:
 
                     if body.startswith('# '):
-                        self.content.append(Section(body[2:], 'h1'))
+                        yield Section(body[2:], 'h1')
                     elif body.startswith('## '):
-                        self.content.append(Section(body[3:], 'h2'))
+                        yield Section(body[3:], 'h2')
                     elif body.startswith('### '):
-                        self.content.append(Section(body[4:], 'h3'))
+                        yield Section(body[4:], 'h3')
                     elif body.startswith('#### '):
-                        self.content.append(Section(body[5:], 'h4'))
+                        yield Section(body[5:], 'h4')
                     elif body.startswith('##### '):
-                        self.content.append(Section(body[5:], 'h5'))
+                        yield Section(body[5:], 'h5')
                     elif all([x.startswith('- ') for x in paragraph if len(x) > 0]):
                         # prepend \n to facilitate easier splitting
-                        self.content.append(Enumeration('\n'+'\n'.join(paragraph), split_string='\n- ', syntax_replacements=self.syntax_replacements))
+                        yield Enumeration(offsets.join('\n', [''] + paragraph), split_string='\n- ', syntax_replacements=self.syntax_replacements)
                     elif all([x.startswith('* ') for x in paragraph if len(x) > 0]):
                         # prepend \n to facilitate easier splitting
-                        self.content.append(Enumeration('\n'+'\n'.join(paragraph), split_string='\n* ', syntax_replacements=self.syntax_replacements))
+                        yield Enumeration(offsets.join('\n', [''] + paragraph), split_string='\n* ', syntax_replacements=self.syntax_replacements)
                     elif all([re.match(r'^[0-9]+\. ', x) for x in paragraph if len(x) > 0]):
-                        self.content.append(Enumeration('\n'.join(paragraph), True, '\n{0,1}[0-9]+\\. ', self.syntax_replacements))
+                        yield Enumeration(offsets.join('\n', paragraph), True, '\n{0,1}[0-9]+\\. ', self.syntax_replacements)
                     elif not body.startswith('```'):
-                        self.content.append(Paragraph(body, syntax_replacements=self.syntax_replacements))
+                        yield Paragraph(body, syntax_replacements=self.syntax_replacements)
 
                 # When finished, clear the current paragraph (add the line that begins an environment if necessary)
                 paragraph = []
@@ -619,7 +924,7 @@ class MarkdownPaper(Paper):
 
 class PlaintextPaper(Paper):
 
-    def parse(self, lines):
+    def iter_blocks(self, lines):
         paragraph = []
 
         # Process file
@@ -641,17 +946,17 @@ class PlaintextPaper(Paper):
             if process_block > 0:
 
                 # Merge the lines of the current paragraph
-                body = ''.join(paragraph).strip()
+                body = offsets.join('', paragraph).strip()
 
                 # If for some reason, the current paragraph is empty - skip it
                 if len(body) > 0:
 
                     if len(paragraph) == 1 and '.' not in body:
-                        self.content.append(Section(body, 'h1'))
+                        yield Section(body, 'h1')
                     elif all([x.startswith('- ') for x in paragraph if len(x) > 0]):
-                        self.content.append(Enumeration(body, split_string='- '))
+                        yield Enumeration(body, split_string='- ')
                     else:
-                        self.content.append(Paragraph(body))
+                        yield Paragraph(body)
 
                 # When finished, clear the current paragraph (add the line that begins an environment if necessary)
                 paragraph = []
@@ -0,0 +1,60 @@
+__author__ = 'pkorus'
+
+from collections import deque
+
+
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton over tokens: finds all occurrences of many phrases (sequences of words) in a single pass
+    over a sentence, regardless of the number of phrases.
+    """
+
+    def __init__(self, phrases):
+        """
+        :param phrases: list of phrases, each a list of words; the position in the list is the phrase id
+        """
+        self.lengths = [len(p) for p in phrases]
+        # Trie of the phrases: transitions, failure links and ids of the phrases that end in each state
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for phrase_id, phrase in enumerate(phrases):
+            if len(phrase) == 0:
+                continue
+            state = 0
+            for word in phrase:
+                if word not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][word] = len(self.goto) - 1
+                state = self.goto[state][word]
+            self.output[state].append(phrase_id)
+
+        # Breadth-first construction of the failure links
+        queue = deque(self.goto[0].values())
+        while len(queue) > 0:
+            state = queue.popleft()
+            for word, target in self.goto[state].iteritems():
+                queue.append(target)
+                fallback = self.fail[state]
+                while fallback > 0 and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[target] = self.goto[fallback].get(word, 0)
+                self.output[target] = self.output[target] + self.output[self.fail[target]]
+
+    def match(self, words):
+        """
+        Finds all phrases in a sequence of words.
+        :param words: list of words
+        :return: list of (start, end, phrase id) tuples, ordered by the end position
+        """
+        matches = []
+        state = 0
+        for i, word in enumerate(words):
+            while state > 0 and word not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(word, 0)
+            for phrase_id in self.output[state]:
+                matches.append((i + 1 - self.lengths[phrase_id], i + 1, phrase_id))
+        return matches
@@ -0,0 +1,95 @@
+__author__ = 'pkorus'
+
+import os
+import logging
+from swtk import paper
+from swtk import processors
+from swtk import cache
+from swtk import tagging
+from swtk.spool import BlockSpool
+
+supported_formats = {'.tex': paper.LatexPaper, '.md': paper.MarkdownPaper, '.txt': paper.PlaintextPaper}
+
+
+def get_paper_class(filename):
+    """
+    Returns the Paper class for a given filename, or None if the format is not supported.
+    """
+    return supported_formats.get(os.path.splitext(filename)[-1].lower())
+
+
+def configure(math=False, display_math=False, floats=False):
+    paper.math = math or display_math
+    paper.display_math = display_math
+    paper.display_floats = floats
+
+
+def plugin_path(root_path):
+    return '{}/plugins'.format(root_path if len(root_path) > 0 else '.')
+
+
+def available_plugins(root_path):
+    """
+    Returns the names of the available plugin modules (e.g., text_stats, pos_tagger).
+    """
+    return sorted(processors.Plugin.find_plugins(plugin_path(root_path)))
+
+
+def load_plugins(root_path, selected=None, skipped=None, extra=None):
+    """
+    Imports & enables the plugins (all, or the selected plugin modules, together with their dependencies). Optional
+    plugins (e.g., 4-grams) are enabled only if selected, or listed in extra.
+    """
+    processors.Plugin.register_plugins(plugin_path(root_path), selected, skipped, extra)
+
+
+def enable_cache(path, max_size, auto_evict=True):
+    salt = processors.Plugin.signature()
+    # Tags of other taggers are cached separately (entries of the default tagger keep their keys)
+    if processors.options.get('tagger', 'default') != 'default':
+        salt += '|' + tagging.signature(processors.options['tagger'], processors.options.get('tagger_lookup'))
+    try:
+        paper.cache = cache.BlockCache(path, max_size, salt, auto_evict)
+    except (IOError, OSError) as e:
+        logging.warning('Cannot use the block cache {} ({}) - running without it'.format(path, e))
+        paper.cache = None
+
+
+def analyze(paper_class, lines, resources=None):
+    """
+    Parses a document and runs all registered plugins on it.
+    :param paper_class: one of the Paper classes (see supported_formats)
+    :param lines: lines of the input document
+    :param resources: dictionary with custom resource paths (css, js)
+    :return: the analyzed Paper object
+    """
+    p = paper_class(lines, resources if resources is not None else {})
+    processors.Plugin.run_all(p)
+    if paper.cache is not None:
+        paper.cache.flush()
+    return p
+
+
+def analyze_stream(paper_class, lines, resources=None, spool_dir=None):
+    """
+    Analyzes a document in the streaming mode: blocks are parsed lazily and processed one at a time (see
+    Plugin.run_streaming), then moved to a spool file. Only the results of the plugins are kept in memory, so the memory
+    usage does not depend on the length of the document.
+    :param lines: lines of the input document - e.g., an open file (read lazily)
+    :param spool_dir: directory for the spool file (default: the system temporary directory)
+    :return: the analyzed Paper object without content; write_html() renders the blocks from the spool (once)
+    """
+    p = paper_class([], resources if resources is not None else {})
+    spool = BlockSpool(spool_dir)
+
+    def release(block):
+        spool.append(block)
+        # The block is fully tagged - write it to the cache before it is released
+        if paper.cache is not None:
+            paper.cache.flush(evict=False)
+
+    run = processors.Plugin.run_streaming(p, p.stream(lines), release)
+    if paper.cache is not None:
+        paper.cache.flush()
+    p.streamed_blocks = run.highlight(spool.drain())
+    return p
@@ -3,9 +3,37 @@ __author__ = 'pkorus'
 import os
 import imp
 import logging
+import threading
+import multiprocessing
+from collections import defaultdict
+from multiprocessing.pool import ThreadPool
+from swtk import profiling
+from swtk.state import State, OrderedCounter, OrderedGroups, OrderedSet
 
 ignore_tags = ['e']
-ignore_tokens = ['.', ',', ';', '[', ']', '(', ')', '-', '$', '!', '?']
+ignore_tokens = set(['.', ',', ';', '[', ']', '(', ')', '-', '$', '!', '?'])
+
+# Plugin settings supplied by the user (e.g., from the command line)
+options = {}
+
+# Data files shared by all plugin instances within a process
+resource_cache = {}
+
+# The paper, the plugin classes and the scope processed by the workers of a sharded run (inherited when forking)
+shard_job = None
+
+
+def load_resource(filename, loader):
+    """
+    Loads a data file (e.g., a dictionary) once per process, so that plugins can be re-instantiated cheaply.
+    :param filename: path to the data file
+    :param loader: function that reads the content of an open file object
+    :return: the loaded data (shared - do not modify)
+    """
+    if filename not in resource_cache:
+        with open(filename) as f:
+            resource_cache[filename] = loader(f)
+    return resource_cache[filename]
 
 
 def dump_as_list(data):
@@ -20,24 +48,352 @@ def dump_as_list(data):
 
 
 def run_text_processor(paper, processor):
-    processor.process_text(paper)
+    with profiling.measure(profiling.stage_name(processor)):
+        processor.process_text(paper)
 
 
-def run_sentence_processor(paper, processor):
-    for p in paper.content:
+def finalize_processors(paper, processors):
+    for processor in processors:
+        with profiling.measure(profiling.stage_name(processor)):
+            processor.finalize(paper)
+
+
+def visit_sentences(paper, processors, start=0, end=None):
+    """
+    Passes every sentence of a range of blocks (by default, the whole document) to all processors (in the given order).
+    """
+    profiler = profiling.active
+    handlers = [p.process_sentence for p in processors] if profiler is None else profiler.instrument(processors, 'process_sentence')
+    for index, p in enumerate(paper.content[start:end], start):
         for s in p.get_sentences():
-            processor.process_sentence(s)
+            if profiler is not None:
+                profiler.visit(index, s)
+            for process_sentence in handlers:
+                process_sentence(s)
+
+
+def visit_tokens(paper, processors, start=0, end=None):
+    """
+    Passes every token (except punctuation & math) of a range of blocks (by default, the whole document) to all
+    processors (in the given order).
+    """
+    profiler = profiling.active
+    handlers = [p.process_token for p in processors] if profiler is None else profiler.instrument(processors, 'process_token')
+    for index, p in enumerate(paper.content[start:end], start):
+        for s in p.get_sentences():
+            if profiler is not None:
+                profiler.visit(index, s)
+            for t in s.tokens:
+                word = t.word
+                if word in ignore_tokens or word.startswith('$'):
+                    continue
+                for process_token in handlers:
+                    process_token(t)
+
+
+def run_sentence_processors(paper, processors):
+    """
+    Visits every sentence once and passes it to all processors (in the given order). The processors are finalized
+    (in the same order) once the whole document has been processed - after all of them have seen every sentence, so
+    results published in finalize are not available to the other processors while visiting.
+    """
+    visit_sentences(paper, processors)
+    finalize_processors(paper, processors)
+
+
+def run_token_processors(paper, processors):
+    """
+    Visits every token (except punctuation & math) once and passes it to all processors (in the given order). The
+    processors are finalized (in the same order) once the whole document has been processed - after all of them have
+    seen every token (see run_sentence_processors).
+    """
+    visit_tokens(paper, processors)
+    finalize_processors(paper, processors)
+
+
+def split_shards(paper, count):
+    """
+    Splits the content of a paper at section boundaries into at most count shards with similar numbers of tokens.
+    :return: list of (start, end) ranges of blocks
+    """
+    sizes = [sum(s.end - s.start for s in b.get_sentences()) for b in paper.content]
+    target = sum(sizes) / float(count)
+    shards = []
+    start = 0
+    size = 0
+    for index, block in enumerate(paper.content):
+        if block.section_break and size >= target and len(shards) < count - 1:
+            shards.append((start, index))
+            start, size = index, 0
+        size += sizes[index]
+    shards.append((start, len(paper.content)))
+    return [s for s in shards if s[1] > s[0]]
+
+
+class Annotations(object):
+    """
+    Records reports & alternatives added to the sentences and tokens of a shard (by a worker process), so that they can
+    be added to the paper in the main process.
+    """
+
+    def __init__(self, paper, start, end):
+        self.sentences = [s for b in paper.content[start:end] for s in b.get_sentences()]
+        self.store = paper.store
+        self.sentence_reports = [len(s.reports) for s in self.sentences]
+        self.token_reports = {}
+        self.token_alternatives = {}
+        for s in self.sentences:
+            for i in xrange(s.start, s.end):
+                self.token_reports[i] = len(self.store.reports.get(i, ()))
+                self.token_alternatives[i] = len(self.store.alternatives.get(i, ()))
+
+    def changes(self):
+        """
+        :return: (sentence reports, token reports, token alternatives) - new reports of every sentence (list), and new
+                 reports & alternatives of tokens (dictionaries: token index -> list)
+        """
+        sentence_reports = [s.reports[n:] for s, n in zip(self.sentences, self.sentence_reports)]
+        token_reports = {}
+        token_alternatives = {}
+        for column, before, output in [(self.store.reports, self.token_reports, token_reports),
+                                       (self.store.alternatives, self.token_alternatives, token_alternatives)]:
+            for i, n in before.iteritems():
+                items = column.get(i, ())
+                if len(items) > n:
+                    output[i] = items[n:]
+        return sentence_reports, token_reports, token_alternatives
+
+
+def apply_changes(paper, start, end, changes):
+    sentence_reports, token_reports, token_alternatives = changes
+    for s, reports in zip([s for b in paper.content[start:end] for s in b.get_sentences()], sentence_reports):
+        s.reports.extend(reports)
+    for i, reports in sorted(token_reports.iteritems()):
+        paper.store.reports.setdefault(i, []).extend(reports)
+    for i, alternatives in sorted(token_alternatives.iteritems()):
+        paper.store.alternatives.setdefault(i, []).extend(alternatives)
+
+
+def run_shard(shard):
+    """
+    Processes a shard (range of blocks) of the document in a worker process.
+    :return: (states of the processors, annotations of the shard)
+    """
+    paper, classes, visit = shard_job
+    start, end = shard
+    processors = [cls() for cls in classes]
+    if start > 0:
+        preceding = [s for b in paper.content[:start] for s in b.get_sentences()]
+        for p in processors:
+            p.warm_up(preceding)
+    annotations = Annotations(paper, start, end)
+    visit(paper, processors, start, end)
+    return [p.state for p in processors], annotations.changes()
+
+
+def run_sharded(paper, processors, visit, workers):
+    """
+    Runs sentence or token processors on shards of the document (split at sections) in a pool of worker processes. The
+    partial states of the processors are merged (in the document order) and the processors are finalized in the main
+    process, so the results are the same as in a sequential run.
+    :param visit: visit_sentences or visit_tokens
+    :return: False if the processors cannot be run this way (e.g., a processor does not keep its results in a
+             mergeable state, or the document has a single section)
+    """
+    global shard_job
+    if len(processors) == 0 or workers < 2 or multiprocessing.current_process().daemon:
+        return False
+    if not all(isinstance(getattr(p, 'state', None), State) for p in processors):
+        logging.info('Some plugins do not have a mergeable state - running them sequentially')
+        return False
+    shards = split_shards(paper, workers)
+    if len(shards) < 2:
+        return False
+    shard_job = (paper, [p.__class__ for p in processors], visit)
+    pool = multiprocessing.Pool(len(shards))
+    try:
+        results = pool.map(run_shard, shards)
+    finally:
+        pool.close()
+        pool.join()
+        shard_job = None
+    # Reduce the partial states & add the annotations of all shards
+    for index, p in enumerate(processors):
+        p.state = reduce(lambda a, b: a.merge(b), [states[index] for states, _ in results])
+    for (start, end), (_, changes) in zip(shards, results):
+        apply_changes(paper, start, end, changes)
+    finalize_processors(paper, processors)
+    return True
+
+
+def run_text_processors_concurrently(paper, stages, workers):
+    """
+    Runs text processors in a pool of threads; processors in the same stage (independent of each other) run
+    concurrently. Reports and stats of every processor are buffered and added to the paper in the order of the
+    schedule, so the results are the same as in a sequential run.
+    """
+    store_reports = paper.store.reports
+    paper.store.reports = token_reports = BufferedReports(store_reports)
+    pool = ThreadPool(workers)
+
+    def run(p):
+        token_reports.local.buffer = buffers[p]
+        try:
+            run_text_processor(views[p], p)
+        finally:
+            token_reports.local.buffer = None
+
+    try:
+        for stage in stages:
+            views = dict((p, PaperView(paper)) for p in stage)
+            buffers = dict((p, {}) for p in stage)
+            pool.map(run, stage)
+            for p in stage:
+                paper.reports.extend(views[p].reports)
+                paper.stats.update(views[p].stats)
+                for index, reports in sorted(buffers[p].iteritems()):
+                    store_reports.setdefault(index, []).extend(reports)
+    finally:
+        pool.close()
+        pool.join()
+        paper.store.reports = store_reports
+
+
+class StreamingRun(object):
+    """
+    Runs the plugins on a paper in the streaming mode (see Plugin.run_streaming). Every block is passed to the text
+    processors (process_block), its sentences & tokens to the sentence & token processors, and then to the sentence &
+    token processors that define process_block. Once all blocks have been processed, the text processors are finished
+    (finish_stream) and the sentence & token processors finalized; highlights that depend on the whole document are
+    added in a second pass over the blocks (highlight_block).
+    """
+
+    def __init__(self, paper):
+        self.paper = paper
+        schedule = Plugin.build_schedule()
+        instances = {}
+        for cls in Plugin.text_processors + Plugin.sentence_processors + Plugin.token_processors:
+            if cls not in instances:
+                instances[cls] = cls()
+                instances[cls].streaming = True
+        (text_order, _), (sentence_order, sentence_stages), (token_order, token_stages) = schedule
+        # Stages of sentence & token processors cannot be finalized one after another while the blocks are streamed
+        if len(sentence_stages) > 1 or len(token_stages) > 1:
+            raise DependencyError('Dependencies between sentence or token processors are not supported in the streaming mode')
+        self.text_processors = []
+        for cls in text_order:
+            if hasattr(cls, 'process_block'):
+                self.text_processors.append(instances[cls])
+            else:
+                logging.warning('Skipping plugin {} - it does not support the streaming mode'.format(cls.__name__))
+        self.sentence_processors = [instances[cls] for cls in sentence_order]
+        self.token_processors = [instances[cls] for cls in token_order]
+        self.processors = []
+        for p in self.text_processors + self.sentence_processors + self.token_processors:
+            if p not in self.processors:
+                self.processors.append(p)
+        self.block_processors = [p for p in self.processors if p not in self.text_processors and hasattr(p, 'process_block')]
+        self.highlighters = [p for p in self.processors if hasattr(p, 'highlight_block')]
+
+    def process(self, block):
+        """
+        Processes a block - the only content of the paper at the moment (see Paper.stream).
+        """
+        for p in self.text_processors:
+            with profiling.measure(profiling.stage_name(p)):
+                p.process_block(self.paper, block)
+        visit_sentences(self.paper, self.sentence_processors)
+        visit_tokens(self.paper, self.token_processors)
+        for p in self.block_processors:
+            with profiling.measure(profiling.stage_name(p)):
+                p.process_block(self.paper, block)
+
+    def finalize(self):
+        """
+        Finishes the text processors (finish_stream) and finalizes the sentence & token processors, in the order of the
+        schedule.
+        """
+        for p in self.processors:
+            with profiling.measure(profiling.stage_name(p)):
+                if p in self.text_processors:
+                    p.finish_stream(self.paper)
+                if p in self.sentence_processors or p in self.token_processors:
+                    p.finalize(self.paper)
+
+    def highlight(self, blocks):
+        """
+        Generates the processed blocks with the highlights of the whole document (e.g., rare words).
+        """
+        for block in blocks:
+            self.paper.content = [block]
+            for p in self.highlighters:
+                with profiling.measure(profiling.stage_name(p)):
+                    p.highlight_block(self.paper, block)
+            yield block
+        self.paper.content = []
 
-    processor.finalize(paper)
+
+def run_sentence_processor(paper, processor):
+    run_sentence_processors(paper, [processor])
 
 
 def run_token_processor(paper, processor):
-    for p in paper.content:
-        for s in p.get_sentences():
-            for t in [t for t in s.tokens if t.word not in ignore_tokens and not t.word.startswith('$')]:
-                processor.process_token(t)
+    run_token_processors(paper, [processor])
+
+
+class DependencyError(Exception):
+    pass
+
+
+class PaperView(object):
+    """
+    Gives a plugin access to the paper, but collects its reports and stats separately (used for concurrently running
+    plugins).
+    """
+
+    def __init__(self, paper):
+        self.paper = paper
+        self.reports = []
+        self.stats = StatsView(paper.stats)
+
+    def __getattr__(self, name):
+        return getattr(self.paper, name)
+
+
+class StatsView(dict):
+    """
+    Stats written by a plugin running on a PaperView; stats it does not write are read from the paper.
+    """
+
+    def __init__(self, stats):
+        dict.__init__(self)
+        self.stats = stats
 
-    processor.finalize(paper)
+    def __missing__(self, key):
+        # Do not add missing entries to the stats of the paper (shared by concurrently running plugins)
+        return self.stats.get(key)
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self.stats
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+
+class BufferedReports(dict):
+    """
+    Token reports of a token store; reports added from a thread with an active buffer go to that buffer.
+    """
+
+    def __init__(self, reports):
+        dict.__init__(self, reports)
+        self.local = threading.local()
+
+    def setdefault(self, key, default=None):
+        buffer = getattr(self.local, 'buffer', None)
+        if buffer is None:
+            return dict.setdefault(self, key, default)
+        return buffer.setdefault(key, default)
 
 
 class CSS:
@@ -76,50 +432,248 @@ class PluginManager(type):
 
     def __init__(cls, name, parents, attributes):
         super(PluginManager, cls).__init__(name, parents, attributes)
-        if not hasattr(cls, 'text_processors'):
+        if not hasattr(cls, 'plugins'):
+            cls.plugins = []
             cls.text_processors = []
             cls.sentence_processors = []
             cls.token_processors = []
-        else:
-            instance = cls()
-            if attributes.has_key('process_text'):
-                logging.debug('Registering text processor plugin %s' % cls)
-                cls.text_processors.append(instance)
-            if attributes.has_key('process_sentence'):
-                logging.debug('Registering sentence processor plugin %s' % cls)
-                cls.sentence_processors.append(instance)
-            if attributes.has_key('process_token'):
-                logging.debug('Registering token processor plugin %s' % cls)
-                cls.token_processors.append(instance)
+        elif not attributes.get('abstract', False):
+            # Plugins are only registered here - they are instantiated when enabled and executed (see Plugin.run_all)
+            logging.debug('Registering plugin %s' % cls)
+            cls.plugins.append(cls)
 
 
 class Plugin:
 
     __metaclass__ = PluginManager
     run_priority = 100
+    # Bump when a plugin changes the data it stores in tokens (invalidates the block cache)
+    version = 0
+    # Data made available to other plugins, and data needed from other plugins (e.g., 'pos_tag', 'stats.sentences')
+    provides = []
+    requires = []
+    # Set for instances running in the streaming mode (see run_streaming)
+    streaming = False
+    # Optional plugins are enabled only on request (see register_plugins)
+    optional = False
 
     def finalize(self, paper):
         pass
 
+    def finish_stream(self, paper):
+        """
+        Called for text processors in the streaming mode once all blocks have been processed (see StreamingRun) - the
+        counterpart of process_text, e.g., to generate the report from the results collected in process_block.
+        """
+        pass
+
+    def warm_up(self, sentences):
+        """
+        Called before processing a shard of the document (see run_sharded) with the sentences that precede it; plugins
+        that look back across sentences can restore their context here.
+        """
+        pass
+
     @staticmethod
     def run_all(paper):
-        # TODO Add plug-in prioritization - so that other plugins could use info from other plugins
-        for p in [p for p in sorted(Plugin.text_processors, key=lambda x: x.run_priority)]:
-            run_text_processor(paper, p)
-        for p in [p for p in sorted(Plugin.sentence_processors, key=lambda x: x.run_priority)]:
-            run_sentence_processor(paper, p)
-        for p in [p for p in sorted(Plugin.token_processors, key=lambda x: x.run_priority)]:
-            run_token_processor(paper, p)
+        """
+        Runs all enabled plugins on a paper. Every run uses fresh plugin instances.
+        """
+        if profiling.active is not None:
+            profiling.active.attach(paper)
+        with profiling.measure('plugins'):
+            Plugin.run_scheduled(paper)
+
+    @staticmethod
+    def run_scheduled(paper):
+        schedule = Plugin.build_schedule()
+        instances = {}
+        for cls in Plugin.text_processors + Plugin.sentence_processors + Plugin.token_processors:
+            if cls not in instances:
+                instances[cls] = cls()
+        (text_order, text_stages), (_, sentence_stages), (_, token_stages) = \
+            [([instances[p] for p in order], [[instances[p] for p in stage] for stage in stages]) for order, stages in schedule]
+        workers = options.get('plugin_workers', 1)
+        if workers > 1:
+            run_text_processors_concurrently(paper, text_stages, workers)
+        else:
+            for p in text_order:
+                run_text_processor(paper, p)
+        # Processors of a stage share a traversal and are finalized before the next stage, so that they can use the
+        # results of their dependencies; processors with mergeable states can run on shards of the document
+        shard_workers = options.get('shard_workers', 1)
+        for stage in sentence_stages:
+            if not run_sharded(paper, stage, visit_sentences, shard_workers):
+                run_sentence_processors(paper, stage)
+        for stage in token_stages:
+            if not run_sharded(paper, stage, visit_tokens, shard_workers):
+                run_token_processors(paper, stage)
+
+    @staticmethod
+    def run_streaming(paper, blocks, release=None):
+        """
+        Runs all enabled plugins on a paper in the streaming mode - block by block (see StreamingRun), so that
+        processed blocks can be released. Text processors have to support the mode (process_block), others are skipped.
+        :param blocks: blocks of the paper (see Paper.stream)
+        :param release: function called with every processed block (e.g., to move it to a spool)
+        :return: the StreamingRun - its highlight() adds the highlights of the whole document to the processed blocks
+        """
+        if profiling.active is not None:
+            profiling.active.attach(paper)
+        run = StreamingRun(paper)
+        for block in blocks:
+            with profiling.measure('plugins'):
+                run.process(block)
+            if release is not None:
+                release(block)
+        with profiling.measure('plugins'):
+            run.finalize()
+        return run
+
+    @staticmethod
+    def enable(classes):
+        """
+        Enables plugin classes - registers them as text, sentence and/or token processors based on the methods they define.
+        """
+        for cls in classes:
+            if hasattr(cls, 'process_text') and cls not in Plugin.text_processors:
+                logging.debug('Enabling text processor plugin %s' % cls)
+                Plugin.text_processors.append(cls)
+            if hasattr(cls, 'process_sentence') and cls not in Plugin.sentence_processors:
+                logging.debug('Enabling sentence processor plugin %s' % cls)
+                Plugin.sentence_processors.append(cls)
+            if hasattr(cls, 'process_token') and cls not in Plugin.token_processors:
+                logging.debug('Enabling token processor plugin %s' % cls)
+                Plugin.token_processors.append(cls)
 
     @staticmethod
-    def register_plugins(path):
-        for filename in os.listdir(path):
-            if filename.endswith('.py') and filename != '__init__.py':
-                module = os.path.splitext(filename)[0]
-                mod_obj = globals().get(module)
-                if mod_obj is None:
-                    f, filename, desc = imp.find_module(module, [path])
-                    globals()[module] = mod_obj = imp.load_module(module, f, filename, desc)
+    def build_schedule():
+        """
+        Orders the plugins of each run scope (text, sentence and token processors) according to their dependencies;
+        independent plugins are ordered by their run priority.
+        :return: list of (plugins, stages) tuples for the three scopes; stages are successive groups of plugins that do
+                 not depend on each other
+        :raises DependencyError: if a requirement is not provided by any plugin (or only by a plugin that runs in a
+                 later scope), or if the dependencies are cyclic
+        """
+        scopes = [Plugin.text_processors, Plugin.sentence_processors, Plugin.token_processors]
+        # Each plugin belongs to the first scope it is registered in
+        scope_of = {}
+        registered = []
+        for index, plugins in enumerate(scopes):
+            for p in plugins:
+                if p not in scope_of:
+                    scope_of[p] = index
+                    registered.append(p)
+
+        providers = defaultdict(list)
+        for p in registered:
+            for item in p.provides:
+                providers[item].append(p)
+
+        # Find dependencies within the scopes and verify the ones across scopes
+        dependencies = dict((p, set()) for p in registered)
+        for p in registered:
+            for item in p.requires:
+                if item not in providers:
+                    raise DependencyError('{} requires {} which is not provided by any plugin'.format(p.__name__, item))
+                for provider in providers[item]:
+                    if scope_of[provider] > scope_of[p]:
+                        raise DependencyError('{} requires {} which is provided by {} in a later run scope'.format(
+                            p.__name__, item, provider.__name__))
+                    if scope_of[provider] == scope_of[p] and provider is not p:
+                        dependencies[p].add(provider)
+
+        schedule = []
+        for index in range(len(scopes)):
+            # Topological sort - among the plugins with satisfied dependencies, the one with the lowest priority goes first
+            pending = [p for p in registered if scope_of[p] == index]
+            order = []
+            while len(pending) > 0:
+                ready = [p for p in pending if dependencies[p].issubset(order)]
+                if len(ready) == 0:
+                    raise DependencyError('Cyclic dependencies between plugins: {}'.format(', '.join([p.__name__ for p in pending])))
+                p = min(ready, key=lambda x: x.run_priority)
+                order.append(p)
+                pending.remove(p)
+            # Split the order into stages - a plugin starts a new stage if it depends on a plugin from the current one
+            stages = []
+            for p in order:
+                if len(stages) == 0 or not dependencies[p].isdisjoint(stages[-1]):
+                    stages.append([])
+                stages[-1].append(p)
+            schedule.append((order, stages))
+        return schedule
+
+    @staticmethod
+    def signature():
+        """
+        Returns a string identifying the enabled plugins and their versions.
+        """
+        plugins = set(Plugin.text_processors + Plugin.sentence_processors + Plugin.token_processors)
+        return ','.join(sorted(['{}:{}'.format(p.__name__, p.version) for p in plugins]))
+
+    @staticmethod
+    def find_plugins(path):
+        """
+        Returns the names of the plugin modules available in a directory.
+        """
+        return [os.path.splitext(f)[0] for f in os.listdir(path) if f.endswith('.py') and f != '__init__.py']
+
+    @staticmethod
+    def import_plugins(path, module):
+        """
+        Imports a plugin module (once per process) and returns the plugin classes defined in it.
+        """
+        if globals().get(module) is None:
+            f, filename, desc = imp.find_module(module, [path])
+            try:
+                globals()[module] = imp.load_module(module, f, filename, desc)
+            finally:
+                f.close()
+        return [cls for cls in Plugin.plugins if cls.__module__ == module]
+
+    @staticmethod
+    def register_plugins(path, selected=None, skipped=None, extra=None):
+        """
+        Imports & enables plugin modules. Only the selected modules are imported, unless other modules are needed to
+        provide their requirements.
+        :param path: plugin directory
+        :param selected: names of the modules to enable (default: all, except for optional plugins)
+        :param skipped: names of the modules that should not be imported
+        :param extra: names of the modules with optional plugins to enable in addition to the default ones
+        :raises DependencyError: if the dependencies of the enabled plugins cannot be satisfied
+        """
+        skipped = set(skipped if skipped is not None else [])
+        extra = set(extra if extra is not None else [])
+        available = [m for m in Plugin.find_plugins(path) if m not in skipped]
+        enabled = [cls for m in available if selected is None or m in selected for cls in Plugin.import_plugins(path, m)
+                   if not cls.optional or selected is not None or m in extra]
+
+        # Pull in the providers of missing requirements from the remaining modules
+        candidates = None
+        while True:
+            provided = set([item for cls in enabled for item in cls.provides])
+            missing = set([item for cls in enabled for item in cls.requires if item not in provided])
+            if len(missing) == 0:
+                break
+            if candidates is None:
+                candidates = [cls for m in available for cls in Plugin.import_plugins(path, m)]
+            providers = [cls for cls in candidates if cls not in enabled and not missing.isdisjoint(cls.provides)]
+            if len(providers) == 0:
+                if len(skipped) == 0 or selected is not None:
+                    break
+                # Drop plugins whose providers have been skipped
+                for cls in [cls for cls in enabled if not provided.issuperset(cls.requires)]:
+                    logging.warning('Skipping plugin {} - its requirements are not provided'.format(cls.__name__))
+                    enabled.remove(cls)
+            else:
+                enabled.extend(providers)
+
+        # Keep the order of registration
+        Plugin.enable(sorted(enabled, key=lambda cls: Plugin.plugins.index(cls)))
+        # Verify plugin dependencies early
+        Plugin.build_schedule()
 
     @staticmethod
     def toggle_button_generator(items):
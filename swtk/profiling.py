@@ -0,0 +1,237 @@
+__author__ = 'pkorus'
+
+import sys
+import time
+import resource
+import threading
+from collections import OrderedDict, defaultdict
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+# Bump whenever the structure of the JSON profile changes
+profile_format = 1
+
+# The active profiler (see enable); the parser, the plugin runners and the renderer report to it when set
+active = None
+
+
+def memory_usage():
+    """
+    Returns the peak memory usage in bytes - of traced allocations (if tracemalloc is available), or the peak resident
+    set size of the process.
+    """
+    if tracemalloc is not None and tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[1]
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+class NullContext:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+null_context = NullContext()
+
+
+class Measurement:
+    """
+    Context manager measuring the wall time & memory of a code block.
+    """
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.memory = memory_usage()
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *args):
+        elapsed = time.time() - self.start
+        self.profiler.add(self.name, elapsed, memory_usage() - self.memory)
+        return False
+
+
+class Profiler:
+    """
+    Collects the wall time, number of calls and memory growth of the stages of the analysis (parsing, every plugin,
+    rendering), and the slowest sentences and paragraphs of each sentence / token processor.
+    """
+
+    def __init__(self, slowest=5):
+        """
+        :param slowest: number of the slowest sentences & paragraphs to keep for each plugin
+        """
+        self.slowest = slowest
+        self.stages = OrderedDict()
+        self.lock = threading.Lock()
+        self.paper = None
+        # The block & sentence currently visited by sentence / token processors
+        self.block = None
+        self.sentence = None
+        self.sentence_times = defaultdict(lambda: defaultdict(float))
+        self.block_times = defaultdict(lambda: defaultdict(float))
+
+    def measure(self, name):
+        return Measurement(self, name)
+
+    def add(self, name, elapsed, memory=0, calls=1):
+        with self.lock:
+            if name not in self.stages:
+                self.stages[name] = {'time': 0.0, 'calls': 0, 'memory': 0}
+            stage = self.stages[name]
+            stage['time'] += elapsed
+            stage['calls'] += calls
+            stage['memory'] += max(memory, 0)
+
+    def attach(self, paper):
+        self.paper = paper
+
+    def visit(self, block, sentence):
+        self.block = block
+        self.sentence = sentence
+
+    def instrument(self, processors, method):
+        """
+        Wraps a method (e.g., 'process_sentence') of plugin instances to measure every call; the time is also
+        attributed to the currently visited sentence & block (see visit).
+        :return: list of the wrapped methods
+        """
+        def wrap(processor):
+            function = getattr(processor, method)
+            name = stage_name(processor)
+            sentence_times, block_times = self.sentence_times[name], self.block_times[name]
+
+            def measured(*args):
+                memory = memory_usage()
+                start = time.time()
+                result = function(*args)
+                elapsed = time.time() - start
+                self.add(name, elapsed, memory_usage() - memory)
+                sentence_times[self.sentence] += elapsed
+                block_times[self.block] += elapsed
+                return result
+            return measured
+        return [wrap(p) for p in processors]
+
+    def slowest_sentences(self, name):
+        output = []
+        for s, elapsed in sorted(self.sentence_times[name].iteritems(), key=lambda x: -x[1])[:self.slowest]:
+            entry = {'time': elapsed, 'text': (s.text if s.text is not None else s.__str__())[:80]}
+            location = self.locate(s)
+            if location is not None:
+                entry['line'], entry['column'] = location
+            output.append(entry)
+        return output
+
+    def slowest_blocks(self, name):
+        output = []
+        for index, elapsed in sorted(self.block_times[name].iteritems(), key=lambda x: -x[1])[:self.slowest]:
+            # Blocks are not kept in the streaming mode
+            text = self.paper.content[index].to_raw_text() if self.paper is not None and index < len(self.paper.content) else ''
+            output.append({'time': elapsed, 'index': index, 'text': text[:80]})
+        return output
+
+    def locate(self, sentence):
+        if self.paper is None or not hasattr(self.paper, 'locate'):
+            return None
+        for i in xrange(len(sentence.tokens)):
+            position = sentence.get_position(i)
+            if position >= 0:
+                return self.paper.locate(position)
+        return None
+
+    def to_records(self):
+        # Plugins are listed after the stage that runs them (they are measured first, as they finish first)
+        names = [n for n in self.stages.keys() if not is_nested(n)]
+        nested = [n for n in self.stages.keys() if is_nested(n)]
+        names = names[:names.index('plugins') + 1] + nested + names[names.index('plugins') + 1:] if 'plugins' in names else names + nested
+        records = []
+        for name in names:
+            stage = self.stages[name]
+            record = dict(stage, name=name)
+            if name in self.sentence_times:
+                record['slowest_sentences'] = self.slowest_sentences(name)
+                record['slowest_paragraphs'] = self.slowest_blocks(name)
+            records.append(record)
+        return records
+
+    def total(self):
+        return sum(s['time'] for name, s in self.stages.items() if not is_nested(name))
+
+    def to_json(self):
+        return {'format': profile_format, 'total': self.total(), 'stages': self.to_records(),
+                'memory': 'tracemalloc' if tracemalloc is not None and tracemalloc.is_tracing() else 'ru_maxrss'}
+
+    def to_table(self):
+        total = max(self.total(), 1e-9)
+        output = ['{:<40} {:>9} {:>7} {:>9} {:>10}'.format('stage', 'time', '%', 'calls', 'memory')]
+        for record in self.to_records():
+            name = ('  ' if is_nested(record['name']) else '') + record['name']
+            output.append('{:<40} {:8.3f}s {:6.1f}% {:9,} {:8.1f}MB'.format(name, record['time'], 100 * record['time'] / total,
+                                                                             record['calls'], record['memory'] / 1048576.0))
+        output.append('{:<40} {:8.3f}s'.format('total', self.total()))
+        for record in self.to_records():
+            for s in record.get('slowest_sentences', [])[:1]:
+                location = 'line {}: '.format(s['line']) if 'line' in s else ''
+                output.append('slowest sentence ({}) {:.4f}s {}{}'.format(record['name'], s['time'], location, s['text']))
+        return '\n'.join(output)
+
+    def to_report(self):
+        """
+        Returns a report section with the profile (for the HTML output; rendering is not included yet at that point).
+        """
+        from swtk.processors import Report
+        details = []
+        for record in self.to_records():
+            details.append('{} : {:.3f} s, {:,} calls, {:.1f} MB'.format(record['name'], record['time'], record['calls'], record['memory'] / 1048576.0))
+            for s in record.get('slowest_sentences', [])[:3]:
+                details.append('{} : slowest sentence ({:.4f} s{}) {}'.format(record['name'], s['time'], ', line {}'.format(s['line']) if 'line' in s else '', s['text']))
+        plugins = [r for r in self.to_records() if is_nested(r['name'])]
+        summary = '{:.2f} s'.format(self.total())
+        if len(plugins) > 0:
+            slowest = max(plugins, key=lambda r: r['time'])
+            summary += ', slowest plugin: {} ({:.2f} s)'.format(slowest['name'][len('plugin: '):], slowest['time'])
+        return Report('Performance', details, 'Time and memory used by the parser and every plugin. Memory is the growth of peak memory usage during each stage.', summary)
+
+
+def stage_name(processor):
+    return 'plugin: {}'.format(processor.__class__.__name__)
+
+
+def is_nested(name):
+    return name.startswith('plugin: ')
+
+
+def measure(name):
+    """
+    Measures a code block with the active profiler (does nothing if profiling is disabled).
+    """
+    return active.measure(name) if active is not None else null_context
+
+
+def enable(slowest=5):
+    """
+    Starts profiling (all subsequent analyses are recorded by the returned profiler).
+    """
+    global active
+    if tracemalloc is not None and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    active = Profiler(slowest)
+    return active
+
+
+def disable():
+    global active
+    profiler, active = active, None
+    if tracemalloc is not None and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return profiler
@@ -0,0 +1,152 @@
+__author__ = 'pkorus'
+
+import os
+import json
+import signal
+import time
+import logging
+import traceback
+import urlparse
+import threading
+import multiprocessing
+import SocketServer
+import BaseHTTPServer
+from swtk import batch
+from swtk import pipeline
+from swtk import export
+from swtk import paper
+
+# Maps the 'format' request parameter to the document type
+document_formats = {'tex': '.tex', 'latex': '.tex', 'md': '.md', 'markdown': '.md', 'txt': '.txt', 'text': '.txt'}
+
+
+def init_worker(root_path, flags, cache_settings=None):
+    """
+    Prepares a worker process (see batch.init_worker). Workers ignore SIGINT, so that the server can shut down the
+    pool cleanly on Ctrl+C.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    batch.init_worker(root_path, flags, cache_settings)
+
+
+def analyze_document(job):
+    """
+    Analyzes a document sent to the server (executed in the worker processes).
+    :param job: (format, document text, output format, external) tuple
+    :return: (HTTP status, content type, response body) tuple
+    """
+    doc_format, text, output, external = job
+    try:
+        p = pipeline.analyze(pipeline.supported_formats[document_formats[doc_format]], text.splitlines(True))
+        if output == 'json':
+            return 200, 'application/json', ''.join(export.iter_json(p))
+        elif output == 'ndjson':
+            return 200, 'application/x-ndjson', ''.join(export.iter_ndjson(p))
+        else:
+            return 200, 'text/html; charset=utf-8', p.to_html(external)
+    except Exception as e:
+        logging.error(traceback.format_exc())
+        if paper.cache is not None:
+            paper.cache.discard()
+        return 500, 'application/json', json.dumps({'error': '{}: {}'.format(e.__class__.__name__, e)})
+
+
+class AnalysisRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    server_version = 'swtk'
+
+    def address_string(self):
+        # Unix socket clients do not have an address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format, *args):
+        logging.info('{} - {}'.format(self.address_string(), format % args))
+
+    def send_content(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_message(self, status, message):
+        self.send_content(status, 'application/json', json.dumps({'error': message}))
+
+    def do_GET(self):
+        if urlparse.urlparse(self.path).path == '/status':
+            self.send_content(200, 'application/json', json.dumps(self.server.analysis_service.status()))
+        else:
+            self.send_error_message(404, 'Unknown resource {}'.format(self.path))
+
+    def do_POST(self):
+        url = urlparse.urlparse(self.path)
+        params = dict(urlparse.parse_qsl(url.query))
+        if url.path != '/analyze':
+            self.send_error_message(404, 'Unknown resource {}'.format(self.path))
+            return
+        doc_format = params.get('format', 'tex').lower()
+        if doc_format not in document_formats:
+            self.send_error_message(400, 'Unsupported document format ({})'.format(doc_format))
+            return
+        output = params.get('output', 'html').lower()
+        if output not in export.formats:
+            self.send_error_message(400, 'Unsupported output format ({})'.format(output))
+            return
+        length = self.headers.getheader('Content-Length')
+        if length is None:
+            self.send_error_message(411, 'Missing Content-Length header')
+            return
+        if not length.strip().isdigit():
+            self.send_error_message(400, 'Invalid Content-Length header ({})'.format(length))
+            return
+        length = int(length)
+        text = self.rfile.read(length)
+        external = params.get('external', '0').lower() in ['1', 'true', 'yes']
+        self.send_content(*self.server.analysis_service.analyze(doc_format, text, output, external))
+
+
+class AnalysisService:
+    """
+    A pool of worker processes with resident NLTK models, plugins and dictionaries.
+    """
+
+    def __init__(self, workers, root_path, flags, cache_settings=None):
+        self.workers = workers
+        self.pool = multiprocessing.Pool(workers, init_worker, (root_path, flags, cache_settings))
+        self.started = time.time()
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def analyze(self, doc_format, text, output, external):
+        with self.lock:
+            self.requests += 1
+        return self.pool.apply(analyze_document, ((doc_format, text, output, external),))
+
+    def status(self):
+        return {'workers': self.workers, 'requests': self.requests, 'uptime': time.time() - self.started}
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+
+class ThreadingHTTPServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class ThreadingUnixHTTPServer(SocketServer.ThreadingMixIn, SocketServer.UnixStreamServer):
+    daemon_threads = True
+
+
+def create_server(service, host='127.0.0.1', port=8765, socket_path=None):
+    """
+    Creates an HTTP server listening on a TCP port, or on a Unix socket (if socket_path is given).
+    """
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, AnalysisRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), AnalysisRequestHandler)
+    server.analysis_service = service
+    return server
@@ -0,0 +1,48 @@
+__author__ = 'pkorus'
+
+import tempfile
+import cPickle as pickle
+
+
+class BlockSpool:
+    """
+    Temporary file with processed blocks of a document (pickled one by one). In the streaming mode, blocks are moved
+    to the spool as soon as the plugins have processed them, and loaded back one at a time for rendering, so that only
+    a single block is kept in memory.
+    """
+
+    def __init__(self, directory=None):
+        """
+        :param directory: directory of the temporary file (default: the system temporary directory)
+        """
+        self.file = tempfile.TemporaryFile(prefix='swtk-spool-', dir=directory)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, block):
+        pickle.dump(block, self.file, pickle.HIGHEST_PROTOCOL)
+        self.count += 1
+
+    def __iter__(self):
+        """
+        Generates the blocks in the order in which they were added.
+        """
+        self.file.flush()
+        self.file.seek(0)
+        for _ in xrange(self.count):
+            yield pickle.load(self.file)
+
+    def drain(self):
+        """
+        Generates the blocks like iter(), and closes (removes) the spool afterwards.
+        """
+        try:
+            for block in self:
+                yield block
+        finally:
+            self.close()
+
+    def close(self):
+        self.file.close()
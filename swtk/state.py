@@ -0,0 +1,88 @@
+__author__ = 'pkorus'
+
+from collections import OrderedDict
+
+
+def merge_values(a, b):
+    """
+    Merges two partial results: numbers are added, lists concatenated, sets united and dictionaries merged key by key
+    (new keys are appended in their order of insertion, values of common keys are merged recursively).
+    """
+    if hasattr(a, 'merge'):
+        return a.merge(b)
+    if isinstance(a, list):
+        a.extend(b)
+        return a
+    if isinstance(a, set):
+        a.update(b)
+        return a
+    if isinstance(a, dict):
+        for k, v in b.iteritems():
+            a[k] = merge_values(a[k], v) if k in a else v
+        return a
+    return a + b
+
+
+class State(object):
+    """
+    Mergeable state of a sentence / token processor. The fields are partial results accumulated over a part of the
+    document; merging the states of successive parts (see merge_values) gives the same result as a single pass over the
+    whole document. Use the ordered containers below, so that the results do not depend on the order of merging.
+    """
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+    def merge(self, other):
+        for name, value in other.__dict__.iteritems():
+            setattr(self, name, merge_values(getattr(self, name), value) if name in self.__dict__ else value)
+        return self
+
+
+class OrderedCounter(OrderedDict):
+    """
+    Counts of keys (missing keys count as 0), ordered by the first occurrence.
+    """
+
+    def __missing__(self, key):
+        return 0
+
+
+class OrderedGroups(OrderedDict):
+    """
+    Lists of items (e.g., token indices) grouped by keys, ordered by the first occurrence.
+    """
+
+    def __missing__(self, key):
+        self[key] = []
+        return self[key]
+
+
+class OrderedSet(object):
+    """
+    Set that remembers the order of insertion.
+    """
+
+    def __init__(self, items=()):
+        self.items = OrderedDict()
+        self.update(items)
+
+    def add(self, item):
+        self.items[item] = True
+
+    def update(self, items):
+        for item in items:
+            self.items[item] = True
+
+    def merge(self, other):
+        self.update(other)
+        return self
+
+    def __contains__(self, item):
+        return item in self.items
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
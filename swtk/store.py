@@ -0,0 +1,106 @@
+__author__ = 'pkorus'
+
+from array import array
+from swtk.features import WordFeatures
+
+
+class TokenStore(object):
+    """
+    Columnar storage of the tokens of a document. Words and POS tags are interned and kept as arrays of ids, sentences
+    and paragraphs as arrays of offsets. Reports and alternatives are stored sparsely - only for tokens that have any.
+    Token and Sentence objects are lightweight views over the store.
+    """
+
+    def __init__(self):
+        # Interned words and POS tags
+        self.words = []
+        self.word_ids = {}
+        self.tags = ['']
+        self.tag_ids = {'': 0}
+        # Per-token columns
+        self.token_words = array('i')
+        self.token_tags = array('H')
+        # Span of each token in the text of its sentence, and its offset in the source document (-1 if unknown)
+        self.token_starts = array('i')
+        self.token_ends = array('i')
+        self.token_positions = array('i')
+        # Index of the first token of each sentence, and the first sentence of each paragraph
+        self.sentence_offsets = array('i')
+        self.paragraph_offsets = array('i')
+        # Sparse per-token annotations: token index -> list
+        self.reports = {}
+        self.alternatives = {}
+        # Features of the interned words (computed on first use, see get_features)
+        self.word_features = []
+
+    def __len__(self):
+        return len(self.token_words)
+
+    def __getstate__(self):
+        # Features are not pickled (e.g., with blocks moved to the spool) - they are recomputed on demand
+        state = self.__dict__.copy()
+        state['word_features'] = []
+        return state
+
+    def word_id(self, word):
+        if word not in self.word_ids:
+            self.word_ids[word] = len(self.words)
+            self.words.append(word)
+        return self.word_ids[word]
+
+    def tag_id(self, tag):
+        if tag not in self.tag_ids:
+            self.tag_ids[tag] = len(self.tags)
+            self.tags.append(tag)
+        return self.tag_ids[tag]
+
+    def add_sentence(self, words, tags=None, spans=None, positions=None):
+        """
+        Appends the tokens of a sentence.
+        :param words: list of words
+        :param tags: optional list of POS tags
+        :param spans: optional list of (start, end) spans of the tokens in the sentence text
+        :param positions: optional list of offsets of the tokens in the source document
+        :return: (start, end) indices of the tokens in the store
+        """
+        start = len(self.token_words)
+        self.sentence_offsets.append(start)
+        self.token_words.extend([self.word_id(w) for w in words])
+        if tags is not None:
+            self.token_tags.extend([self.tag_id(t) for t in tags])
+        else:
+            self.token_tags.extend([0] * len(words))
+        if spans is not None:
+            self.token_starts.extend([b for (b, e) in spans])
+            self.token_ends.extend([e for (b, e) in spans])
+        else:
+            self.token_starts.extend([-1] * len(words))
+            self.token_ends.extend([-1] * len(words))
+        self.token_positions.extend(positions if positions is not None else [-1] * len(words))
+        return start, len(self.token_words)
+
+    def begin_paragraph(self):
+        self.paragraph_offsets.append(len(self.sentence_offsets))
+
+    def get_word(self, index):
+        return self.words[self.token_words[index]]
+
+    def get_features(self, word_id):
+        """
+        Returns the features of a word (see swtk.features.WordFeatures); they are computed once per word type.
+        """
+        features = self.word_features
+        if word_id >= len(features):
+            features.extend([None] * (len(self.words) - len(features)))
+        if features[word_id] is None:
+            features[word_id] = WordFeatures(self.words[word_id])
+        return features[word_id]
+
+    def get_tag(self, index):
+        return self.tags[self.token_tags[index]]
+
+    def set_tag(self, index, tag):
+        self.token_tags[index] = self.tag_id(tag)
+
+    def add_report(self, index, report):
+        self.reports.setdefault(index, []).append(report)
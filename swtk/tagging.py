@@ -0,0 +1,173 @@
+__author__ = 'pkorus'
+
+import os
+import nltk
+import multiprocessing
+
+
+class NLTKTagger:
+    """
+    The default tagger of the installed version of NLTK (nltk.pos_tag).
+    """
+
+    def tag_sents(self, sentences):
+        if hasattr(nltk, 'pos_tag_sents'):
+            return nltk.pos_tag_sents(sentences)
+        return [nltk.pos_tag(s) for s in sentences]
+
+
+class PerceptronTagger:
+    """
+    Averaged Perceptron Tagger (the model is loaded once).
+    """
+
+    def __init__(self):
+        from nltk.tag import perceptron
+        self.tagger = perceptron.PerceptronTagger()
+
+    def tag_sents(self, sentences):
+        return [self.tagger.tag(s) for s in sentences]
+
+
+class MaxentTagger:
+    """
+    Maximal Entropy Treebank POS tagger (requires the maxent_treebank_pos_tagger model).
+    """
+
+    def __init__(self):
+        self.tagger = nltk.data.load('taggers/maxent_treebank_pos_tagger/english.pickle')
+
+    def tag_sents(self, sentences):
+        return [self.tagger.tag(s) for s in sentences]
+
+
+class HybridTagger(PerceptronTagger):
+    """
+    Averaged Perceptron Tagger with a lookup table of unambiguous words (see swtk-dictionary.py --pos-lookup): words
+    found in the table are tagged directly, and the model is evaluated only for the remaining (ambiguous or unknown)
+    words - the tags of the preceding words, which the model uses as features, come from the table as well. Without a
+    table, only the (small) dictionary of the model is used and the tags are the same as those of the perceptron.
+    """
+
+    def __init__(self, lookup=None):
+        PerceptronTagger.__init__(self)
+        self.table = dict(self.tagger.tagdict)
+        if lookup is not None:
+            self.table.update(load_lookup(lookup))
+
+    def tag(self, words):
+        tagger = self.tagger
+        prev, prev2 = tagger.START
+        context = None
+        output = []
+        for i, word in enumerate(words):
+            tag = self.table.get(word)
+            if tag is None:
+                # The context is needed only if some word is missing from the table
+                if context is None:
+                    context = tagger.START + [tagger.normalize(w) for w in words] + tagger.END
+                tag = tagger.model.predict(tagger._get_features(i, word, context, prev, prev2))
+                # Newer versions of NLTK return a (tag, confidence) tuple
+                if isinstance(tag, tuple):
+                    tag = tag[0]
+            output.append((word, tag))
+            prev2 = prev
+            prev = tag
+        return output
+
+    def tag_sents(self, sentences):
+        return [self.tag(s) for s in sentences]
+
+
+# Available tagger backends (see get_tagger)
+backends = {'default': NLTKTagger, 'perceptron': PerceptronTagger, 'maxent': MaxentTagger, 'hybrid': HybridTagger}
+
+# Tagger instances: (backend, lookup) -> tagger
+instances = {}
+
+
+def get_tagger(backend='default', lookup=None):
+    """
+    Returns a shared instance of a tagger backend (the models are loaded on first use).
+    :param backend: name of the backend (see backends)
+    :param lookup: lookup table of unambiguous words (used by the hybrid tagger)
+    """
+    if backend not in backends:
+        raise ValueError('Unknown tagger {} (available: {})'.format(backend, ', '.join(sorted(backends.keys()))))
+    if (backend, lookup) not in instances:
+        instances[(backend, lookup)] = backends[backend](lookup) if backend == 'hybrid' else backends[backend]()
+    return instances[(backend, lookup)]
+
+
+def signature(backend='default', lookup=None):
+    """
+    Returns a string identifying the tagger (e.g., to keep cached tags of different taggers apart).
+    """
+    if backend == 'hybrid' and lookup is not None:
+        return '{}:{}:{}'.format(backend, os.path.abspath(lookup), os.path.getmtime(lookup))
+    return backend
+
+
+def load_lookup(filename):
+    """
+    Loads a lookup table of unambiguous words - a text file with one word per line followed by its tag.
+    :return: dictionary: word -> tag
+    """
+    table = {}
+    with open(filename) as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 2:
+                table[fields[0]] = fields[1]
+    return table
+
+
+def tag_sentences(sentences, backend='default', lookup=None):
+    """
+    Tags a batch of tokenized sentences using a single tagger instance (nltk.pos_tag sets up the tagger on every call).
+    :param sentences: list of sentences (lists of words)
+    :return: list of tagged sentences (lists of (word, tag) tuples)
+    """
+    return get_tagger(backend, lookup).tag_sents(sentences)
+
+
+def tag_job(job):
+    return tag_sentences(*job)
+
+
+def split_batches(groups, batch_size):
+    """
+    Merges groups of sentences (e.g., paragraphs) into batches of at least batch_size sentences; groups are not split.
+    """
+    batches = [[]]
+    for group in groups:
+        if len(batches[-1]) >= batch_size:
+            batches.append([])
+        batches[-1].extend(group)
+    return [b for b in batches if len(b) > 0]
+
+
+def tag_batched(groups, batch_size=500, workers=1, backend='default', lookup=None):
+    """
+    Tags groups of sentences in batches - optionally using a pool of worker processes.
+    :param groups: list of groups (e.g., paragraphs) of sentences (lists of words)
+    :param batch_size: minimum number of sentences sent to the tagger at once
+    :param workers: number of worker processes
+    :param backend: name of the tagger backend (see backends)
+    :return: flat list of tagged sentences (in the original order)
+    """
+    batches = split_batches(groups, batch_size)
+    # Daemonic processes (e.g., workers of the batch mode) cannot have children
+    if workers > 1 and len(batches) > 1 and not multiprocessing.current_process().daemon:
+        # Load the tagger before forking: backends that keep their model (see get_tagger) are inherited by the workers;
+        # the default backend (nltk.pos_tag) loads the model again on every call, so nothing is shared there
+        tag_sentences([['.']], backend, lookup)
+        pool = multiprocessing.Pool(min(workers, len(batches)))
+        try:
+            results = pool.map(tag_job, [(b, backend, lookup) for b in batches])
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [tag_sentences(b, backend, lookup) for b in batches]
+    return [s for r in results for s in r]
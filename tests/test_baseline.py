@@ -0,0 +1,57 @@
+__author__ = 'pkorus'
+
+import random
+import unittest
+from swtk.baseline import QuantileSketch
+
+
+def weight(sketch):
+    return sum(2 ** h * len(level) for h, level in enumerate(sketch.levels))
+
+
+class QuantileSketchTest(unittest.TestCase):
+
+    def setUp(self):
+        generator = random.Random(0)
+        self.values = [generator.gauss(0.0, 1.0) for i in range(20000)]
+
+    def build(self, values):
+        sketch = QuantileSketch()
+        for v in values:
+            sketch.add(v)
+        return sketch
+
+    def check_ranks(self, sketch, values):
+        ordered = sorted(values)
+        for q in [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99]:
+            value = ordered[int(q * len(ordered))]
+            exact = sum(1 for x in ordered if x < value) / float(len(ordered))
+            self.assertLess(abs(sketch.rank(value) - exact), 0.02)
+
+    def test_single_sketch(self):
+        sketch = self.build(self.values)
+        self.assertEqual(weight(sketch), sketch.count)
+        self.assertLess(sketch.size(), 1000)
+        self.check_ranks(sketch, self.values)
+
+    def test_merge(self):
+        parts = [self.values[i:i + 1500] for i in range(0, len(self.values), 1500)]
+        sketch = reduce(lambda a, b: a.merge(b), [self.build(p) for p in parts])
+        self.assertEqual(sketch.count, len(self.values))
+        self.assertEqual(weight(sketch), len(self.values))
+        self.assertEqual((sketch.minimum, sketch.maximum), (min(self.values), max(self.values)))
+        self.check_ranks(sketch, self.values)
+
+    def test_json(self):
+        sketch = self.build(self.values[:5000])
+        copy = QuantileSketch.from_json(sketch.to_json())
+        self.assertEqual(copy.quantile(0.5), sketch.quantile(0.5))
+        self.assertEqual(weight(copy), 5000)
+
+    def test_empty(self):
+        self.assertIsNone(QuantileSketch().rank(0.0))
+        self.assertIsNone(QuantileSketch().quantile(0.5))
+
+
+if __name__ == '__main__':
+    unittest.main()
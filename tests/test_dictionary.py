@@ -0,0 +1,41 @@
+__author__ = 'pkorus'
+
+import random
+import shutil
+import tempfile
+import unittest
+from collections import Counter
+from swtk import dictionary
+
+
+class RunsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.max_open_runs = dictionary.max_open_runs
+        generator = random.Random(0)
+        words = ['w{}'.format(i) for i in range(300)]
+        self.chunks = [[generator.choice(words) for i in range(200)] for j in range(20)]
+
+    def tearDown(self):
+        dictionary.max_open_runs = self.max_open_runs
+        shutil.rmtree(self.directory)
+
+    def spill_chunks(self):
+        return [dictionary.spill(Counter(chunk), self.directory) for chunk in self.chunks]
+
+    def expected(self):
+        return sorted(Counter(w for chunk in self.chunks for w in chunk).items())
+
+    def test_merge_runs(self):
+        self.assertEqual(list(dictionary.merge_runs(self.spill_chunks())), self.expected())
+
+    def test_compact_runs(self):
+        dictionary.max_open_runs = 3
+        runs = dictionary.compact_runs(self.spill_chunks(), self.directory)
+        self.assertLessEqual(len(runs), 3)
+        self.assertEqual(list(dictionary.merge_runs(runs)), self.expected())
+
+
+if __name__ == '__main__':
+    unittest.main()
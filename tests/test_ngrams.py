@@ -0,0 +1,47 @@
+__author__ = 'pkorus'
+
+import random
+import unittest
+from swtk import ngrams
+
+
+class CountNGramsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.numpy = ngrams.np
+        generator = random.Random(0)
+        self.ids = [generator.randint(0, 30) for i in range(3000)]
+        self.valid = [i % 7 != 0 for i in range(31)]
+
+    def tearDown(self):
+        ngrams.np = self.numpy
+
+    def count(self, ids, n, min_frequency, numpy):
+        ngrams.np = self.numpy if numpy else None
+        return ngrams.count_ngrams(self.numpy.array(ids) if numpy else ids, n, self.valid, min_frequency)
+
+    @unittest.skipIf(ngrams.np is None, 'NumPy is not available')
+    def test_numpy_matches_fallback(self):
+        for n in range(1, 6):
+            for min_frequency in [1, 2, 5]:
+                self.assertEqual(self.count(self.ids, n, min_frequency, True), self.count(self.ids, n, min_frequency, False))
+
+    @unittest.skipIf(ngrams.np is None, 'NumPy is not available')
+    def test_numpy_large_ids(self):
+        # Ids too large to be packed into a single integer
+        ids = [x * 10 ** 5 for x in self.ids]
+        self.valid = [True] * (max(ids) + 1)
+        self.assertEqual(self.count(ids, 4, 2, True), self.count(ids, 4, 2, False))
+
+    def test_order(self):
+        ngrams.np = None
+        counts = ngrams.count_ngrams([1, 2, 3, 1, 2, 3, 2, 3], 2, [True] * 4, 2)
+        self.assertEqual(counts, [((2, 3), 3), ((1, 2), 2)])
+
+    def test_short_sequence(self):
+        ngrams.np = None
+        self.assertEqual(ngrams.count_ngrams([1, 2], 3, [True] * 3, 1), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
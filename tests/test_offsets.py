@@ -0,0 +1,60 @@
+__author__ = 'pkorus'
+
+import unittest
+from swtk import paper
+from swtk.offsets import LineIndex
+
+
+class LineIndexTest(unittest.TestCase):
+
+    lines = ['first line\n', '\n', 'third\n', 'last line without a newline']
+
+    def test_locate(self):
+        index = LineIndex(self.lines)
+        text = ''.join(self.lines)
+        for offset in range(len(text)):
+            line = text[:offset].count('\n') + 1
+            column = offset - (text.rfind('\n', 0, offset) + 1) + 1
+            self.assertEqual(index.locate(offset), (line, column))
+
+    def test_follow_matches_track(self):
+        index = LineIndex([])
+        followed = list(index.follow(iter(self.lines)))
+        self.assertEqual(list(index.starts), LineIndex(self.lines).starts)
+        self.assertEqual([list(l.offsets) for l in followed], [list(l.offsets) for l in LineIndex(self.lines).track(self.lines)])
+
+    def test_invalid_offsets(self):
+        self.assertIsNone(LineIndex(self.lines).locate(-1))
+        self.assertIsNone(LineIndex([]).locate(0))
+
+
+class TokenPositionTest(unittest.TestCase):
+
+    def check(self, paper_class, lines):
+        p = paper_class(lines, {})
+        source = ''.join(lines)
+        checked = 0
+        for s in p.get_all_sentences():
+            for i, t in enumerate(s.tokens):
+                if t.word.isalpha():
+                    position = s.get_position(i)
+                    self.assertEqual(source[position:position + len(t.word)], t.word)
+                    self.assertEqual(s.text[t.span[0]:t.span[1]], t.word)
+                    checked += 1
+        self.assertGreater(checked, 0)
+        return p
+
+    def test_plaintext(self):
+        self.check(paper.PlaintextPaper, ['A title\n', '\n', 'The first sentence. And a second one\n', 'spans two lines.\n'])
+
+    def test_latex(self):
+        lines = ['\\documentclass{article}\n', '\\begin{document}\n', '\\maketitle\n', '\n', '\\section{Introduction}\n', '\n',
+                 'Words with \\emph{emphasis} and a citation \\cite{ref}.\n', '\n', 'Another \\textbf{bold} sentence.\n',
+                 '\n', '\\end{document}\n']
+        p = self.check(paper.LatexPaper, lines)
+        sentence = [s for s in p.get_all_sentences() if 'Another' in [t.word for t in s.tokens]][0]
+        self.assertEqual(p.locate(sentence.get_position(0)), (9, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+__author__ = 'pkorus'
+
+import unittest
+from swtk.phrases import PhraseMatcher
+
+
+def find_sequence(long_sequence, sequence_pattern):
+    # Reference: the naive search used before the automaton
+    return [(i, i+len(sequence_pattern)) for i in range(len(long_sequence)) if long_sequence[i:i+len(sequence_pattern)] == sequence_pattern]
+
+
+class PhraseMatcherTest(unittest.TestCase):
+
+    phrases = [['a', 'lot'], ['a', 'lot', 'of'], ['lot', 'of'], ['of'], ['in', 'order', 'to'], ['order'],
+               ['a', 'a'], ['to', 'be', 'a']]
+
+    def check(self, words):
+        expected = sorted((start, end, i) for i, p in enumerate(self.phrases) for start, end in find_sequence(words, p))
+        self.assertEqual(sorted(PhraseMatcher(self.phrases).match(words)), expected)
+
+    def test_overlapping_phrases(self):
+        self.check('we need a lot of data in order to be a a lot better'.split())
+
+    def test_repeated_words(self):
+        self.check('a a a lot of of a'.split())
+
+    def test_no_matches(self):
+        self.check('nothing to see here'.split())
+        self.check([])
+
+    def test_matches_ordered_by_end(self):
+        matches = PhraseMatcher(self.phrases).match('a lot of'.split())
+        self.assertEqual([end for _, end, _ in matches], sorted(end for _, end, _ in matches))
+        self.assertIn((0, 3, 1), matches)
+        self.assertIn((1, 3, 2), matches)
+        self.assertIn((2, 3, 3), matches)
+
+    def test_empty_phrase_is_ignored(self):
+        self.assertEqual(PhraseMatcher([[], ['x']]).match(['x']), [(0, 1, 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
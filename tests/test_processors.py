@@ -0,0 +1,60 @@
+__author__ = 'pkorus'
+
+import os
+import unittest
+from swtk import paper, pipeline, processors
+
+root_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+class ScheduledRunTest(unittest.TestCase):
+    """
+    Parallel runs of the plugins (sharded sentence & token processors, concurrent text processors) have to give the
+    same report as a sequential run.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        if len(processors.Plugin.plugins) == 0:
+            pipeline.configure()
+            pipeline.load_plugins(root_path)
+        with open(os.path.join(root_path, 'samples', 'introduction.tex')) as f:
+            cls.lines = f.readlines()
+
+    def setUp(self):
+        self.options = dict(processors.options)
+        self.run_sharded = processors.run_sharded
+        self.sharded = []
+
+    def tearDown(self):
+        processors.options.clear()
+        processors.options.update(self.options)
+        processors.run_sharded = self.run_sharded
+
+    def analyze(self, **options):
+        processors.options.update(options)
+        p = pipeline.analyze(paper.LatexPaper, self.lines)
+        return p.to_html(), p.stats
+
+    def record_sharded(self, *args):
+        self.sharded.append(self.run_sharded(*args))
+        return self.sharded[-1]
+
+    def test_sharded_matches_serial(self):
+        html, stats = self.analyze(shard_workers=1)
+        processors.run_sharded = self.record_sharded
+        sharded_html, sharded_stats = self.analyze(shard_workers=2)
+        # At least one scope has to run on shards
+        self.assertIn(True, self.sharded)
+        self.assertEqual(sharded_stats, stats)
+        self.assertEqual(sharded_html, html)
+
+    def test_concurrent_text_processors_match_serial(self):
+        html, stats = self.analyze(plugin_workers=1)
+        concurrent_html, concurrent_stats = self.analyze(plugin_workers=4)
+        self.assertEqual(concurrent_stats, stats)
+        self.assertEqual(concurrent_html, html)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+__author__ = 'pkorus'
+
+import unittest
+from swtk.state import State, OrderedCounter, OrderedGroups, OrderedSet
+
+
+class StateTest(unittest.TestCase):
+
+    @staticmethod
+    def count(words):
+        state = State(counts=OrderedCounter(), positions=OrderedGroups(), seen=OrderedSet(), total=0)
+        for position, word in words:
+            state.counts[word] += 1
+            state.positions[word].append(position)
+            state.seen.add(word)
+            state.total += 1
+        return state
+
+    def test_merge_matches_single_pass(self):
+        words = list(enumerate('the cat saw the dog and a cat saw the bird'.split()))
+        whole = self.count(words)
+        for split in range(len(words) + 1):
+            merged = self.count(words[:split]).merge(self.count(words[split:]))
+            self.assertEqual(merged.counts.items(), whole.counts.items())
+            self.assertEqual(merged.positions.items(), whole.positions.items())
+            self.assertEqual(list(merged.seen), list(whole.seen))
+            self.assertEqual(merged.total, whole.total)
+
+    def test_merge_keeps_order_of_first_occurrence(self):
+        merged = self.count([(0, 'b'), (1, 'a')]).merge(self.count([(2, 'c'), (3, 'a')]))
+        self.assertEqual(merged.counts.keys(), ['b', 'a', 'c'])
+        self.assertEqual(merged.positions['a'], [1, 3])
+
+    def test_merge_adds_missing_fields(self):
+        merged = State(total=1).merge(State(total=2, extra=[1]))
+        self.assertEqual(merged.total, 3)
+        self.assertEqual(merged.extra, [1])
+
+
+if __name__ == '__main__':
+    unittest.main()